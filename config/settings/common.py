@@ -202,7 +202,11 @@ LOGIN_REDIRECT_URL = "/app/"
 
 APPEND_SLASH = True
 
-CELERY_WORKER_MAX_TASKS_PER_CHILD = 1
+# By default each celery pool process runs a single task and is then replaced. Set the
+# SEED_CELERY_WARM_WORKERS environment variable to true to keep the pool processes (and their
+# module caches) alive between tasks, see seed/celery.py.
+SEED_CELERY_WARM_WORKERS = os.environ.get('SEED_CELERY_WARM_WORKERS', 'false').lower() == 'true'
+CELERY_WORKER_MAX_TASKS_PER_CHILD = None if SEED_CELERY_WARM_WORKERS else 1
 
 # Default queue
 CELERY_TASK_DEFAULT_QUEUE = 'seed-common'
@@ -2,8 +2,8 @@ from django.http import JsonResponse
 from rest_framework import viewsets
 
 from seed.decorators import ajax_request_class
+from seed.lib.progress_data.progress_data import ProgressData
 from seed.utils.api import api_endpoint_class
-from seed.utils.cache import get_cache
 
 import logging
 _log = logging.getLogger(__name__)
@@ -25,8 +25,10 @@ class ProgressViewSetV2(viewsets.ViewSet):
             }
         """
         progress_key = pk
-        if get_cache(progress_key):
-            return JsonResponse(get_cache(progress_key))
+        # read only, polling the progress does not write to the cache
+        progress = ProgressData.result_from_key(progress_key)
+        if progress:
+            return JsonResponse(progress)
         else:
             return JsonResponse({
                 'progress_key': progress_key,
@@ -10,7 +10,9 @@ import os
 
 import celery
 import raven
+from celery.signals import task_postrun, worker_init
 from django.conf import settings
+from django.db import reset_queries
 from raven.contrib.celery import register_signal, register_logger_signal
 
 # set the default Django settings module for the 'celery' program.
@@ -35,5 +37,41 @@ app = Celery('seed')
 app.config_from_object('django.conf:settings', namespace='CELERY')
 app.autodiscover_tasks(lambda: settings.SEED_CORE_APPS)
 
+
+def preload_worker_modules():
+    """
+    Import the heavy modules used by the import tasks and warm their module level caches: the pint
+    unit registry, the usaddress tagger, jellyfish and the hash field plans of the states. This
+    does not open any database connections, so it is safe to call before the pool processes fork.
+    """
+    import jellyfish
+    from quantityfield import ureg
+
+    from seed.data_importer import tasks
+    from seed.models import PropertyState, TaxLotState
+    from seed.utils.address import normalize_address_str
+
+    ureg.parse_expression('kBtu/ft**2/year')
+    normalize_address_str('123 Main St')
+    jellyfish.levenshtein_distance('seed', 'feed')
+    for state_class in (PropertyState, TaxLotState):
+        tasks._get_hash_plan(state_class())
+
+
+@worker_init.connect
+def on_worker_init(**kwargs):
+    # Runs once in the main worker process, so the pool processes are forked with the modules
+    # already loaded (whether or not they are recycled after each task).
+    preload_worker_modules()
+
+
+@task_postrun.connect
+def on_task_postrun(**kwargs):
+    # The Django fixup of celery already closes the database connections after each task. The only
+    # other state that builds up in a long lived process is the query log (when DEBUG is on).
+    if settings.SEED_CELERY_WARM_WORKERS:
+        reset_queries()
+
+
 if __name__ == '__main__':
     app.start()
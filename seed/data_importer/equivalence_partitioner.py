@@ -63,6 +63,7 @@ class EquivalencePartitioner(object):
         the two objects are definitely different object)
         """
 
+        self.canonical_fields = [fieldlist[0] for fieldlist in equivalence_class_description]
         self.equiv_comparison_key_func = self.make_resolved_key_calculation_function(
             equivalence_class_description)
         self.equiv_canonical_key_func = self.make_canonical_key_calculation_function(
@@ -176,7 +177,7 @@ class EquivalencePartitioner(object):
 
     @staticmethod
     def merge_keys(key1, key2):
-        return [a if a else b for (a, b) in list(zip(key1, key2))]
+        return tuple([a if a else b for (a, b) in list(zip(key1, key2))])
 
     @staticmethod
     def identities_are_different(key1, key2):
@@ -205,25 +206,72 @@ class EquivalencePartitioner(object):
         """
         equivalence_classes = collections.defaultdict(list)
         identities_for_equivalence = {}
+        key_index = KeyIndex()
 
         for (ndx, obj) in enumerate(list_of_obj):
             cmp_key = self.calculate_comparison_key(obj)
             identity_key = self.calculate_identity_key(obj)
 
-            for class_key in equivalence_classes:
-                if self.calculate_key_equivalence(class_key, cmp_key) and not \
-                    self.identities_are_different(identities_for_equivalence[class_key],
-                                                  identity_key):
+            # Only the class keys sharing a value with cmp_key can be equivalent to it. Check
+            # them in the same order as the equivalence_classes are iterated so that the first
+            # match is the same class that a scan over all of the class keys would find.
+            for class_key in key_index.candidates(cmp_key):
+                if not self.identities_are_different(identities_for_equivalence[class_key],
+                                                     identity_key):
 
                     equivalence_classes[class_key].append(ndx)
 
                     if self.key_needs_merging(class_key, cmp_key):
                         merged_key = self.merge_keys(class_key, cmp_key)
                         equivalence_classes[merged_key] = equivalence_classes.pop(class_key)
+                        key_index.remove(class_key)
+                        key_index.add(merged_key)
                         identities_for_equivalence[merged_key] = identity_key
                     break
             else:
                 can_key = self.calculate_canonical_key(obj)
                 equivalence_classes[can_key].append(ndx)
+                key_index.add(can_key)
                 identities_for_equivalence[can_key] = identity_key
         return equivalence_classes
+
+
+class KeyIndex(object):
+    """Index of equivalence keys by the value in each position of the key.
+
+    Two keys are equivalent when they share a non-None value in the same position (see
+    EquivalencePartitioner.calculate_key_equivalence), so the candidates for a key can be found
+    with one dictionary lookup per position instead of comparing against every indexed key.
+    """
+
+    def __init__(self):
+        # position -> value -> set of keys
+        self.positions = collections.defaultdict(lambda: collections.defaultdict(set))
+        # key -> insertion sequence, mirrors the iteration order of a dict with the same keys
+        self.order = {}
+        self.sequence = 0
+
+    def add(self, key):
+        if key in self.order:
+            # assigning to an existing key of a dict keeps its position
+            return
+
+        self.order[key] = self.sequence
+        self.sequence += 1
+        for (position, value) in enumerate(key):
+            if value is not None:
+                self.positions[position][value].add(key)
+
+    def remove(self, key):
+        del self.order[key]
+        for (position, value) in enumerate(key):
+            if value is not None:
+                self.positions[position][value].discard(key)
+
+    def candidates(self, key):
+        """Return the indexed keys equivalent to key, in insertion order"""
+        result = set()
+        for (position, value) in enumerate(key):
+            if value is not None and value in self.positions[position]:
+                result.update(self.positions[position][value])
+        return sorted(result, key=self.order.get)
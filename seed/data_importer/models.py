@@ -9,6 +9,7 @@ import hashlib
 import json
 import logging
 import math
+import os
 import tempfile
 
 try:
@@ -717,20 +718,46 @@ class ImportFile(NotDeletableModel, TimeStampedModel):
             a, b = a.lower(), b.lower()
         return a == b
 
+    @property
+    def in_local_storage(self):
+        """True if the file can be opened where it is stored, i.e. the storage has paths"""
+        try:
+            self.file.path
+        except NotImplementedError:
+            return False
+        return True
+
     @property
     def local_file(self):
+        """
+        The import file opened for reading. A file in local storage is opened where it is stored,
+        otherwise it is copied to a temporary file. Call close_local_file when done with it.
+        """
         if not hasattr(self, '_local_file'):
-            temp_file = tempfile.NamedTemporaryFile(mode='w+b', delete=False)
-            for chunk in self.file.chunks(1024):
-                temp_file.write(chunk)
-            temp_file.flush()
-            temp_file.close()
-            self.file.close()
-            self._local_file = open(temp_file.name, 'rU')
+            if self.in_local_storage:
+                path = self.file.path
+            else:
+                temp_file = tempfile.NamedTemporaryFile(mode='w+b', delete=False)
+                for chunk in self.file.chunks(1024):
+                    temp_file.write(chunk)
+                temp_file.flush()
+                temp_file.close()
+                self.file.close()
+                path = self._local_temp_path = temp_file.name
+            self._local_file = open(path, 'rU')
 
         self._local_file.seek(0)
         return self._local_file
 
+    def close_local_file(self):
+        """Close the file opened by local_file and remove the temporary copy, if one was made"""
+        local_file = self.__dict__.pop('_local_file', None)
+        if local_file is not None:
+            local_file.close()
+        temp_path = self.__dict__.pop('_local_temp_path', None)
+        if temp_path is not None:
+            os.remove(temp_path)
+
     @property
     def data_rows(self):
         """Iterable of rows, made of iterable of column values of the raw data"""
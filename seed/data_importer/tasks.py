@@ -8,7 +8,6 @@
 from __future__ import absolute_import
 
 import collections
-import copy
 import datetime as dt
 import hashlib
 import os
@@ -16,7 +15,7 @@ import traceback
 from _csv import Error
 from builtins import str
 from collections import namedtuple
-from itertools import chain
+from itertools import chain, islice
 
 from celery import chord, shared_task
 from celery.utils.log import get_task_logger
@@ -27,7 +26,7 @@ from django.utils.timezone import make_naive
 from past.builtins import basestring
 from unidecode import unidecode
 
-from seed.data_importer.equivalence_partitioner import EquivalencePartitioner
+from seed.data_importer.equivalence_partitioner import EquivalencePartitioner, KeyIndex
 from seed.data_importer.models import (
     ImportFile,
     ImportRecord,
@@ -40,7 +39,6 @@ from seed.lib.mcm.mapper import expand_rows
 from seed.lib.mcm.utils import batch
 from seed.lib.merging import merging
 from seed.lib.progress_data.progress_data import ProgressData
-from seed.lib.superperms.orgs.models import Organization
 from seed.models import (
     ASSESSED_BS,
     ASSESSED_RAW,
@@ -66,7 +64,10 @@ from seed.models import TaxLotAuditLog
 from seed.models import TaxLotProperty
 from seed.models.auditlog import AUDIT_IMPORT
 from seed.models.data_quality import DataQualityCheck
+from seed.models.properties import sync_long_lat
+from seed.utils.address import normalize_address_str
 from seed.utils.buildings import get_source_type
+from seed.utils.cache import get_cache_raw, set_cache_raw
 from seed.utils.geocode import geocode_buildings
 from seed.utils.ubid import decode_ubids
 
@@ -93,13 +94,17 @@ def check_data_chunk(model, ids, dq_id):
 
 
 @shared_task(ignore_result=True)
-def finish_checking(progress_key):
+def finish_checking(progress_key, identifier):
     """
     Chord that is called after the data quality check is complete
 
+    :param progress_key: string, key of the progress key
     :param identifier: import file primary key
     :return: dict, results from queue
     """
+    # merge the results of all of the chunks once, now that they are all done
+    DataQualityCheck.merge_cached_results(identifier)
+
     progress_data = ProgressData.from_key(progress_key)
     progress_data.finish_with_success()
     return progress_data.result()
@@ -141,9 +146,9 @@ def do_checks(org_id, propertystate_ids, taxlotstate_ids, import_file_id=None):
     progress_data.save()
     if tasks:
         # specify the chord as an immutable with .si
-        chord(tasks, interval=15)(finish_checking.si(progress_data.key))
+        chord(tasks, interval=15)(finish_checking.si(progress_data.key, dq_id))
     else:
-        finish_checking.s(progress_data.key)
+        finish_checking.s(progress_data.key, dq_id)
 
     # always return something so that the code works with always eager
     return progress_data.result()
@@ -225,23 +230,27 @@ def _build_cleaner(org):
     return cleaners.Cleaner(ontology)
 
 
-@shared_task(ignore_result=True)
-def map_row_chunk(ids, file_pk, source_type, prog_key, **kwargs):
-    """Does the work of matching a mapping to a source type and saving
+def _mapping_plan_cache_key(import_file_id):
+    """
+    Return the cache key of the mapping plan of an import file
 
-    :param ids: list of PropertyState IDs to map.
-    :param file_pk: int, the PK for an ImportFile obj.
-    :param source_type: int, represented by either ASSESSED_RAW or PORTFOLIO_RAW.
-    :param prog_key: string, key of the progress key
-    :param increment: double, value by which to increment progress key
+    :param import_file_id: int, the id of the import file
+    :return: str
     """
-    progress_data = ProgressData.from_key(prog_key)
-    import_file = ImportFile.objects.get(pk=file_pk)
-    save_type = PORTFOLIO_BS
-    if source_type == ASSESSED_RAW:
-        save_type = ASSESSED_BS
+    return 'mapping_plan__%s' % import_file_id
+
 
-    org = Organization.objects.get(pk=import_file.import_record.super_organization.pk)
+def _build_mapping_plan(import_file):
+    """
+    Build everything that map_row_chunk needs to know about the mappings of an import file that
+    does not depend on the rows. This is computed once when map_data starts and cached for the
+    chunks instead of being recomputed by every chunk.
+
+    :param import_file: ImportFile instance
+    :return: dict, with the table_mappings, delimited_fields, delimited_field_list,
+        extra_data_fields (by table) and the cleaner
+    """
+    org = import_file.import_record.super_organization
 
     # get all the table_mappings that exist for the organization
     table_mappings = ColumnMapping.get_column_mappings_by_table_name(org)
@@ -261,8 +270,6 @@ def map_row_chunk(ids, file_pk, source_type, prog_key, **kwargs):
             if not table_mappings[table]:
                 del table_mappings[table]
 
-    map_cleaner = _build_cleaner(org)
-
     # *** BREAK OUT INTO SEPARATE METHOD ***
     # figure out which import field is defined as the unique field that may have a delimiter of
     # individual values (e.g. tax lot ids). The definition of the delimited field is currently
@@ -283,9 +290,6 @@ def map_row_chunk(ids, file_pk, source_type, prog_key, **kwargs):
         delimited_fields = {}
         # field does not exist in mapping list, so ignoring
 
-    # _log.debug("my table mappings are {}".format(table_mappings))
-    # _log.debug("delimited_field that will be expanded and normalized: {}".format(delimited_fields))
-
     # If a single file is being imported into both the tax lot and property table, then add
     # an extra custom mapping for the cross-related data. If the data are not being imported into
     # the property table then make sure to skip this so that superfluous property entries are
@@ -297,6 +301,71 @@ def map_row_chunk(ids, file_pk, source_type, prog_key, **kwargs):
                 'PropertyState', 'lot_number', 'Lot Number', False)
     # *** END BREAK OUT ***
 
+    # the 3rd element of the mapping is the is_extra_data flag.
+    extra_data_fields = {}
+    for table, mappings in table_mappings.items():
+        extra_data_fields[table] = [k for k, v in mappings.items() if v[3]]
+
+    return {
+        'table_mappings': table_mappings,
+        'delimited_fields': delimited_fields,
+        'delimited_field_list': [v['from_field'] for v in delimited_fields.values()],
+        'extra_data_fields': extra_data_fields,
+        'cleaner': _build_cleaner(org),
+    }
+
+
+def _cache_mapping_plan(import_file):
+    """
+    Build the mapping plan of the import file and store it in the cache for the map_row_chunk
+    tasks.
+
+    :param import_file: ImportFile instance
+    :return: dict, the mapping plan
+    """
+    mapping_plan = _build_mapping_plan(import_file)
+    set_cache_raw(_mapping_plan_cache_key(import_file.pk), mapping_plan)
+    return mapping_plan
+
+
+def _get_mapping_plan(import_file):
+    """
+    Return the cached mapping plan of the import file, building it if it is not in the cache
+    (e.g. it expired or map_row_chunk was called outside of map_data).
+
+    :param import_file: ImportFile instance
+    :return: dict, the mapping plan
+    """
+    mapping_plan = get_cache_raw(_mapping_plan_cache_key(import_file.pk))
+    if mapping_plan is None:
+        mapping_plan = _cache_mapping_plan(import_file)
+    return mapping_plan
+
+
+@shared_task(ignore_result=True)
+def map_row_chunk(ids, file_pk, source_type, prog_key, **kwargs):
+    """Does the work of matching a mapping to a source type and saving
+
+    :param ids: list of PropertyState IDs to map.
+    :param file_pk: int, the PK for an ImportFile obj.
+    :param source_type: int, represented by either ASSESSED_RAW or PORTFOLIO_RAW.
+    :param prog_key: string, key of the progress key
+    :param increment: double, value by which to increment progress key
+    """
+    progress_data = ProgressData.from_key(prog_key)
+    import_file = ImportFile.objects.select_related(
+        'import_record__super_organization').get(pk=file_pk)
+    save_type = PORTFOLIO_BS
+    if source_type == ASSESSED_RAW:
+        save_type = ASSESSED_BS
+
+    org = import_file.import_record.super_organization
+
+    mapping_plan = _get_mapping_plan(import_file)
+    table_mappings = mapping_plan['table_mappings']
+    delimited_fields = mapping_plan['delimited_fields']
+    map_cleaner = mapping_plan['cleaner']
+
     try:
         with transaction.atomic():
             # yes, there are three cascading for loops here. sorry :(
@@ -306,13 +375,7 @@ def map_row_chunk(ids, file_pk, source_type, prog_key, **kwargs):
 
                 # This may be historic, but we need to pull out the extra_data_fields here to pass
                 # into mapper.map_row. apply_columns are extra_data columns (the raw column names)
-                extra_data_fields = []
-                for k, v in mappings.items():
-                    # the 3rd element is the is_extra_data flag.
-                    # Need to convert this to a dict and not a tuple.
-                    if v[3]:
-                        extra_data_fields.append(k)
-                # _log.debug("extra data fields: {}".format(extra_data_fields))
+                extra_data_fields = mapping_plan['extra_data_fields'][table]
 
                 # All the data live in the PropertyState.extra_data field when the data are imported
                 data = PropertyState.objects.filter(id__in=ids).only('extra_data',
@@ -322,6 +385,12 @@ def map_row_chunk(ids, file_pk, source_type, prog_key, **kwargs):
                 # So save the map_model_obj outside of for loop to pass into the `save_column_names`
                 # methods
                 map_model_obj = None
+                map_model_objs = []
+
+                # The hash of a state without any data, the mapped rows that hash the same are
+                # skipped.
+                empty_hash = hash_state_object(STR_TO_CLASS[table](organization=org),
+                                               include_extra_data=False)
 
                 # Loop over all the rows
                 for original_row in data:
@@ -333,11 +402,7 @@ def map_row_chunk(ids, file_pk, source_type, prog_key, **kwargs):
                             expand_row = True
                     # _log.debug("Expand row is set to {}".format(expand_row))
 
-                    delimited_field_list = []
-                    for _, v in delimited_fields.items():
-                        delimited_field_list.append(v['from_field'])
-
-                    # _log.debug("delimited_field_list is set to {}".format(delimited_field_list))
+                    delimited_field_list = mapping_plan['delimited_field_list']
 
                     # The raw data upon import is in the extra_data column
                     for row in expand_rows(
@@ -371,29 +436,33 @@ def map_row_chunk(ids, file_pk, source_type, prog_key, **kwargs):
                         # the test data the tax lot id is the same for many rows. Make sure
                         # to only create/save the object if it hasn't been created before.
                         if hash_state_object(map_model_obj, include_extra_data=False) == \
-                            hash_state_object(
-                                STR_TO_CLASS[table](organization=map_model_obj.organization),
-                                include_extra_data=False):
+                                empty_hash:
                             # Skip this object as it has no data...
                             _log.warn(
                                 "Skipping property or taxlot during mapping because it is identical to another row")
                             continue
 
-                        # There was an error with a field being too long [> 255 chars].
-                        map_model_obj.save()
-
-                        # Create an audit log record for the new map_model_obj that was created.
-
-                        AuditLogClass = PropertyAuditLog if isinstance(
-                            map_model_obj, PropertyState) else TaxLotAuditLog
-                        AuditLogClass.objects.create(
-                            organization=org,
-                            state=map_model_obj,
-                            name='Import Creation',
-                            description='Creation from Import file.',
-                            import_filename=import_file,
-                            record_type=AUDIT_IMPORT
-                        )
+                        map_model_objs.append(map_model_obj)
+
+                # Write all of the mapped states of the chunk and create an audit log record for
+                # each of them. PostgreSQL returns the ids of the states from bulk_create, so the
+                # audit logs can reference them. bulk_create does not call save(), so calculate
+                # the normalized_address and hash_object first.
+                # There was an error with a field being too long [> 255 chars].
+                set_state_derived_fields(map_model_objs)
+                STR_TO_CLASS[table].objects.bulk_create(map_model_objs)
+
+                AuditLogClass = PropertyAuditLog if table == 'PropertyState' else TaxLotAuditLog
+                AuditLogClass.objects.bulk_create([
+                    AuditLogClass(
+                        organization=org,
+                        state=state,
+                        name='Import Creation',
+                        description='Creation from Import file.',
+                        import_filename=import_file,
+                        record_type=AUDIT_IMPORT
+                    ) for state in map_model_objs
+                ])
 
                 # Make sure that we've saved all of the extra_data column names from the first item
                 # in list
@@ -450,6 +519,11 @@ def _map_data_create_tasks(import_file_id, progress_key):
 
     id_chunks = [[obj.id for obj in chunk] for chunk in batch(qs, 100)]
 
+    # the mappings may have changed since the last time the file was mapped, so always rebuild
+    # the plan here for the chunks to use
+    if id_chunks:
+        _cache_mapping_plan(import_file)
+
     progress_data.total = len(id_chunks)
     progress_data.save()
 
@@ -546,21 +620,88 @@ def map_data(import_file_id, remap=False, mark_as_done=True):
     return progress_data.result()
 
 
+def _get_raw_data_parser(import_file):
+    """
+    Return the parser for the raw data of an import file
+
+    :param import_file: ImportFile instance
+    :return: GeoJSONParser or MCMParser
+    """
+    file_extension = os.path.splitext(import_file.file.name)[1]
+
+    if file_extension == ".json" or file_extension == '.geojson':
+        return reader.GeoJSONParser(import_file.local_file)
+    else:
+        return reader.MCMParser(import_file.local_file)
+
+
+def _can_seek_raw_data(parser):
+    """
+    Return True if the rows of the raw data can be read from a position without parsing the
+    whole file again, which is only the case for CSV files
+    """
+    return isinstance(parser, reader.MCMParser) and isinstance(parser.reader, reader.CSVParser)
+
+
+def _raw_data_chunks(parser, chunk_size):
+    """
+    Stream through the parsed raw data and yield each chunk of rows with the position where it
+    starts. Only one chunk of rows is held in memory at a time.
+
+    :param parser: GeoJSONParser or MCMParser, positioned at the first row of data
+    :param chunk_size: int, number of rows per chunk
+    :return: generator of tuples, (position, list of rows)
+    """
+    if isinstance(parser, reader.GeoJSONParser):
+        # GeoJSON files are parsed into memory, so the position is the index of the row
+        for position in range(0, len(parser.data), chunk_size):
+            yield position, parser.data[position:position + chunk_size]
+        return
+
+    while True:
+        position = parser.tell()
+        rows = list(islice(parser.data, chunk_size))
+        if not rows:
+            return
+        yield position, rows
+
+
+def _read_raw_data_chunk(parser, position, num_rows):
+    """
+    Read a chunk of rows from a CSV file
+
+    :param parser: MCMParser of a CSV file
+    :param position: int, position of the first row, as yielded by _raw_data_chunks
+    :param num_rows: int, number of rows to read
+    :return: list, rows as dicts
+    """
+    parser.seek(position)
+    return list(islice(parser.data, num_rows))
+
+
 @shared_task(ignore_result=True)
-def _save_raw_data_chunk(chunk, file_pk, progress_key):
+def _save_raw_data_chunk(file_pk, position, num_rows, progress_key, chunk=None):
     """
-    Save the raw data to the database
+    Save the raw data to the database. For CSV files only the position of the rows in the file is
+    passed to the task; the rows themselves are read from the import file here.
 
-    :param chunk: list, ids to process
     :param file_pk: ImportFile Primary Key
-    :param prog_key: string, Progress Key to append progress
-    :param increment: Float, Value by which to increment the progress
+    :param position: int, position in the file of the first row to save
+    :param num_rows: int, number of rows to save
+    :param progress_key: string, Progress Key to append progress
+    :param chunk: list, the rows to save, for files whose rows are not read from the position
     :return: Bool, Always true
     """
     import_file = ImportFile.objects.get(pk=file_pk)
+    if chunk is None:
+        try:
+            chunk = _read_raw_data_chunk(_get_raw_data_parser(import_file), position, num_rows)
+        finally:
+            import_file.close_local_file()
 
     # Save our "column headers" and sample rows for F/E.
     source_type = get_source_type(import_file)
+    raw_properties = []
     try:
         with transaction.atomic():
             for c in chunk:
@@ -587,7 +728,11 @@ def _save_raw_data_chunk(chunk, file_pk, progress_key):
                 raw_property.source_type = source_type
                 raw_property.data_state = DATA_STATE_IMPORT
                 raw_property.organization = import_file.import_record.super_organization
-                raw_property.save()
+                raw_properties.append(raw_property)
+
+            # bulk_create bypasses PropertyState.save(), so set the derived fields first
+            set_state_derived_fields(raw_properties)
+            PropertyState.objects.bulk_create(raw_properties)
     except IntegrityError as e:
         raise IntegrityError("Could not save_raw_data_chunk with error: %s" % (e))
 
@@ -676,28 +821,32 @@ def _save_raw_data_create_tasks(file_pk, progress_key):
         # TODO #239: Should remove green button from here until later.
         return _save_raw_green_button_data(file_pk)
 
-    file_extension = os.path.splitext(import_file.file.name)[1]
-
-    if file_extension == ".json" or file_extension == '.geojson':
-        parser = reader.GeoJSONParser(import_file.local_file)
-    else:
-        parser = reader.MCMParser(import_file.local_file)
-
-    # TODO: Need to think about how this information will be saved
-    cache_first_rows(import_file, parser)
-    import_file.num_rows = 0
-    import_file.num_columns = parser.num_columns()
-
-    chunks = []
-    for batch_chunk in batch(parser.data, 100):
-        import_file.num_rows += len(batch_chunk)
-        chunks.append(batch_chunk)
-    import_file.save()
+    parser = _get_raw_data_parser(import_file)
+    try:
+        # TODO: Need to think about how this information will be saved
+        cache_first_rows(import_file, parser)
+        import_file.num_rows = 0
+        import_file.num_columns = parser.num_columns()
+
+        # Only keep the position of each chunk of a CSV file so that the size of the tasks (and the
+        # memory used here) does not depend on the size of the file; each task reads its own rows.
+        # Excel and GeoJSON files would have to be parsed whole again by every task to get to its
+        # rows, and files that are not in local storage downloaded again, so their rows are parsed
+        # once here and sent with the tasks.
+        send_rows = not (import_file.in_local_storage and _can_seek_raw_data(parser))
+        chunks = []
+        for position, rows in _raw_data_chunks(parser, 100):
+            import_file.num_rows += len(rows)
+            chunks.append((position, len(rows), rows if send_rows else None))
+        import_file.save()
+    finally:
+        import_file.close_local_file()
 
     progress_data.total = len(chunks)
     progress_data.save()
 
-    return [_save_raw_data_chunk.s(chunk, file_pk, progress_data.key) for chunk in chunks]
+    return [_save_raw_data_chunk.s(file_pk, position, num_rows, progress_data.key, rows)
+            for position, num_rows, rows in chunks]
 
 
 def save_raw_data(file_pk):
@@ -815,43 +964,101 @@ def finish_matching(result, import_file_id, progress_key):
     return progress_data.finish_with_success()
 
 
-def hash_state_object(obj, include_extra_data=True):
-    def add_dictionary_repr_to_hash(hash_obj, dict_obj):
-        assert isinstance(dict_obj, dict)
+# The hash plans of the state classes, see _get_hash_plan.
+_HASH_PLANS = {}
 
-        for (key, value) in sorted(dict_obj.items(), key=lambda x_y: x_y[0]):
-            if isinstance(value, dict):
-                add_dictionary_repr_to_hash(hash_obj, value)
-            else:
-                hash_obj.update(str(unidecode(key)).encode('utf-8'))
-                if isinstance(value, basestring):
-                    hash_obj.update(unidecode(value).encode('utf-8'))
-                else:
-                    hash_obj.update(str(value).encode('utf-8'))
-        return hash_obj
-
-    def _get_field_from_obj(field_obj, field):
-        if not hasattr(field_obj, field):
-            return "FOO"  # Return a random value so we can distinguish between this and None.
+
+def _get_hash_plan(obj):
+    """
+    Return the list of (field name, attribute) pairs that are hashed for the class of the object.
+    The field names are already encoded and the attribute is None when the object does not have
+    the field, in which case the field name includes the placeholder value. The plan is computed
+    once per process for each model class since the fields do not change.
+
+    :param obj: PropertyState, TaxLotState or other object to hash
+    :return: list, [(bytes, str or None), ...]
+    """
+    cls = obj.__class__
+    plan = _HASH_PLANS.get(cls)
+    if plan is not None:
+        return plan
+
+    plan = []
+    for field in Column.retrieve_db_field_name_for_hash_comparison():
+        if hasattr(obj, field):
+            plan.append((field.encode('utf-8'), field))
+        else:
+            # Use a random value so we can distinguish between this and None.
+            plan.append((field.encode('utf-8') + b'FOO', None))
+
+    # the attributes of non-model objects can vary per instance, so only cache the models
+    if hasattr(cls, '_meta'):
+        _HASH_PLANS[cls] = plan
+    return plan
+
+
+def _encode_hash_str(value):
+    """Encode a string for the hash, only transliterating the values that are not ASCII"""
+    try:
+        return value.encode('ascii')
+    except UnicodeError:
+        return unidecode(value).encode('utf-8')
+
+
+def _dictionary_repr_for_hash(parts, dict_obj):
+    assert isinstance(dict_obj, dict)
+
+    for key in sorted(dict_obj):
+        value = dict_obj[key]
+        if isinstance(value, dict):
+            _dictionary_repr_for_hash(parts, value)
         else:
-            return getattr(field_obj, field)
+            parts.append(_encode_hash_str(str(key)))
+            if isinstance(value, basestring):
+                parts.append(_encode_hash_str(value))
+            else:
+                parts.append(str(value).encode('utf-8'))
+    return parts
+
+
+def hash_state_object(obj, include_extra_data=True):
+    parts = []
+    for field, attr in _get_hash_plan(obj):
+        parts.append(field)
+        if attr is None:
+            continue
 
-    m = hashlib.md5()
-    for f in Column.retrieve_db_field_name_for_hash_comparison():
-        obj_val = _get_field_from_obj(obj, f)
-        m.update(f.encode('utf-8'))
+        obj_val = getattr(obj, attr)
         if isinstance(obj_val, dt.datetime):
             # if this is a datetime, then make sure to save the string as a naive datetime.
             # Somehow, somewhere the data are being saved in mapping with a timezone,
             # then in matching they are removed (but the time is updated correctly)
-            m.update(str(make_naive(obj_val).astimezone(tz.utc).isoformat()).encode('utf-8'))
-        else:
-            m.update(str(obj_val).encode('utf-8'))
+            obj_val = make_naive(obj_val).astimezone(tz.utc).isoformat()
+        parts.append(str(obj_val).encode('utf-8'))
 
     if include_extra_data:
-        add_dictionary_repr_to_hash(m, obj.extra_data)
+        _dictionary_repr_for_hash(parts, obj.extra_data)
+
+    return hashlib.md5(b''.join(parts)).hexdigest()
+
+
+def set_state_derived_fields(states):
+    """
+    Calculate the normalized_address and hash_object of a list of unsaved states in a single pass.
+    This is what PropertyState.save() and TaxLotState.save() do per record, and it is needed
+    before writing the states with bulk_create (which does not call save()).
+
+    :param states: list, PropertyStates or TaxLotStates
+    :return: list, the same states with the derived fields set
+    """
+    for state in states:
+        if state.address_line_1 is not None:
+            state.normalized_address = normalize_address_str(state.address_line_1)
+        else:
+            state.normalized_address = None
+        state.hash_object = hash_state_object(state)
 
-    return m.hexdigest()
+    return states
 
 
 def filter_duplicated_states(unmatched_states):
@@ -921,33 +1128,52 @@ def match_and_merge_unmatched_objects(unmatched_states, partitioner):
 
     # For each of the equivalence classes, merge them down to a single
     # object of that type.
-    merged_objects = []
-
+    unmatched_state_classes = []
     for (class_key, class_ndxs) in equivalence_classes.items():
-        if len(class_ndxs) == 1:
-            # If there is only one class_ndx, then just save the object to merged_objects and
-            # move on
-            merged_objects.append(unmatched_states[class_ndxs[0]])
-        else:
-            class_ndxs.sort(key=keyfunction)
-            unmatched_state_class = [unmatched_states[ndx] for ndx in class_ndxs]
-            merged_result = unmatched_state_class[0]
-            for unmatched in unmatched_state_class[1:]:
-                merged_result = save_state_match(merged_result, unmatched, priorities)
+        class_ndxs.sort(key=keyfunction)
+        unmatched_state_classes.append([unmatched_states[ndx] for ndx in class_ndxs])
 
-            merged_objects.append(merged_result)
+    merged_objects = merge_state_classes(unmatched_state_classes, priorities)
 
     return merged_objects, list(equivalence_classes.keys())
 
 
+def merge_state_classes(state_classes, priorities):
+    """
+    Merge each list of states down to a single state, in order: the second state is merged into the
+    first one, then the third one into the result, and so on. The merges are batched across the
+    lists, so the number of calls to save_state_matches is the length of the longest list minus one.
+
+    :param state_classes: list of lists, PropertyStates or TaxLotStates to merge
+    :param priorities: dict, column names and the priorities of the merging of data
+    :return: list, the merged state of each of the lists (the state itself if there is only one)
+    """
+    merged_results = [state_class[0] for state_class in state_classes]
+
+    merge_round = 1
+    while True:
+        ndxs = [ndx for ndx, state_class in enumerate(state_classes)
+                if len(state_class) > merge_round]
+        if not ndxs:
+            break
+
+        merged_states = save_state_matches(
+            [(merged_results[ndx], state_classes[ndx][merge_round]) for ndx in ndxs], priorities
+        )
+        for ndx, merged_state in zip(ndxs, merged_states):
+            merged_results[ndx] = merged_state
+        merge_round += 1
+
+    return merged_results
+
+
 # @cprofile(n=50)
 def merge_unmatched_into_views(unmatched_states, partitioner, org, import_file):
     """
-    This is fairly inefficient, because we grab all the organization's entire PropertyViews at once.
-    Surely this can be improved, but the logic is unusual/particularly dynamic here, so hopefully
-    this can be refactored into a better, purely database approach... Perhaps existing_view_states
-    can wrap database calls. Still the abstractions are subtly different (can I refactor the
-    partitioner to use Query objects); it may require a bit of thinking.
+    Merge the unmatched states into the existing views of the import file's cycle, or promote them
+    to new views when nothing matches. The canonical keys of all of the organization's views in
+    the cycle are loaded (as values, not model instances) and indexed by the value in each
+    position so that every unmatched state is resolved with a few dictionary lookups.
 
     :param unmatched_states:
     :param partitioner:
@@ -962,30 +1188,33 @@ def merge_unmatched_into_views(unmatched_states, partitioner, org, import_file):
 
     if isinstance(unmatched_states[0], PropertyState):
         ObjectViewClass = PropertyView
-        ParentAttrName = "property"
     elif isinstance(unmatched_states[0], TaxLotState):
         ObjectViewClass = TaxLotView
-        ParentAttrName = "taxlot"
     else:
         raise ValueError("Unknown class '{}' passed to merge_unmatched_into_views".format(
             type(unmatched_states[0])))
 
+    # Only pull the fields needed for the canonical keys rather than the full views and states
+    canonical_field_names = ['state__{}'.format(f) for f in partitioner.canonical_fields]
     class_views = ObjectViewClass.objects.filter(
         state__organization=org,
         cycle_id=current_match_cycle
-    ).select_related('state')
-    existing_view_states = collections.defaultdict(dict)
-    existing_view_state_hashes = set()
-
-    # TODO #239: this is an expensive calculation
-    for view in class_views:
-        equivalence_can_key = partitioner.calculate_canonical_key(view.state)
-        existing_view_states[equivalence_can_key][view.cycle] = view
-        existing_view_state_hashes.add(view.state.hash_object)
-
-    matched_views = []
+    ).values_list('id', 'state__hash_object', *canonical_field_names)
 
-    merge_data = []
+    # Index the canonical keys of the existing views so that each unmatched state is compared
+    # with only the views that share a value with it. When several views have the same key, the
+    # last one is used.
+    existing_view_keys = KeyIndex()
+    existing_view_ids = {}
+    existing_view_state_hashes = set()
+    for view_values in class_views:
+        equivalence_can_key = tuple(view_values[2:])
+        existing_view_keys.add(equivalence_can_key)
+        existing_view_ids[equivalence_can_key] = view_values[0]
+        existing_view_state_hashes.add(view_values[1])
+
+    merge_view_ids = []
+    merge_states = []
     promote_data = []
     for unmatched in unmatched_states:
         if unmatched.hash_object in existing_view_state_hashes:
@@ -994,49 +1223,38 @@ def merge_unmatched_into_views(unmatched_states, partitioner, org, import_file):
             unmatched.save()
         else:
             # Look to see if there is a match among the property states of the object.
-
-            # equiv_key = False
-            # equiv_can_key = partitioner.calculate_canonical_key(unmatched)
             equiv_cmp_key = partitioner.calculate_comparison_key(unmatched)
-            for key in existing_view_states:
-                if partitioner.calculate_key_equivalence(key, equiv_cmp_key):
-                    if current_match_cycle in existing_view_states[key]:
-                        # There is an existing View for the current cycle that matches us.
-                        # Merge the new state in with the existing one and update the view,
-                        # audit log.
-                        current_view = existing_view_states[key][current_match_cycle]
-                        merge_data.append((current_view, unmatched))
-                    else:
-                        # Grab another view that has the same parent as the one we belong to.
-                        cousin_view = existing_view_states[key].values()[0]
-                        view_parent = getattr(cousin_view, ParentAttrName)
-                        new_view = type(cousin_view)()
-                        setattr(new_view, ParentAttrName, view_parent)
-                        new_view.cycle = current_match_cycle
-                        new_view.state = unmatched
-                        try:
-                            new_view.save()
-                            matched_views.append(new_view)
-                        except IntegrityError:
-                            _log.warn("Unable to save the new view as it already exists in the db")
-
-                    break
+            matching_keys = existing_view_keys.candidates(equiv_cmp_key)
+            if matching_keys:
+                # There is an existing View for the current cycle that matches us.
+                # Merge the new state in with the existing one and update the view,
+                # audit log.
+                merge_view_ids.append(existing_view_ids[matching_keys[0]])
+                merge_states.append(unmatched)
             else:
                 # Create a new object/view for the current object.
                 promote_data.append((unmatched, current_match_cycle))
 
+    # Load only the views that are merged into and group the states to merge by view. The states
+    # are merged into the view's state in order.
+    merge_views = ObjectViewClass.objects.filter(pk__in=merge_view_ids).select_related('state')
+    merge_views = {view.pk: view for view in merge_views}
+    merge_data = collections.OrderedDict()
+    for view_id, state in zip(merge_view_ids, merge_states):
+        merge_data.setdefault(view_id, [merge_views[view_id].state]).append(state)
+    matched_views = []
+
     # create the data atomically to speed it up
-    _log.debug("There are %s merge_data and %s promote_data" % (len(merge_data), len(promote_data)))
+    _log.debug("There are %s merge_data and %s promote_data" % (len(merge_states), len(promote_data)))
     priorities = Column.retrieve_priorities(org.pk)
     try:
         with transaction.atomic():
-            for merge_datum in merge_data:
-                merge_datum[0].state = save_state_match(
-                    merge_datum[0].state, merge_datum[1], priorities
-                )
-                merge_datum[0].save()
+            merged_states = merge_state_classes(list(merge_data.values()), priorities)
+            for view_id, merged_state in zip(merge_data, merged_states):
+                merge_views[view_id].state = merged_state
+                merge_views[view_id].save()
 
-                matched_views.append(merge_datum[0])
+                matched_views.append(merge_views[view_id])
 
             for promote_datum in promote_data:
                 created_view = promote_datum[0].promote(promote_datum[1])
@@ -1165,25 +1383,22 @@ def _match_properties_and_taxlots(file_pk, progress_key):
     pair_new_states(merged_property_views, merged_taxlot_views)
     _log.debug("End pair_new_states: %s" % dt.datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
 
-    # Mark all the unmatched objects as done with matching and mapping
-    # There should be some kind of bulk-update/save thing we can do to
-    # improve upon this.
-    for state in chain(unmatched_properties, unmatched_tax_lots):
-        state.data_state = DATA_STATE_MATCHING
-        state.save()
-
-    for state in map(lambda x: x.state, chain(merged_property_views, merged_taxlot_views)):
-        state.data_state = DATA_STATE_MATCHING
-        # The merge state seems backwards, but it isn't for some reason, if they are not marked as
-        # MERGE_STATE_MERGED when called in the merge_unmatched_into_views, then they are new.
-        if state.merge_state != MERGE_STATE_MERGED:
-            state.merge_state = MERGE_STATE_NEW
-        state.save()
-
-    for state in chain(duplicate_property_states, duplicate_tax_lot_states):
-        state.data_state = DATA_STATE_DELETE
-        # state.merge_state = MERGE_STATE_DUPLICATE
-        state.save()
+    # Mark all the unmatched objects as done with matching and mapping. The data_state and
+    # merge_state are not part of the hash_object, so the states can be updated in bulk instead
+    # of saving each of them.
+    update_states(chain(unmatched_properties, unmatched_tax_lots), data_state=DATA_STATE_MATCHING)
+
+    # The merge state seems backwards, but it isn't for some reason, if they are not marked as
+    # MERGE_STATE_MERGED when called in the merge_unmatched_into_views, then they are new.
+    merged_states = [view.state for view in chain(merged_property_views, merged_taxlot_views)]
+    update_states([state for state in merged_states if state.merge_state == MERGE_STATE_MERGED],
+                  data_state=DATA_STATE_MATCHING)
+    update_states([state for state in merged_states if state.merge_state != MERGE_STATE_MERGED],
+                  data_state=DATA_STATE_MATCHING, merge_state=MERGE_STATE_NEW)
+
+    # state.merge_state = MERGE_STATE_DUPLICATE
+    update_states(chain(duplicate_property_states, duplicate_tax_lot_states),
+                  data_state=DATA_STATE_DELETE)
 
     return {
         'import_file_records': import_file.num_rows,
@@ -1198,6 +1413,27 @@ def _match_properties_and_taxlots(file_pk, progress_key):
     }
 
 
+def update_states(states, **kwargs):
+    """
+    Set field values on a list of PropertyStates and/or TaxLotStates, both on the instances and in
+    the database with one update query per state class. Note that this does not call save(), so
+    the fields must not be part of the hash_object.
+
+    :param states: iterable, PropertyStates and/or TaxLotStates
+    :param kwargs: field names and the values to set
+    :return: None
+    """
+    states = list(states)
+    for state in states:
+        for field, value in kwargs.items():
+            setattr(state, field, value)
+
+    for StateClass in (PropertyState, TaxLotState):
+        ids = [state.pk for state in states if isinstance(state, StateClass)]
+        if ids:
+            StateClass.objects.filter(id__in=ids).update(**kwargs)
+
+
 def list_canonical_property_states(org_id):
     """
     Return a QuerySet of the property states that are part of the inventory
@@ -1228,60 +1464,104 @@ def save_state_match(state1, state2, priorities):
     all of the priorites for the columns, not just the priorities for the selected taxlotstate.
     :return: state1, after merge
     """
-    merged_state = type(state1).objects.create(organization=state1.organization)
+    return save_state_matches([(state1, state2)], priorities)[0]
 
-    merged_state = merging.merge_state(
-        merged_state, state1, state2, priorities[merged_state.__class__.__name__]
-    )
 
-    AuditLogClass = PropertyAuditLog if isinstance(merged_state, PropertyState) else TaxLotAuditLog
-
-    assert AuditLogClass.objects.filter(state=state1).count() >= 1
-    assert AuditLogClass.objects.filter(state=state2).count() >= 1
-
-    # NJACHECK - is this logic correct?
-    state_1_audit_log = AuditLogClass.objects.filter(state=state1).first()
-    state_2_audit_log = AuditLogClass.objects.filter(state=state2).first()
-
-    AuditLogClass.objects.create(organization=state1.organization,
-                                 parent1=state_1_audit_log,
-                                 parent2=state_2_audit_log,
-                                 parent_state1=state1,
-                                 parent_state2=state2,
-                                 state=merged_state,
-                                 name='System Match',
-                                 description='Automatic Merge',
-                                 import_filename=None,
-                                 record_type=AUDIT_IMPORT)
-
-    # If the two states being merged were just imported from the same import file, carry the import_file_id into the new
-    # state. Also merge the lot_number fields so that pairing can work correctly on the resulting merged record
-    # Possible conditions:
-    # state1.data_state = 2, state1.merge_state = 0 and state2.data_state = 2, state2.merge_state = 0
-    # state1.data_state = 0, state1.merge_state = 2 and state2.data_state = 2, state2.merge_state = 0
-    if state1.import_file_id == state2.import_file_id:
-        if ((
-            state1.data_state == DATA_STATE_MAPPING and state1.merge_state == MERGE_STATE_UNKNOWN and
-            state2.data_state == DATA_STATE_MAPPING and state2.merge_state == MERGE_STATE_UNKNOWN) or
-            (
-                state1.data_state == DATA_STATE_UNKNOWN and state1.merge_state == MERGE_STATE_MERGED and
-                state2.data_state == DATA_STATE_MAPPING and state2.merge_state == MERGE_STATE_UNKNOWN)):
-            merged_state.import_file_id = state1.import_file_id
-
-            if isinstance(merged_state, PropertyState):
-                joined_lots = set()
-                if state1.lot_number:
-                    joined_lots = joined_lots.union(state1.lot_number.split(';'))
-                if state2.lot_number:
-                    joined_lots = joined_lots.union(state2.lot_number.split(';'))
-                if joined_lots:
-                    merged_state.lot_number = ';'.join(joined_lots)
-
-    # Set the merged_state to merged
-    merged_state.merge_state = MERGE_STATE_MERGED
-    merged_state.save()
-
-    return merged_state
+def save_state_matches(state_pairs, priorities):
+    """
+    Merge the contents of state2 into state1 for a list of (state1, state2) pairs of the same type.
+    The attributes are merged in memory and the merged states and their audit logs are each
+    written with a single bulk_create. The pairs must be independent of each other, that is, the
+    result of one merge can not be an input of another merge in the same call.
+
+    :param state_pairs: list, tuples of (state1, state2) as PropertyStates or TaxLotStates
+    :param priorities: dict, column names and the priorities of the merging of data. This includes
+    all of the priorites for the columns, not just the priorities for the selected taxlotstate.
+    :return: list, merged states in the same order as state_pairs
+    """
+    if not state_pairs:
+        return []
+
+    StateClass = type(state_pairs[0][0])
+    AuditLogClass = PropertyAuditLog if StateClass == PropertyState else TaxLotAuditLog
+
+    # Get the first audit log of each of the parent states in one query
+    parent_ids = set(chain.from_iterable((state1.pk, state2.pk) for state1, state2 in state_pairs))
+    first_audit_logs = {}
+    for audit_log in AuditLogClass.objects.filter(state_id__in=parent_ids).order_by('id'):
+        first_audit_logs.setdefault(audit_log.state_id, audit_log)
+
+    merged_states = []
+    for state1, state2 in state_pairs:
+        assert state1.pk in first_audit_logs
+        assert state2.pk in first_audit_logs
+
+        merged_state = StateClass(organization_id=state1.organization_id)
+        merged_state = merging.merge_state(
+            merged_state, state1, state2, priorities[StateClass.__name__],
+            merge_relationships=False
+        )
+
+        # If the two states being merged were just imported from the same import file, carry the import_file_id into the new
+        # state. Also merge the lot_number fields so that pairing can work correctly on the resulting merged record
+        # Possible conditions:
+        # state1.data_state = 2, state1.merge_state = 0 and state2.data_state = 2, state2.merge_state = 0
+        # state1.data_state = 0, state1.merge_state = 2 and state2.data_state = 2, state2.merge_state = 0
+        if state1.import_file_id == state2.import_file_id:
+            if ((
+                state1.data_state == DATA_STATE_MAPPING and state1.merge_state == MERGE_STATE_UNKNOWN and
+                state2.data_state == DATA_STATE_MAPPING and state2.merge_state == MERGE_STATE_UNKNOWN) or
+                (
+                    state1.data_state == DATA_STATE_UNKNOWN and state1.merge_state == MERGE_STATE_MERGED and
+                    state2.data_state == DATA_STATE_MAPPING and state2.merge_state == MERGE_STATE_UNKNOWN)):
+                merged_state.import_file_id = state1.import_file_id
+
+                if isinstance(merged_state, PropertyState):
+                    joined_lots = set()
+                    if state1.lot_number:
+                        joined_lots = joined_lots.union(state1.lot_number.split(';'))
+                    if state2.lot_number:
+                        joined_lots = joined_lots.union(state2.lot_number.split(';'))
+                    if joined_lots:
+                        merged_state.lot_number = ';'.join(joined_lots)
+
+        # The merged state is new, so sync the lat/long fields the same way as saving a merge into
+        # a newly created, empty state does.
+        if StateClass == PropertyState:
+            sync_long_lat(merged_state, PropertyState())
+
+        # Set the merged_state to merged
+        merged_state.merge_state = MERGE_STATE_MERGED
+        merged_states.append(merged_state)
+
+    # bulk_create bypasses save(), so set the derived fields first. The ids of the created states
+    # are returned by PostgreSQL.
+    set_state_derived_fields(merged_states)
+    StateClass.objects.bulk_create(merged_states)
+
+    AuditLogClass.objects.bulk_create([
+        AuditLogClass(organization_id=state1.organization_id,
+                      parent1=first_audit_logs[state1.pk],
+                      parent2=first_audit_logs[state2.pk],
+                      parent_state1=state1,
+                      parent_state2=state2,
+                      state=merged_state,
+                      name='System Match',
+                      description='Automatic Merge',
+                      import_filename=None,
+                      record_type=AUDIT_IMPORT)
+        for (state1, state2), merged_state in zip(state_pairs, merged_states)
+    ])
+
+    # Only the states that have measures, scenarios, etc. need their relationships merged
+    if StateClass == PropertyState:
+        state_ids_with_relationships = PropertyState.state_ids_with_relationships(parent_ids)
+        for (state1, state2), merged_state in zip(state_pairs, merged_states):
+            if state1.pk in state_ids_with_relationships or \
+                    state2.pk in state_ids_with_relationships:
+                PropertyState.merge_relationships(merged_state, state1, state2)
+
+    return merged_states
 
 
 def pair_new_states(merged_property_views, merged_taxlot_views):
@@ -1356,81 +1636,74 @@ def pair_new_states(merged_property_views, merged_taxlot_views):
     # now. The logic that is being missed is a pretty extreme corner
     # case.
 
-    # NA: I should generate one key for each property for each thing in it's lot number state.
-
-    # property_keys = {property_m2m_keygen.calculate_comparison_key(p): p.pk for p in property_objects}
-    # taxlot_keys = [taxlot_m2m_keygen.calculate_comparison_key(tl): tl.pk for tl in taxlot_objects}
-
-    # Calculate a key for each of the split fields.
-    property_keys_orig = dict(
-        [(property_m2m_keygen.calculate_comparison_key(p), p.pk) for p in property_objects])
-
-    # property_keys = copy.deepcopy(property_keys_orig)
-
-    # Do this inelegant step to make sure we are correctly splitting.
-    property_keys = collections.defaultdict(list)
-    for k in property_keys_orig:
-        if k[0] and ";" in k[0]:
-            for lotnum in map(lambda x: x.strip(), k[0].split(";")):
-                k_copy = list(copy.deepcopy(k))
-                k_copy[0] = lotnum
-                property_keys[tuple(k_copy)] = property_keys_orig[k]
+    # Calculate a key for each of the split fields. When a lot number field contains several
+    # lot numbers, then there is one key for each of the lot numbers.
+    def split_key(key):
+        if key[0] and ";" in key[0]:
+            return [(lotnum.strip(),) + tuple(key[1:]) for lotnum in key[0].split(";")]
         else:
-            property_keys[k] = property_keys_orig[k]
+            return [key]
+
+    property_keys = {}
+    for p in property_objects:
+        for k in split_key(property_m2m_keygen.calculate_comparison_key(p)):
+            property_keys[k] = p.pk
 
     taxlot_keys = dict(
         [(taxlot_m2m_keygen.calculate_comparison_key(p), p.pk) for p in taxlot_objects])
 
-    # property_comparison_keys = {property_m2m_keygen.calculate_comparison_key_key(p): p.pk for p in property_objects}
-    # property_canonical_keys = {property_m2m_keygen.calculate_canonical_key(p): p.pk for p in property_objects}
+    # Index the keys so that the equivalent keys are looked up instead of comparing every
+    # property with every tax lot.
+    property_key_index = KeyIndex()
+    for k in property_keys:
+        property_key_index.add(k)
 
-    possible_merges = []  # List of prop.id, tl.id merges.
+    taxlot_key_index = KeyIndex()
+    for k in taxlot_keys:
+        taxlot_key_index.add(k)
+
+    # List of prop.id, tl.id merges, in the order they are found and without duplicates.
+    possible_merges = collections.OrderedDict()
 
     for pv in merged_property_views:
-        # if pv.state.lot_number and ";" in pv.state.lot_number:
-        #     pdb.set_trace()
-
-        pv_key = property_m2m_keygen.calculate_comparison_key(pv.state)
-        # TODO: Refactor pronto.  Iterating over the tax lot is bad implementation.
-        for tlk in taxlot_keys:
-            if pv_key[0] and ";" in pv_key[0]:
-                for lotnum in map(lambda x: x.strip(), pv_key[0].split(";")):
-                    pv_key_copy = list(copy.deepcopy(pv_key))
-                    pv_key_copy[0] = lotnum
-                    pv_key_copy = tuple(pv_key_copy)
-                    if property_m2m_keygen.calculate_key_equivalence(pv_key_copy, tlk):
-                        possible_merges.append((property_keys[pv_key_copy], taxlot_keys[tlk]))
-            else:
-                if property_m2m_keygen.calculate_key_equivalence(pv_key, tlk):
-                    possible_merges.append((property_keys[pv_key], taxlot_keys[tlk]))
+        for pv_key in split_key(property_m2m_keygen.calculate_comparison_key(pv.state)):
+            if pv_key not in property_keys:
+                continue
+            for tlk in taxlot_key_index.candidates(pv_key):
+                possible_merges[(property_keys[pv_key], taxlot_keys[tlk])] = True
 
     for tlv in merged_taxlot_views:
         tlv_key = taxlot_m2m_keygen.calculate_comparison_key(tlv.state)
-        for pv_key in property_keys:
-            if property_m2m_keygen.calculate_key_equivalence(tlv_key, pv_key):
-                possible_merges.append((property_keys[pv_key], taxlot_keys[tlv_key]))
-
-    for m2m in set(possible_merges):
-        pv_pk, tlv_pk = m2m
-
-        # PropertyView.objects.get(pk=pv_pk)
-        # TaxLotView.objects.get(pk=tlv_pk)
+        if tlv_key not in taxlot_keys:
+            continue
+        for pv_key in property_key_index.candidates(tlv_key):
+            possible_merges[(property_keys[pv_key], taxlot_keys[tlv_key])] = True
 
-        connection = TaxLotProperty.objects.filter(
-            property_view_id=pv_pk,
-            taxlot_view_id=tlv_pk
-        ).count()
+    # Get all of the existing joins in the cycle at once rather than checking each pair
+    existing_joins = set(
+        TaxLotProperty.objects.filter(cycle=cycle).values_list('property_view_id', 'taxlot_view_id')
+    )
+    property_views_with_joins = set([pv_pk for pv_pk, _ in existing_joins])
 
-        if connection:
+    new_joins = []
+    for m2m in possible_merges:
+        if m2m in existing_joins:
             continue
 
-        is_primary = TaxLotProperty.objects.filter(property_view_id=pv_pk).count() == 0
-        m2m_join = TaxLotProperty(
-            property_view_id=pv_pk,
-            taxlot_view_id=tlv_pk,
-            cycle=cycle,
-            primary=is_primary
+        pv_pk, tlv_pk = m2m
+
+        # The first tax lot joined to a property view is the primary tax lot
+        is_primary = pv_pk not in property_views_with_joins
+        property_views_with_joins.add(pv_pk)
+        new_joins.append(
+            TaxLotProperty(
+                property_view_id=pv_pk,
+                taxlot_view_id=tlv_pk,
+                cycle=cycle,
+                primary=is_primary
+            )
         )
-        m2m_join.save()
+
+    TaxLotProperty.objects.bulk_create(new_joins)
 
     return
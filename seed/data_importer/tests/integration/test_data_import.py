@@ -9,13 +9,17 @@ import csv
 import datetime
 import json
 import logging
+import os
 import os.path as osp
+import shutil
+import tempfile
 
 from dateutil import parser
 from django.core.files import File
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db.models.fields.files import FieldFile
 from django.utils import timezone
-from mock import patch
+from mock import PropertyMock, patch
 
 from seed.data_importer import tasks
 from seed.data_importer.models import ImportFile, ImportRecord
@@ -88,6 +92,32 @@ class TestDataImport(DataMappingBaseTestCase):
         self.assertDictEqual(raw_saved.extra_data, self.fake_extra_data)
         self.assertEqual(raw_saved.organization, self.org)
 
+    def test_save_raw_data_not_in_local_storage(self):
+        """A file that is not in local storage is copied once for reading and the copy removed."""
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        with patch.object(tempfile, 'tempdir', temp_dir), \
+                patch.object(FieldFile, 'path', new_callable=PropertyMock,
+                             side_effect=NotImplementedError), \
+                patch.object(tempfile, 'NamedTemporaryFile',
+                             wraps=tempfile.NamedTemporaryFile) as named_temporary_file:
+            tasks.save_raw_data(self.import_file.pk)
+
+        self.assertEqual(PropertyState.objects.filter(import_file=self.import_file).count(), 512)
+        self.assertEqual(named_temporary_file.call_count, 1)
+        self.assertEqual(os.listdir(temp_dir), [])
+
+    def test_save_raw_data_bulk_hashes_match_save(self):
+        """The bulk created raw states have the same derived fields as a per-row save()."""
+        with patch.object(ImportFile, 'cache_first_rows', return_value=None):
+            tasks.save_raw_data(self.import_file.pk)
+
+        for raw_saved in PropertyState.objects.filter(import_file=self.import_file)[:20]:
+            hash_object = raw_saved.hash_object
+            raw_saved.save()
+            self.assertEqual(raw_saved.hash_object, hash_object)
+            self.assertIsNone(raw_saved.normalized_address)
+
     def test_map_data(self):
         """Save mappings based on user specifications."""
         # Create new import file to test
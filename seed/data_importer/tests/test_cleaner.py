@@ -5,11 +5,14 @@
 :author
 """
 import logging
+from datetime import datetime
 
 from django.test import TestCase
 
 from seed.data_importer import tasks
+from seed.lib.mcm import cleaners
 from seed.landing.models import SEEDUser as User
+from seed.management.commands.benchmark_clean_value import reference_clean_value
 from seed.models import (
     Column,
     ColumnMapping,
@@ -19,6 +22,17 @@ from seed.utils.organizations import create_organization
 
 logger = logging.getLogger(__name__)
 
+ONTOLOGY = {
+    'types': {
+        'float': 'float',
+        'date': 'date',
+        'datetime': 'datetime',
+        'string': 'string',
+        'integer': 'integer',
+        'area': ('quantity', 'ft**2'),
+    }
+}
+
 
 class TestCleaner(TestCase):
     """Tests that our logic for constructing cleaners works."""
@@ -110,3 +124,45 @@ class TestCleaner(TestCase):
             cleaner.clean_value('123,456', 'random'),
             '123,456'
         )
+
+
+class TestCompiledCleaner(TestCase):
+    def test_compiled_cleaners_match_reference(self):
+        values = [
+            None, '', 'N/A', 'not available', '1,456', '1,123.45 ?', '-55', 50, 'abc',
+            '2018-01-02', '01/02/2018', '1/2/2018 13:05', '12/31/2018 11:59:59 PM',
+            '13/01/2018', '2018-01-02T03:04:05', 'Jan 2 2018', '12/31/18', '2018-01-02Z',
+            '02/30/2018',
+        ]
+        columns = list(ONTOLOGY['types']) + ['unknown']
+        for is_extra_data in (True, False):
+            for column_name in columns:
+                cleaner = cleaners.Cleaner(ONTOLOGY)
+                reference = cleaners.Cleaner(ONTOLOGY)
+                # twice, so that the second pass uses the date formats found by the first
+                for value in values + values:
+                    self.assertEqual(
+                        cleaner.clean_value(value, column_name, is_extra_data),
+                        reference_clean_value(reference, value, column_name, is_extra_data),
+                        (value, column_name, is_extra_data)
+                    )
+
+    def test_get_cleaner_is_compiled_once(self):
+        cleaner = cleaners.Cleaner(ONTOLOGY)
+        self.assertIs(cleaner.get_cleaner('date'), cleaner.get_cleaner('date'))
+        self.assertIsNot(cleaner.get_cleaner('area', False), cleaner.get_cleaner('area', True))
+
+    def test_date_time_parser_format_inference(self):
+        parser = cleaners.DateTimeParser()
+        self.assertEqual(parser.parse('01/02/2018'), datetime(2018, 1, 2))
+        self.assertEqual(parser.format, '%m/%d/%Y')
+        # values that do not fit the format still go through dateutil
+        self.assertEqual(parser.parse('13/01/2018'), datetime(2018, 1, 13))
+        self.assertEqual(parser.parse('2018-03-04'), datetime(2018, 3, 4))
+        self.assertEqual(parser.format, '%m/%d/%Y')
+
+        # day first values never set a format that dateutil would read differently
+        parser = cleaners.DateTimeParser()
+        parser.parse('13/01/2018')
+        self.assertIsNone(parser.format)
+        self.assertEqual(parser.parse('01/02/2018'), datetime(2018, 1, 2))
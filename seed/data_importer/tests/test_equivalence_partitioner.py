@@ -5,8 +5,10 @@
 :author
 """
 import logging
+import random
 
 from seed.data_importer.equivalence_partitioner import EquivalencePartitioner
+from seed.management.commands.benchmark_equivalence_partitioner import scan_equivalence_classes
 from seed.tests.util import DataMappingBaseTestCase
 
 logger = logging.getLogger(__name__)
@@ -84,3 +86,22 @@ class TestEquivalenceClassGenerator(DataMappingBaseTestCase):
         self.assertEqual(tls3.jurisdiction_tax_lot_id, "1")
         self.assertEqual(tls3.custom_id_1, "100")
         self.assertEqual(tls3.normalized_address, "123 fake street")
+
+    def test_indexed_partition_matches_scan(self):
+        partitioner = EquivalencePartitioner.make_propertystate_equivalence()
+        rand = random.Random(1234)
+
+        def value(prefix):
+            # use small domains so that plenty of the states collide
+            return rand.choice([None, None, None] + ['%s%s' % (prefix, i) for i in range(4)])
+
+        for _ in range(50):
+            states = [
+                PropertyState(ubid=value('u'), pm_property_id=value('p'),
+                              custom_id_1=rand.choice([value('p'), value('c')]),
+                              normalized_address=value('a'))
+                for _ in range(rand.randint(1, 40))
+            ]
+            expected = scan_equivalence_classes(partitioner, states)
+            equivalence_classes = partitioner.calculate_equivalence_classes(states)
+            self.assertEqual(list(equivalence_classes.items()), list(expected.items()))
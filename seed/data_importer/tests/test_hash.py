@@ -0,0 +1,57 @@
+# !/usr/bin/env python
+# encoding: utf-8
+"""
+:copyright (c) 2014 - 2019, The Regents of the University of California, through Lawrence Berkeley National Laboratory (subject to receipt of any required approvals from the U.S. Department of Energy) and contributors. All rights reserved.  # NOQA
+:author
+"""
+import datetime
+
+import pytz
+
+from seed.data_importer.tasks import hash_state_object
+from seed.management.commands.benchmark_hash_state_object import reference_hash_state_object
+from seed.models import (
+    ASSESSED_RAW,
+    PropertyState,
+    TaxLotState,
+)
+from seed.test_helpers.fake import (
+    FakePropertyStateFactory,
+    FakeTaxLotStateFactory,
+)
+from seed.tests.util import DataMappingBaseTestCase
+
+
+class TestHashStateObject(DataMappingBaseTestCase):
+    def setUp(self):
+        selfvars = self.set_up(ASSESSED_RAW)
+        self.user, self.org, self.import_file, self.import_record, self.cycle = selfvars
+        self.property_state_factory = FakePropertyStateFactory(organization=self.org)
+        self.taxlot_state_factory = FakeTaxLotStateFactory(organization=self.org)
+
+    def test_hash_matches_reference(self):
+        extra_data = {
+            'a': 'result',
+            'Site EUI²': 90.5,
+            'Unicode in value': 'EUI²',
+            'nested': {'b': 'value', 'c': 1},
+            'none': None,
+        }
+        states = [
+            PropertyState(),
+            TaxLotState(),
+            PropertyState(address_line_1='123 fake st', extra_data=extra_data),
+            TaxLotState(address_line_1='123 fake st', extra_data=extra_data),
+            PropertyState(
+                address_line_1='Ünïcode St',
+                recent_sale_date=datetime.datetime(2018, 1, 2, 3, 4, 5, tzinfo=pytz.UTC),
+                extra_data={'entry_%s' % i: 'Value %s' % i for i in range(100)},
+            ),
+            self.property_state_factory.get_property_state(extra_data=extra_data),
+            self.taxlot_state_factory.get_taxlot_state(extra_data=extra_data),
+        ]
+
+        for state in states:
+            self.assertEqual(hash_state_object(state), reference_hash_state_object(state))
+            self.assertEqual(hash_state_object(state, include_extra_data=False),
+                             reference_hash_state_object(state, include_extra_data=False))
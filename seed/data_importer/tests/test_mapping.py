@@ -6,12 +6,15 @@
 """
 import logging
 
+from django.test import TestCase
+
 from seed.data_importer import tasks
 from seed.lib.mcm import mapper
 from seed.models import (
     ASSESSED_RAW,
     DATA_STATE_IMPORT,
     Column,
+    PropertyAuditLog,
 )
 from seed.models.column_mappings import get_column_mapping
 from seed.test_helpers.fake import (
@@ -20,6 +23,7 @@ from seed.test_helpers.fake import (
     FakePropertyViewFactory,
 )
 from seed.tests.util import DataMappingBaseTestCase
+from seed.utils.cache import get_cache_raw
 
 logger = logging.getLogger(__name__)
 
@@ -83,6 +87,53 @@ class TestMapping(DataMappingBaseTestCase):
         self.assertEqual(state.extra_data['year_built'], props.first().year_built)
         self.assertEqual(state.extra_data['random_extra'], props.first().extra_data['random_extra'])
 
+        # the mapped states are bulk created, so make sure the derived fields and audit logs exist
+        mapped = props.first()
+        self.assertEqual(mapped.hash_object, tasks.hash_state_object(mapped))
+        audit_log = PropertyAuditLog.objects.get(state=mapped)
+        self.assertEqual(audit_log.name, 'Import Creation')
+        self.assertEqual(audit_log.import_filename, self.import_file)
+
+        # the mapping plan is built once by map_data and cached for the map_row_chunk tasks
+        mapping_plan = get_cache_raw(tasks._mapping_plan_cache_key(self.import_file.id))
+        self.assertIn('PropertyState', mapping_plan['table_mappings'])
+        self.assertIn('random_extra', mapping_plan['extra_data_fields']['PropertyState'])
+        self.assertEqual(mapping_plan['delimited_fields'], {})
+        self.assertIn('year_built', mapping_plan['cleaner'].int_columns)
+
         # from seed.utils.generic import pp
         # for p in props:
         #     pp(p)
+
+
+class TestExpandRows(TestCase):
+    def test_rows_without_delimited_fields_are_not_copied(self):
+        row = {'address': '123 Main St', 'extra': {'nested': [1, 2]}}
+        for expand_row in (True, False):
+            rows = mapper.expand_rows(row, ['Jurisdiction Tax Lot ID'], expand_row)
+            self.assertEqual(len(rows), 1)
+            self.assertIs(rows[0], row)
+
+    def test_expand_rows(self):
+        row = {
+            'Jurisdiction Tax Lot ID': ' 11a; 22--b ,',
+            'address': '123 Main St',
+            'Other ID': '1:2',
+        }
+        fields = ['Jurisdiction Tax Lot ID', 'Other ID', 'Missing ID']
+
+        rows = mapper.expand_rows(row, fields, False)
+        self.assertEqual(rows, [
+            {'Jurisdiction Tax Lot ID': '11A;22-B', 'address': '123 Main St', 'Other ID': '1;2'},
+        ])
+
+        rows = mapper.expand_rows(row, fields, True)
+        self.assertEqual(rows, [
+            {'Jurisdiction Tax Lot ID': '11A', 'address': '123 Main St', 'Other ID': '1'},
+            {'Jurisdiction Tax Lot ID': '11A', 'address': '123 Main St', 'Other ID': '2'},
+            {'Jurisdiction Tax Lot ID': '22-B', 'address': '123 Main St', 'Other ID': '1'},
+            {'Jurisdiction Tax Lot ID': '22-B', 'address': '123 Main St', 'Other ID': '2'},
+        ])
+        # the keys keep the order of the row, and the row itself is unchanged
+        self.assertEqual(list(rows[0]), list(row))
+        self.assertEqual(row['Jurisdiction Tax Lot ID'], ' 11a; 22--b ,')
@@ -13,18 +13,24 @@ from seed.data_importer.equivalence_partitioner import EquivalencePartitioner
 from seed.data_importer.tasks import (
     match_buildings,
     save_state_match,
+    save_state_matches,
     filter_duplicated_states,
     match_and_merge_unmatched_objects,
+    merge_unmatched_into_views,
+    update_states,
 )
 from seed.models import (
     ASSESSED_RAW,
     DATA_STATE_MAPPING,
+    DATA_STATE_MATCHING,
     MERGE_STATE_MERGED,
+    MERGE_STATE_NEW,
     Column,
     PropertyAuditLog,
     PropertyState,
     PropertyView,
     TaxLotProperty,
+    TaxLotState,
     TaxLotView,
 )
 from seed.test_helpers.fake import (
@@ -37,9 +43,6 @@ from seed.test_helpers.fake import (
 from seed.tests.util import DataMappingBaseTestCase
 
 
-# from seed.data_importer.tasks import merge_unmatched_into_views
-
-
 class TestMatching(DataMappingBaseTestCase):
     def setUp(self):
         selfvars = self.set_up(ASSESSED_RAW)
@@ -98,6 +101,10 @@ class TestMatching(DataMappingBaseTestCase):
 
         # there should be 4 relationships in the TaxLotProperty associated with view, one each for the taxlots defined
         self.assertEqual(TaxLotProperty.objects.filter(property_view_id=pv).count(), 4)
+        # and only the first one is the primary tax lot of the property
+        self.assertEqual(
+            TaxLotProperty.objects.filter(property_view_id=pv, primary=True).count(), 1
+        )
 
     def test_match_properties_and_taxlots_with_address_no_lot_number(self):
         # create an ImportFile for testing purposes. Seems like we would want to run this matching just on a
@@ -273,6 +280,63 @@ class TestMatching(DataMappingBaseTestCase):
         self.assertEqual(pal.parent_state2, ps_2)
         self.assertEqual(pal.description, 'Automatic Merge')
 
+    def test_save_state_matches(self):
+        pairs = []
+        for i in range(3):
+            pairs.append((
+                self.property_state_factory.get_property_state(property_name="persist %s" % i),
+                self.property_state_factory.get_property_state(
+                    extra_data={"extra_1": "exists %s" % i}),
+            ))
+
+        priorities = Column.retrieve_priorities(self.org.pk)
+        # audit logs, merged states, merged audit logs and 4 to check for relationships to merge
+        with self.assertNumQueries(7):
+            merged_states = save_state_matches(pairs, priorities)
+
+        self.assertEqual(len(merged_states), 3)
+        for i, merged_state in enumerate(merged_states):
+            self.assertEqual(merged_state.merge_state, MERGE_STATE_MERGED)
+            self.assertEqual(merged_state.property_name, "persist %s" % i)
+            self.assertEqual(merged_state.extra_data['extra_1'], "exists %s" % i)
+
+            # the merged state is the same as if it were saved
+            hash_object = merged_state.hash_object
+            merged_state.save()
+            self.assertEqual(merged_state.hash_object, hash_object)
+
+            pal = PropertyAuditLog.objects.get(organization=self.org, state=merged_state)
+            self.assertEqual(pal.name, 'System Match')
+            self.assertEqual(pal.parent_state1, pairs[i][0])
+            self.assertEqual(pal.parent_state2, pairs[i][1])
+            self.assertEqual(pal.parent1.state, pairs[i][0])
+            self.assertEqual(pal.parent2.state, pairs[i][1])
+
+    def test_update_states(self):
+        states = [self.property_state_factory.get_property_state() for _ in range(3)]
+        states += [self.taxlot_state_factory.get_taxlot_state() for _ in range(2)]
+        hashes = [state.hash_object for state in states]
+
+        # one update per state class, regardless of the number of states
+        with self.assertNumQueries(2):
+            update_states(states, data_state=DATA_STATE_MATCHING, merge_state=MERGE_STATE_NEW)
+
+        for state, hash_object in zip(states, hashes):
+            self.assertEqual(state.data_state, DATA_STATE_MATCHING)
+            self.assertEqual(state.merge_state, MERGE_STATE_NEW)
+
+            # the hash is the same as if the state were saved
+            state.refresh_from_db()
+            self.assertEqual(state.data_state, DATA_STATE_MATCHING)
+            self.assertEqual(state.merge_state, MERGE_STATE_NEW)
+            self.assertEqual(state.hash_object, hash_object)
+            state.save()
+            self.assertEqual(state.hash_object, hash_object)
+
+        self.assertEqual(
+            TaxLotState.objects.filter(id__in=[s.id for s in states[3:]],
+                                       data_state=DATA_STATE_MATCHING).count(), 2)
+
     def test_filter_duplicated_states(self):
         for i in range(10):
             self.property_state_factory.get_property_state(
@@ -397,6 +461,35 @@ class TestMatching(DataMappingBaseTestCase):
             self.assertEqual(ps.site_eui.magnitude, 150)  # from the second record
         self.assertEqual(found, True)
 
+    def test_merge_unmatched_into_views_with_matches(self):
+        partitioner = EquivalencePartitioner.make_default_state_equivalence(PropertyState)
+
+        view_1 = self.property_view_factory.get_property_view(pm_property_id='1001')
+        view_2 = self.property_view_factory.get_property_view(pm_property_id='1002')
+
+        # matches the pm_property_id of view_1 through custom_id_1
+        ps_1 = self.property_state_factory.get_property_state(
+            custom_id_1='1001',
+            import_file_id=self.import_file.id,
+            data_state=DATA_STATE_MAPPING,
+        )
+        ps_2 = self.property_state_factory.get_property_state(
+            pm_property_id='1003',
+            import_file_id=self.import_file.id,
+            data_state=DATA_STATE_MAPPING,
+        )
+
+        matched_views = merge_unmatched_into_views(
+            [ps_1, ps_2], partitioner, self.org, self.import_file
+        )
+
+        self.assertEqual(len(matched_views), 2)
+        merged_view = [v for v in matched_views if v.pk == view_1.pk][0]
+        self.assertEqual(merged_view.state.merge_state, MERGE_STATE_MERGED)
+        self.assertEqual(merged_view.state.custom_id_1, '1001')
+        self.assertNotIn(view_2.pk, [v.pk for v in matched_views])
+        self.assertEqual(PropertyView.objects.filter(state=ps_2).count(), 1)
+
     def test_merge_unmatched_into_views_no_matches(self):
         """It is very unlikely that any of these states will match since it is using faker."""
         for i in range(10):
@@ -48,7 +48,7 @@ from seed.lib.superperms.orgs.models import (
 from seed.lib.superperms.orgs.models import OrganizationUser
 from seed.lib.superperms.orgs.permissions import SEEDOrgPermissions
 from seed.models import (
-    get_column_mapping,
+    get_column_mapping_lookup,
 )
 from seed.models import (
     obj_to_dict,
@@ -702,13 +702,14 @@ class ImportFileViewSet(viewsets.ViewSet):
             ).only(*fields['PropertyState']).order_by('id')
 
             property_results = []
+            property_plan = TaxLotProperty.model_to_dict_plan(
+                PropertyState,
+                property_column_name_mapping,
+                fields=fields['PropertyState'],
+                exclude=['extra_data']
+            )
             for prop in properties:
-                prop_dict = TaxLotProperty.model_to_dict_with_mapping(
-                    prop,
-                    property_column_name_mapping,
-                    fields=fields['PropertyState'],
-                    exclude=['extra_data']
-                )
+                prop_dict = TaxLotProperty.plan_to_dict(prop, property_plan)
 
                 prop_dict.update(
                     TaxLotProperty.extra_data_to_dict_with_mapping(
@@ -729,13 +730,14 @@ class ImportFileViewSet(viewsets.ViewSet):
             ).only(*fields['TaxLotState']).order_by('id')
 
             tax_lot_results = []
+            tax_lot_plan = TaxLotProperty.model_to_dict_plan(
+                TaxLotState,
+                taxlot_column_name_mapping,
+                fields=fields['TaxLotState'],
+                exclude=['extra_data']
+            )
             for tax_lot in tax_lots:
-                tax_lot_dict = TaxLotProperty.model_to_dict_with_mapping(
-                    tax_lot,
-                    taxlot_column_name_mapping,
-                    fields=fields['TaxLotState'],
-                    exclude=['extra_data']
-                )
+                tax_lot_dict = TaxLotProperty.plan_to_dict(tax_lot, tax_lot_plan)
                 tax_lot_dict.update(
                     TaxLotProperty.extra_data_to_dict_with_mapping(
                         tax_lot.extra_data,
@@ -1821,8 +1823,7 @@ class ImportFileViewSet(viewsets.ViewSet):
             suggested_mappings = mapper.build_column_mapping(
                 import_file.first_row_columns,
                 Column.retrieve_all_by_tuple(organization_id),
-                previous_mapping=get_column_mapping,
-                map_args=[organization],
+                previous_mapping=get_column_mapping_lookup(organization),
                 default_mappings=pm_mappings,
                 thresh=80
             )
@@ -1831,8 +1832,7 @@ class ImportFileViewSet(viewsets.ViewSet):
             suggested_mappings = mapper.build_column_mapping(
                 import_file.first_row_columns,
                 Column.retrieve_all_by_tuple(organization.pk),
-                previous_mapping=get_column_mapping,
-                map_args=[organization],
+                previous_mapping=get_column_mapping_lookup(organization),
                 thresh=80  # percentage match that we require. 80% is random value for now.
             )
             # replace None with empty string for column names and PropertyState for tables
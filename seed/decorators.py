@@ -5,13 +5,18 @@
 :author
 """
 import json
+import logging
+import threading
+import time
 from functools import wraps
 
 from django.http import HttpResponse, HttpResponseForbidden, HttpResponseBadRequest
 
 from seed.lib.superperms.orgs.models import OrganizationUser
 from seed.serializers.pint import PintJSONEncoder
-from seed.utils.cache import make_key, lock_cache, unlock_cache, get_lock
+from seed.utils.cache import make_key, acquire_lock, renew_lock, release_lock
+
+_log = logging.getLogger(__name__)
 
 SEED_CACHE_PREFIX = 'SEED:{0}'
 LOCK_CACHE_PREFIX = SEED_CACHE_PREFIX + ':LOCK'
@@ -37,6 +42,20 @@ def get_prog_key(func_name, import_file_pk):
     return _get_cache_key(PROGRESS_CACHE_PREFIX.format(func_name), import_file_pk)
 
 
+# Seconds until a lock expires if the worker holding it dies. The lock is renewed every
+# LOCK_RENEW_INTERVAL seconds while the task runs, so the task can take longer than this.
+LOCK_TIMEOUT = 60
+LOCK_RENEW_INTERVAL = 20
+
+
+def _renew_lock_until(lock_key, token, done):
+    """Keep renewing the lock until done is set, or until the lock was lost"""
+    while not done.wait(LOCK_RENEW_INTERVAL):
+        if not renew_lock(lock_key, token, LOCK_TIMEOUT):
+            _log.warning('Lost the lock %s while the task was running' % lock_key)
+            return
+
+
 def lock_and_track(fn, *args, **kwargs):
     """Decorator to lock tasks to single executor and provide progress url."""
     func_name = fn.__name__
@@ -46,18 +65,29 @@ def lock_and_track(fn, *args, **kwargs):
         """Lock and return progress url for updates."""
         lock_key = _get_lock_key(func_name, import_file_pk)
         prog_key = get_prog_key(func_name, import_file_pk)
-        is_locked = get_lock(lock_key)
+
         # If we're already processing a given task, don't proceed.
-        if is_locked:
+        token = acquire_lock(lock_key, LOCK_TIMEOUT)
+        if token is None:
+            _log.info('%s is locked for %s, not running it again' % (func_name, import_file_pk))
             return {'error': 'locked'}
 
-        # Otherwise, set the lock for 1 minute.
-        lock_cache(lock_key)
+        # Renew the lock in the background for as long as the task is running
+        done = threading.Event()
+        renewer = threading.Thread(target=_renew_lock_until, args=(lock_key, token, done))
+        renewer.daemon = True
+        renewer.start()
+
+        start = time.time()
         try:
             response = fn(import_file_pk, *args, **kwargs)
         finally:
             # Unset our lock
-            unlock_cache(lock_key)
+            done.set()
+            renewer.join()
+            release_lock(lock_key, token)
+            _log.info('%s held the lock for %s for %.1f seconds' % (
+                func_name, import_file_pk, time.time() - start))
 
         # If our response is a dict, add our progress URL to it.
         if isinstance(response, dict):
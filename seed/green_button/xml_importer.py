@@ -313,8 +313,10 @@ def import_xml(import_file, cycle):
     :param cycle: which cycle to import the results
     :returns: PropertyView, attached to cycle
     """
-    xml_file = import_file.local_file
-    xml_string = xml_file.read()
+    try:
+        xml_string = import_file.local_file.read()
+    finally:
+        import_file.close_local_file()
     raw_data = xmltodict.parse(xml_string)
 
     data = building_data(raw_data)
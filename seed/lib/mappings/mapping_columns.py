@@ -56,6 +56,7 @@ class MappingColumns(object):
         :return dict: {'raw_column': ('dest_column', score), 'raw_column_2': ('dest_column_2',...)}
         """
         self.data = {}
+        dest_index = matchers.MatchIndex(dest_columns)
         for raw in raw_columns:
             attempt_best_match = False
             # We want previous mappings to be at the top of the list.
@@ -90,7 +91,7 @@ class MappingColumns(object):
                 if raw_test.lower() == 'ubi':
                     raw_test = 'jurisdiction_tax_lot_id'
 
-                matches = matchers.best_match(raw_test, dest_columns, top_n=5)
+                matches = matchers.best_match(raw_test, dest_index, top_n=5)
 
                 # go get the top 5 matches. format will be [('PropertyState', 'building_count', 62), ...]
                 self.add_mappings(raw, matches)
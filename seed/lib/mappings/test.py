@@ -5,10 +5,13 @@
 :author
 """
 import logging
+import random
 
 from django.test import TestCase
 
 from seed.lib.mappings.mapping_columns import MappingColumns
+from seed.lib.mcm.matchers import MatchIndex, best_match
+from seed.management.commands.benchmark_best_match import reference_best_match
 
 logger = logging.getLogger(__name__)
 
@@ -49,3 +52,18 @@ class TestMappingColumns(TestCase):
             'stomach': ['PropertyState', 'stomach', 100]
         }
         self.assertDictEqual(expected, results.final_mappings)
+
+    def test_best_match_matches_reference(self):
+        random.seed(42)
+
+        def name():
+            return ''.join(random.choice('abcdeó _') for _ in range(random.randint(1, 15)))
+
+        for _ in range(100):
+            categories = [(random.choice(['PropertyState', 'TaxLotState']), name()) for _ in range(30)]
+            categories += [name() for _ in range(3)]
+            raw = name()
+            for top_n in [1, 5]:
+                self.assertEqual(best_match(raw, categories, top_n), reference_best_match(raw, categories, top_n))
+                self.assertEqual(best_match(raw, MatchIndex(categories), top_n),
+                                 reference_best_match(raw, categories, top_n))
@@ -7,6 +7,7 @@
 import re
 import string
 from datetime import datetime, date
+from functools import lru_cache, partial
 
 import dateutil
 import dateutil.parser
@@ -16,7 +17,7 @@ from past.builtins import basestring
 # ie. don't try `import pint; ureg = pint.UnitRegistry()`
 from quantityfield import ureg
 
-from seed.lib.mcm.matchers import fuzzy_in_set
+from seed.lib.mcm.matchers import MatchIndex, fuzzy_in_set
 
 NONE_SYNONYMS = (
     ('_', 'not available'),
@@ -29,15 +30,24 @@ BOOL_SYNONYMS = (
     ('_', 'y'),
     ('_', '1'),
 )
+# the synonyms are matched against every string cell, only normalize them once
+NONE_SYNONYMS_INDEX = MatchIndex(NONE_SYNONYMS)
+BOOL_SYNONYMS_INDEX = MatchIndex(BOOL_SYNONYMS)
 PUNCT_REGEX = re.compile('[{0}]'.format(
     re.escape(string.punctuation.replace('.', '').replace('-', '')))
 )
 
 
+@lru_cache(maxsize=4096)
+def _is_none_synonym(value):
+    """Fuzzy matching is expensive and the same strings repeat down a column, remember the answers"""
+    return fuzzy_in_set(value, NONE_SYNONYMS_INDEX)
+
+
 def default_cleaner(value, *args):
     """Pass-through validation for strings we don't know about."""
     if isinstance(value, basestring):
-        if fuzzy_in_set(value.lower(), NONE_SYNONYMS):
+        if _is_none_synonym(value.lower()):
             return None
         # guard against `''` coming in from an Excel empty cell
         if value == '':
@@ -87,14 +97,72 @@ def bool_cleaner(value, *args):
     if isinstance(value, bool):
         return value
 
-    if fuzzy_in_set(value.strip().lower(), BOOL_SYNONYMS):
+    if fuzzy_in_set(value.strip().lower(), BOOL_SYNONYMS_INDEX):
         return True
     else:
         return False
 
 
-def date_time_cleaner(value, *args):
-    """Try to clean value, coerce it into a python datetime."""
+class DateTimeParser(object):
+    """
+    Parses the date strings of one column. dateutil.parser.parse has to work out the format of
+    every value, but the values of a column almost always share a format. Once a value is found
+    whose format is one of FORMATS, the following values are parsed with strptime and only the
+    values that do not fit that format fall back to dateutil.
+    """
+
+    # Only formats that strptime and dateutil read the same way. Day first and two digit year
+    # formats are left out because dateutil reads them differently (e.g. 01/02/2018 is January 2nd)
+    FORMATS = (
+        '%Y-%m-%d',
+        '%Y-%m-%d %H:%M:%S',
+        '%Y-%m-%dT%H:%M:%S',
+        '%Y/%m/%d',
+        '%m/%d/%Y',
+        '%m/%d/%Y %H:%M',
+        '%m/%d/%Y %H:%M:%S',
+        '%m/%d/%Y %I:%M %p',
+        '%m/%d/%Y %I:%M:%S %p',
+        '%m-%d-%Y',
+    )
+
+    # give up looking for the format of a column after this many values
+    MAX_INFERENCE_ATTEMPTS = 10
+
+    def __init__(self):
+        self.format = None
+        self.inference_attempts = 0
+
+    def parse(self, value):
+        if self.format is not None:
+            try:
+                return datetime.strptime(value, self.format)
+            except ValueError:
+                pass
+
+        parsed = dateutil.parser.parse(value)
+        if self.format is None and self.inference_attempts < self.MAX_INFERENCE_ATTEMPTS:
+            self.inference_attempts += 1
+            self.format = self._infer_format(value, parsed)
+        return parsed
+
+    def _infer_format(self, value, parsed):
+        """Return the first format that reads value exactly as dateutil did"""
+        for fmt in self.FORMATS:
+            try:
+                if datetime.strptime(value, fmt) == parsed:
+                    return fmt
+            except ValueError:
+                continue
+        return None
+
+
+def date_time_cleaner(value, *args, **kwargs):
+    """
+    Try to clean value, coerce it into a python datetime.
+
+    Pass a DateTimeParser as parser to reuse the format of the previous values of the column.
+    """
     if not value or value == '':
         return None
     if isinstance(value, (datetime, date)):
@@ -103,7 +171,8 @@ def date_time_cleaner(value, *args):
     try:
         # the dateutil parser only parses strings, make sure to return None if not a string
         if isinstance(value, basestring):
-            value = dateutil.parser.parse(value)
+            parser = kwargs.get('parser')
+            value = parser.parse(value) if parser else dateutil.parser.parse(value)
             value = timezone.make_aware(value, timezone.get_current_timezone())
         else:
             value = None
@@ -113,9 +182,9 @@ def date_time_cleaner(value, *args):
     return value
 
 
-def date_cleaner(value, *args):
+def date_cleaner(value, *args, **kwargs):
     """Try to clean value, coerce it into a python datetime, then call .date()"""
-    value = date_time_cleaner(value)
+    value = date_time_cleaner(value, **kwargs)
     if value:
         return value.date()
     else:
@@ -188,6 +257,7 @@ class Cleaner(object):
             lambda x: self.schema[x] == 'integer', self.schema
         ))
         self.pint_column_map = self._build_pint_column_map()
+        self._compiled = {}
 
     def _build_pint_column_map(self):
         """
@@ -213,30 +283,46 @@ class Cleaner(object):
 
         return pint_column_map
 
+    def get_cleaner(self, column_name, is_extra_data=True):
+        """
+        Return the function that cleans the values of column_name. The type of the column is
+        only looked up the first time, so that cleaning a cell does not search the column lists.
+        """
+        key = (column_name, is_extra_data)
+        try:
+            return self._compiled[key]
+        except KeyError:
+            cleaner = self._compiled[key] = self._compile(column_name, is_extra_data)
+            return cleaner
+
+    def _compile(self, column_name, is_extra_data):
+        type_cleaner = None
+        if column_name in self.float_columns:
+            type_cleaner = float_cleaner
+        elif column_name in self.date_time_columns:
+            type_cleaner = partial(date_time_cleaner, parser=DateTimeParser())
+        elif column_name in self.date_columns:
+            type_cleaner = partial(date_cleaner, parser=DateTimeParser())
+        elif column_name in self.string_columns:
+            type_cleaner = str
+        elif column_name in self.int_columns:
+            type_cleaner = int_cleaner
+        elif not is_extra_data:
+            # If the object is not extra data, then check if the data are in the
+            # pint_column_map. This needs to be cleaned up significantly.
+            if column_name in self.pint_column_map:
+                type_cleaner = partial(pint_cleaner, units=self.pint_column_map[column_name])
+
+        return partial(_clean_value, type_cleaner)
+
     def clean_value(self, value, column_name, is_extra_data=True):
         """Clean the value, based on characteristics of its column_name."""
-        value = default_cleaner(value)
-        if value is not None:
-            if column_name in self.float_columns:
-                return float_cleaner(value)
-
-            if column_name in self.date_time_columns:
-                return date_time_cleaner(value)
+        return self.get_cleaner(column_name, is_extra_data)(value)
 
-            if column_name in self.date_columns:
-                return date_cleaner(value)
 
-            if column_name in self.string_columns:
-                return str(value)
+def _clean_value(type_cleaner, value):
+    value = default_cleaner(value)
+    if value is not None and type_cleaner is not None:
+        return type_cleaner(value)
 
-            if column_name in self.int_columns:
-                return int_cleaner(value)
-
-            if not is_extra_data:
-                # If the object is not extra data, then check if the data are in the
-                # pint_column_map. This needs to be cleaned up significantly.
-                if column_name in self.pint_column_map:
-                    units = self.pint_column_map[column_name]
-                    return pint_cleaner(value, units)
-
-        return value
+    return value
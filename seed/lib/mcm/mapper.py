@@ -7,10 +7,10 @@
 
 from __future__ import absolute_import
 
-import copy
 import itertools
 import logging
 import re
+from collections.abc import Mapping
 from datetime import datetime, date
 
 from .cleaners import default_cleaner
@@ -216,11 +216,41 @@ def expand_and_normalize_field(field, return_list=False):
             return field
 
 
+class RowOverlay(Mapping):
+    """
+    A read only row with some of its values replaced. The rows that expand_rows creates from a
+    row share that row instead of each holding a deep copy of it.
+    """
+    __slots__ = ('row', 'overrides')
+
+    def __init__(self, row, overrides):
+        self.row = row
+        self.overrides = overrides
+
+    def __getitem__(self, key):
+        if key in self.overrides:
+            return self.overrides[key]
+        return self.row[key]
+
+    def __iter__(self):
+        # the overrides only replace values of the row, so the keys and their order are the row's
+        return iter(self.row)
+
+    def __len__(self):
+        return len(self.row)
+
+    def __repr__(self):
+        return 'RowOverlay(%r)' % dict(self.items())
+
+
 def expand_rows(row, delimited_fields, expand_row):
     """
     Take a row and a field which may have delimited values and convert into a list of new rows
     with the same data expect for the replaced delimited value.
 
+    The rows are not copied: a row without delimited fields is returned as is and the other
+    rows are RowOverlays of the row, so the rows must not be modified.
+
     :param row: dict, original row to split out
     :param delimited_fields: list of dicts, columns to clean/expand/split
     :param expand_row: boolean, expand the row on delimited fields or not.
@@ -228,37 +258,23 @@ def expand_rows(row, delimited_fields, expand_row):
     :return: list
     """
 
-    # _log.debug('expand_row is {}'.format(expand_row))
+    # most rows have none of the delimited fields and pass through untouched
+    present_fields = [d for d in delimited_fields if d in row]
+    if not present_fields:
+        return [row]
+
     # go through the delimited fields and clean up the rows
-    copy_row = copy.deepcopy(row)
-    for d in delimited_fields:
-        if d in copy_row:
-            copy_row[d] = expand_and_normalize_field(copy_row[d], False)
-
-    if expand_row:
-        new_values = []
-        for d in delimited_fields:
-            fields = []
-            if d in copy_row:
-                for value in expand_and_normalize_field(copy_row[d], True):
-                    fields.append({d: value})
-                new_values.append(fields)
-
-        # return all combinations of the lists
-        combinations = list(itertools.product(*new_values))
-
-        new_rows = []
-        for c in combinations:
-            new_row = copy.deepcopy(copy_row)
-            # c is a tuple because of the .product command
-            for item in c:
-                for k, v in item.items():
-                    new_row[k] = v
-            new_rows.append(new_row)
-
-        return new_rows
-    else:
-        return [copy_row]
+    normalized = {d: expand_and_normalize_field(row[d], False) for d in present_fields}
+    if not expand_row:
+        return [RowOverlay(row, normalized)]
+
+    new_values = [expand_and_normalize_field(normalized[d], True) for d in present_fields]
+
+    # return all combinations of the lists
+    return [
+        RowOverlay(row, dict(zip(present_fields, c)))
+        for c in itertools.product(*new_values)
+    ]
 
 
 def map_row(row, mapping, model_class, extra_data_fields=[], cleaner=None, **kwargs):
@@ -4,30 +4,57 @@
 :copyright (c) 2014 - 2019, The Regents of the University of California, through Lawrence Berkeley National Laboratory (subject to receipt of any required approvals from the U.S. Department of Energy) and contributors. All rights reserved.  # NOQA
 :author
 """
+import heapq
 from builtins import str
-from functools import cmp_to_key
 
 import jellyfish
 
 
-def sort_scores(a, b):
+def normalize_category(value):
+    """The form of the names that best_match compares"""
+    return str(value.encode('ascii', 'replace').lower())
+
+
+class MatchIndex(object):
     """
-    Custom sort method in order to create a bias around the use of PropertyState over TaxLotState. This just works
-    because the extra string comparison concats the table name with the field name. Since P is < T, it returns
-    the correct order.
+    The categories of best_match with their names normalized once, so that many raw columns
+    can be matched against the same categories (e.g. all the columns of an organization)
+    without normalizing every category again for each raw column.
     """
-    if a[2] > b[2]:
-        return -1
-    elif a[2] == b[2]:  # Sort by the strings if they match up
-        com_a = '.'.join(
-            a[0:2])  # so, 0:2 returns the first 2 elements, okay python, you win this time.
-        com_b = '.'.join(b[0:2])
-        if com_a > com_b:
-            return 1
-        else:
-            return -1
-    else:
-        return 1
+
+    def __init__(self, categories):
+        self.tables = []
+        self.categories = []
+        self.normalized = []
+        self.sort_keys = []
+        for cat in categories:
+            # verify that the category has two elements, if not, then just
+            # return _ for the first category. Need this because fuzzy_in_set uses the
+            # same method
+            if isinstance(cat, tuple):
+                table_name = cat[0]
+                category = cat[1]
+            else:
+                table_name = '_'
+                category = cat
+
+            self.tables.append(table_name)
+            self.categories.append(category)
+            self.normalized.append(normalize_category(category))
+            self.sort_keys.append('.'.join([table_name, category]))
+
+    def best_match(self, s, top_n=5):
+        """See best_match"""
+        s = normalize_category(s)
+        jaro_winkler = jellyfish.jaro_winkler
+        scores = [jaro_winkler(s, category) for category in self.normalized]
+
+        # highest score first, then by 'table.category' so that
+        # PropertyState is before TaxLotState. Only the top n are kept instead of sorting them all.
+        best = heapq.nsmallest(top_n, zip([-score for score in scores], self.sort_keys, range(len(scores))))
+
+        # convert to hundreds
+        return [(self.tables[i], self.categories[i], int(scores[i] * 100)) for _, _, i in best]
 
 
 def best_match(s, categories, top_n=5):
@@ -46,51 +73,17 @@ def best_match(s, categories, top_n=5):
     Args:
         s: str value to find best match
         categories: list of tuples to compare against. needs to be
-        [('table1', 'value1'), ('table2', 'value2')]
+        [('table1', 'value1'), ('table2', 'value2')], or a MatchIndex of the list
         top_n: number of matches to return
 
     Returns:
         list of tuples (table, guess, percentage)
 
     """
+    if not isinstance(categories, MatchIndex):
+        categories = MatchIndex(categories)
 
-    # print('starting match on {}'.format(s))
-    scores = []
-    for cat in categories:
-        # verify that the category has two elements, if not, then just
-        # return _ for the first category. Need this because fuzzy_in_set uses the
-        # same method
-        table_name = '_'
-        category = None
-        if isinstance(cat, tuple):
-            table_name = cat[0]
-            category = cat[1]
-        else:
-            category = cat
-
-        scores.append(
-            (
-                table_name,
-                category,
-                jellyfish.jaro_winkler(
-                    str(s.encode('ascii', 'replace').lower()),
-                    str(category.encode('ascii', 'replace').lower())
-                )
-            )
-        )
-
-        # sort first by the ones
-
-    # print('all scores for {} are {}'.format(s, scores))
-    scores.sort()
-    scores = sorted(scores, key=cmp_to_key(sort_scores))
-    # take the top n number of matches
-    scores = scores[:top_n]
-    # convert to hundreds
-    scores = [(score[0], score[1], int(score[2] * 100)) for score in scores]
-    # print('ending all categories match of {} with scores {}'.format(s, scores))
-
-    return scores
+    return categories.best_match(s, top_n)
 
 
 def fuzzy_in_set(column_name, ontology, percent_confidence=95):
@@ -35,6 +35,27 @@ from xlrd.xldate import XLDateAmbiguous
 ROW_DELIMITER = "|#*#|"
 
 
+class LineIterator(object):
+    """Iterate over the lines of a file using readline.
+
+    Iterating over a text file with next() disables file.tell(), which is needed to record where
+    each chunk of rows starts. Unlike a generator, this iterator can be reused after the file has
+    been seeked, even if it previously reached the end of the file.
+    """
+
+    def __init__(self, f):
+        self.f = f
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        line = self.f.readline()
+        if not line:
+            raise StopIteration
+        return line
+
+
 class GeoJSONParser(object):
     def __init__(self, json_file):
         raw_data = json.load(json_file)
@@ -91,6 +112,7 @@ class ExcelParser(object):
         self.excel_file = excel_file
         self.sheet = self._get_sheet(excel_file)
         self.header_row = self._get_header_row(self.sheet)
+        self.next_row = self.header_row + 1
         self.excelreader = self.XLSDictReader(self.sheet, self.header_row)
 
     def _get_sheet(self, f, sheet_index=0):
@@ -148,12 +170,14 @@ class ExcelParser(object):
 
         return item.value
 
-    def XLSDictReader(self, sheet, header_row=0):
+    def XLSDictReader(self, sheet, header_row=0, start_row=None):
         """returns a generator yeilding a dict per row from the XLS/XLSX file
         https://gist.github.com/mdellavo/639082
 
         :param sheet: xlrd Sheet
         :param header_row: the row index to start with
+        :param start_row: the index of the first data row to return, defaults to the row after
+            the header row
         :returns: Generator yeilding a row as Dict
         """
 
@@ -171,12 +195,22 @@ class ExcelParser(object):
                 self.get_value(sheet.cell(i, j))
             )
 
+        def rows(start):
+            """yields the row indexes, keeping track of the next row to be read"""
+            for i in range(start, sheet.nrows):
+                self.next_row = i + 1
+                yield i
+
+        if start_row is None:
+            start_row = header_row + 1
+        self.next_row = start_row
+
         # return a generator, using yield here wouldn't run until the first
         # usage causing the try/except in MCMParser _get_reader to return
         # ExcelReader for csv files
         return (
             dict(item(i, j) for j in range(sheet.ncols))
-            for i in range(header_row + 1, sheet.nrows)
+            for i in rows(start_row)
         )
 
     def seek_to_beginning(self):
@@ -188,6 +222,14 @@ class ExcelParser(object):
         self.excel_file.seek(0)
         self.excelreader = self.XLSDictReader(self.sheet, self.header_row)
 
+    def tell(self):
+        """returns the index of the next row that will be read"""
+        return self.next_row
+
+    def seek(self, position):
+        """seeks to a row index previously returned by ``tell``"""
+        self.excelreader = self.XLSDictReader(self.sheet, self.header_row, position)
+
     def num_columns(self):
         """gets the number of columns for the file"""
         return self.sheet.ncols
@@ -231,13 +273,14 @@ class CSVParser(object):
         dialect = Sniffer().sniff(self.csvfile.read(16384))
         self.csvfile.seek(0)
 
+        # read the lines with readline so that the file position can be retrieved with tell()
         if 'reader_type' not in kwargs:
-            return DictReader(self.csvfile)
+            return DictReader(LineIterator(self.csvfile))
 
         else:
             reader_type = kwargs.get('reader_type')
             del kwargs['reader_type']
-            return reader_type(self.csvfile, dialect, **kwargs)
+            return reader_type(LineIterator(self.csvfile), dialect, **kwargs)
 
     def clean_super_scripts(self):
         """Replaces column names with clean ones."""
@@ -252,7 +295,15 @@ class CSVParser(object):
         self.csvfile.seek(0)
 
         # skip header row
-        self.csvfile.__next__()
+        self.csvfile.readline()
+
+    def tell(self):
+        """returns the position in the file of the next row that will be read"""
+        return self.csvfile.tell()
+
+    def seek(self, position):
+        """seeks to a file position previously returned by ``tell``"""
+        self.csvfile.seek(position)
 
     def num_columns(self):
         """gets the number of columns for the file"""
@@ -325,6 +376,27 @@ class MCMParser(object):
 
         return self.reader.seek_to_beginning()
 
+    def tell(self):
+        """
+        Return the position of the next row in the file. The position is only meaningful to
+        ``seek`` and can be stored (e.g. in a task argument) to read the rows from there later.
+
+        :return: int
+        """
+        return self.reader.tell()
+
+    def seek(self, position):
+        """
+        Seek to a position previously returned by ``tell`` so that the next row of ``data`` is
+        the row at that position.
+
+        :param position: int
+        """
+        self.seek_to_beginning()
+        self.reader.seek(position)
+        if isinstance(self.reader, ExcelParser):
+            self.data = self.reader.excelreader
+
     def num_columns(self):
         """returns the number of columns of the file"""
         return self.reader.num_columns()
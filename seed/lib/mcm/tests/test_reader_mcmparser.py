@@ -0,0 +1,46 @@
+# !/usr/bin/env python
+# encoding: utf-8
+
+import os
+from itertools import islice
+
+from django.test import TestCase
+
+from seed.lib.mcm.reader import MCMParser
+
+
+class MCMParserSeekTest(TestCase):
+    def setUp(self):
+        self.data_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'test_data')
+
+    def _assert_chunks_round_trip(self, filename):
+        with open(os.path.join(self.data_dir, filename)) as f:
+            parser = MCMParser(f)
+            all_rows = list(parser.data)
+
+            parser.seek_to_beginning()
+            positions = []
+            while True:
+                position = parser.tell()
+                num_rows = len(list(islice(parser.data, 2)))
+                if not num_rows:
+                    break
+                positions.append((position, num_rows))
+
+        self.assertEqual(sum(n for _, n in positions), len(all_rows))
+
+        rows = []
+        for position, num_rows in positions:
+            # read each chunk with a new parser, like the tasks that save the raw data
+            with open(os.path.join(self.data_dir, filename)) as f:
+                parser = MCMParser(f)
+                parser.seek(position)
+                rows.extend(islice(parser.data, num_rows))
+
+        self.assertEqual(rows, all_rows)
+
+    def test_csv_seek_to_position(self):
+        self._assert_chunks_round_trip('test_espm.csv')
+
+    def test_excel_seek_to_position(self):
+        self._assert_chunks_round_trip('test_espm.xls')
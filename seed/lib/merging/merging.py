@@ -111,7 +111,7 @@ def _merge_extra_data(ed1, ed2, priorities):
     return extra_data
 
 
-def merge_state(merged_state, state1, state2, priorities):
+def merge_state(merged_state, state1, state2, priorities, merge_relationships=True):
     """
     Set attributes on our Canonical model, saving differences.
 
@@ -119,6 +119,9 @@ def merge_state(merged_state, state1, state2, priorities):
     :param state1: PropertyState/TaxLotState model inst. Left parent.
     :param state2: PropertyState/TaxLotState model inst. Right parent.
     :param priorities: dict, column names with favor new or existing
+    :param merge_relationships: bool, merge the measures, scenarios and simulations as well. This
+        requires ``merged_state`` to be saved. If False, only the attributes are merged (in memory)
+        and the caller is responsible for merging the relationships.
     :return: inst(``merged_state``), updated.
     """
     # Calculate the difference between the two states and save into a dictionary
@@ -157,7 +160,7 @@ def merge_state(merged_state, state1, state2, priorities):
     merged_state.extra_data = _merge_extra_data(state1.extra_data, state2.extra_data, priorities['extra_data'])
 
     # merge measures, scenarios, simulations
-    if isinstance(merged_state, PropertyState):
+    if merge_relationships and isinstance(merged_state, PropertyState):
         PropertyState.merge_relationships(merged_state, state1, state2)
 
     return merged_state
@@ -7,10 +7,35 @@
 import logging
 
 from seed.decorators import get_prog_key
-from seed.utils.cache import get_cache, set_cache, delete_cache
+from seed.utils.cache import (
+    delete_cache, get_many_cache_raw, incr_or_add_cache_raw, set_cache_raw
+)
 
 _log = logging.getLogger(__name__)
 
+# The progress is kept for a day, so that reading the progress does not need to refresh it
+PROGRESS_TIMEOUT = 86400
+
+
+def _steps_key(key):
+    """Return the key of the atomic counter of the steps of the progress key"""
+    return '%s:STEPS' % key
+
+
+def _with_step_progress(data, steps):
+    """
+    Return the progress data with the progress derived from the number of steps that were taken.
+    The steps are counted separately from the rest of the data so that parallel tasks can step
+    without overwriting each other.
+
+    :param data: dict, progress data
+    :param steps: int, number of steps that were taken, or None
+    :return: dict
+    """
+    if data.get('total') and steps:
+        data['progress'] = max(data['progress'], min(100.0, steps * 100.0 / data['total']))
+    return data
+
 
 class ProgressData(object):
 
@@ -44,6 +69,9 @@ class ProgressData(object):
             self.total = None
             self.increment_by = None
 
+            # start counting the steps over
+            set_cache_raw(_steps_key(self.key), 0, PROGRESS_TIMEOUT)
+
         # set some member variables
         if 'progress_key' in self.data:
             self.key = self.data['progress_key']
@@ -60,6 +88,7 @@ class ProgressData(object):
         :return: dict, re-initialized data
         """
         delete_cache(self.key)
+        delete_cache(_steps_key(self.key))
 
         return self.initialize()
 
@@ -98,26 +127,41 @@ class ProgressData(object):
 
     @classmethod
     def from_key(cls, key):
-        data = get_cache(key)
+        data = cls.result_from_key(key) or {}
         if 'func_name' in data and 'unique_id' in data:
             return cls(func_name=data['func_name'], unique_id=data['unique_id'], init_data=data)
         else:
             raise Exception("Could not find key %s in cache" % key)
 
+    @staticmethod
+    def result_from_key(key):
+        """
+        Return the progress data of the key from the cache without writing to the cache, or None
+        if the key is not in the cache
+
+        :param key: str, progress key
+        :return: dict
+        """
+        values = get_many_cache_raw([key, _steps_key(key)])
+        data = values.get(key)
+        if not isinstance(data, dict) or 'progress' not in data:
+            return data
+        return _with_step_progress(data, values.get(_steps_key(key)))
+
     def save(self):
         """Save the data to the cache"""
         # save some member variables
         self.data['total'] = self.total
 
-        set_cache(self.key, self.data['status'], self.data)
+        set_cache_raw(self.key, self.data, PROGRESS_TIMEOUT)
 
-        return get_cache(self.key)
+        return self.result()
 
     def load(self):
         """Read in the data from the cache"""
 
         # Merge the existing data with items from the cache, favor cache items
-        self.data = dict(list(self.data.items()) + list(get_cache(self.key).items()))
+        self.data = dict(list(self.data.items()) + list(self.result().items()))
 
         # set some member variables
         if self.data['progress_key']:
@@ -131,17 +175,14 @@ class ProgressData(object):
         # load the latest value out of the cache
         self.load()
 
-        value = self.data['progress']
-        if value + self.increment_value() >= 100.0:
-            value = 100.0
-        else:
-            value += self.increment_value()
-
-        self.data['progress'] = value
-        self.data['status'] = 'parsing'
-        self.data['status_message'] = status_message
+        # count the step atomically, the progress is derived from the number of steps
+        incr_or_add_cache_raw(_steps_key(self.key), PROGRESS_TIMEOUT)
 
-        self.save()
+        # only write the rest of the data when it changes
+        if self.data['status'] != 'parsing' or self.data['status_message'] != status_message:
+            self.data['status'] = 'parsing'
+            self.data['status_message'] = status_message
+            self.save()
 
         return self.result()
 
@@ -151,7 +192,11 @@ class ProgressData(object):
 
         :return: dict
         """
-        return get_cache(self.key)
+        result = self.result_from_key(self.key)
+        if result is None:
+            # Cache accessed before it was created
+            result = {'status': 'parsing', 'progress': 0.0}
+        return result
 
     def increment_value(self):
         """
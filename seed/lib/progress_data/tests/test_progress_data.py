@@ -6,9 +6,11 @@
 """
 import logging
 
+import mock
 from django.test import TestCase
 
-from seed.lib.progress_data.progress_data import ProgressData
+from seed.lib.progress_data.progress_data import ProgressData, _steps_key
+from seed.utils.cache import delete_cache, incr_cache_raw, set_cache_raw
 
 logger = logging.getLogger(__name__)
 
@@ -74,3 +76,46 @@ class TestProgressData(TestCase):
 
         self.assertEqual(pd.result()['total'], 42)
         self.assertEqual(pd.result()['status_message'], 'Stepping')
+
+    def test_step_from_multiple_tasks(self):
+        pd = ProgressData(func_name='test_func_6', unique_id='zaq12w')
+        pd.total = 4
+        pd.save()
+
+        # every task has its own ProgressData, all of the steps are counted
+        tasks = [ProgressData.from_key(pd.key) for _ in range(4)]
+        for task in tasks:
+            task.step('Stepping')
+
+        self.assertEqual(pd.result()['progress'], 100)
+        self.assertEqual(ProgressData.result_from_key(pd.key)['status'], 'parsing')
+
+        pd.total = 8
+        pd.save()
+        self.assertEqual(pd.result()['progress'], 50)
+
+        pd.finish_with_success()
+        self.assertEqual(pd.result()['progress'], 100)
+        self.assertEqual(pd.result()['status'], 'success')
+
+    def test_step_counter_added_by_another_task(self):
+        pd = ProgressData(func_name='test_func_7', unique_id='xsw23e')
+        pd.total = 4
+        pd.save()
+        delete_cache(_steps_key(pd.key))
+
+        def incr_after_another_task(key):
+            # another task adds the expired counter between this task's incr and add
+            set_cache_raw(_steps_key(pd.key), 1)
+            incr.side_effect = incr_cache_raw
+            raise ValueError
+
+        with mock.patch('seed.utils.cache.incr_cache_raw') as incr:
+            incr.side_effect = incr_after_another_task
+            pd.step('Stepping')
+
+        # both steps are counted
+        self.assertEqual(pd.result()['progress'], 50)
+
+    def test_result_from_missing_key(self):
+        self.assertIsNone(ProgressData.result_from_key('some_random_key'))
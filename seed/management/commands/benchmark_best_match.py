@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""
+:copyright (c) 2014 - 2019, The Regents of the University of California, through Lawrence Berkeley National Laboratory (subject to receipt of any required approvals from the U.S. Department of Energy) and contributors. All rights reserved.  # NOQA
+:author
+
+Compare the time of matching the raw headers of a wide file against the columns of an organization
+with best_match and a MatchIndex against the previous implementation, which normalized and sorted
+all of the columns for every header. No database is used.
+"""
+from __future__ import unicode_literals
+
+import random
+import timeit
+from builtins import str
+from functools import cmp_to_key
+
+import jellyfish
+from django.core.management.base import BaseCommand
+
+from seed.lib.mcm.matchers import MatchIndex, best_match
+
+
+def sort_scores(a, b):
+    """
+    The sort of the previous best_match. It creates a bias around the use of PropertyState over
+    TaxLotState, since the tie-break compares 'table.category' and P is < T.
+    """
+    if a[2] > b[2]:
+        return -1
+    elif a[2] == b[2]:  # Sort by the strings if they match up
+        com_a = '.'.join(
+            a[0:2])  # so, 0:2 returns the first 2 elements, okay python, you win this time.
+        com_b = '.'.join(b[0:2])
+        if com_a > com_b:
+            return 1
+        else:
+            return -1
+    else:
+        return 1
+
+
+def reference_best_match(s, categories, top_n=5):
+    """The previous implementation of best_match, the matches must not change"""
+    scores = []
+    for cat in categories:
+        table_name = '_'
+        if isinstance(cat, tuple):
+            table_name = cat[0]
+            category = cat[1]
+        else:
+            category = cat
+
+        scores.append(
+            (
+                table_name,
+                category,
+                jellyfish.jaro_winkler(
+                    str(s.encode('ascii', 'replace').lower()),
+                    str(category.encode('ascii', 'replace').lower())
+                )
+            )
+        )
+
+    scores.sort()
+    scores = sorted(scores, key=cmp_to_key(sort_scores))
+    scores = scores[:top_n]
+    return [(score[0], score[1], int(score[2] * 100)) for score in scores]
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks best_match with a MatchIndex against the previous implementation'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--columns',
+                            default=2000,
+                            type=int,
+                            help='Number of columns in the organization',
+                            action='store')
+        parser.add_argument('--headers',
+                            default=20,
+                            type=int,
+                            help='Number of raw headers to match',
+                            action='store')
+
+    def handle(self, *args, **options):
+        random.seed(42)
+        categories = [
+            (random.choice(['PropertyState', 'TaxLotState']), 'Extra Data Column %s %s' % (i, random.random()))
+            for i in range(options['columns'])
+        ]
+        raw_columns = ['Raw Header %s' % i for i in range(options['headers'])]
+
+        def reference():
+            return [reference_best_match(raw_column, categories) for raw_column in raw_columns]
+
+        def current():
+            # the index is built once per mapping suggestions request
+            index = MatchIndex(categories)
+            return [best_match(raw_column, index) for raw_column in raw_columns]
+
+        for name, match in (('reference', reference), ('current', current)):
+            seconds = timeit.timeit(match, number=1)
+            self.stdout.write("%-9s %.2f ms per header" % (name, seconds / len(raw_columns) * 1e3))
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+:copyright (c) 2014 - 2019, The Regents of the University of California, through Lawrence Berkeley National Laboratory (subject to receipt of any required approvals from the U.S. Department of Energy) and contributors. All rights reserved.  # NOQA
+:author
+
+Compare the per-task overhead of celery pool processes that are replaced after every task
+(CELERY_WORKER_MAX_TASKS_PER_CHILD = 1) with long lived pool processes
+(SEED_CELERY_WARM_WORKERS=true).
+
+This process is set up like the main celery worker process: the task modules are imported and
+worker_init is sent, which runs preload_worker_modules and installs the celery Django fixup. A
+replaced pool process is measured as a fork of this process that runs the celery per-child init
+(process_initializer, which sends worker_process_init) and then the task body, until it exits.
+A long lived pool process runs the task body in this process. In both modes the task body opens
+a database connection, which is closed after the task like the celery Django fixup does. No
+broker is used.
+"""
+from __future__ import unicode_literals
+
+import multiprocessing
+import socket
+import timeit
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection
+
+
+def run_task_body():
+    """The work that every import chunk task does before its own queries"""
+    from quantityfield import ureg
+
+    from seed.data_importer.tasks import hash_state_object
+    from seed.models import PropertyState
+    from seed.utils.address import normalize_address_str
+
+    state = PropertyState(address_line_1='123 Main St', extra_data={'Site EUI': '100'})
+    normalize_address_str(state.address_line_1)
+    hash_state_object(state)
+    ureg.parse_expression('kBtu/ft**2/year')
+
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1')
+    # like the celery Django fixup after a task, close the connection unless CONN_MAX_AGE keeps it
+    close_old_connections()
+
+
+def run_in_pool_process(app, hostname):
+    """Run the celery per-child init and the task body, like a newly forked pool process"""
+    from celery.concurrency.prefork import process_initializer
+
+    process_initializer(app, hostname)
+    run_task_body()
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks the per-task overhead of recycled and warm celery worker processes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks',
+                            default=50,
+                            type=int,
+                            help='Number of tasks to time in each mode',
+                            action='store')
+
+    def handle(self, *args, **options):
+        from celery.signals import worker_init
+        from seed.celery import app
+
+        number = options['tasks']
+        hostname = 'benchmark@%s' % socket.gethostname()
+
+        # set up this process like the main worker process, before the pool processes are forked
+        app.loader.init_worker()
+        worker_init.send(sender=None)
+
+        context = multiprocessing.get_context('fork')
+
+        def run_in_recycled_process():
+            process = context.Process(target=run_in_pool_process, args=(app, hostname))
+            process.start()
+            process.join()
+            if process.exitcode:
+                raise CommandError('The pool process exited with %s' % process.exitcode)
+
+        recycled = timeit.timeit(run_in_recycled_process, number=number) / number
+        warm = timeit.timeit(run_task_body, number=number) / number
+
+        self.stdout.write("recycled worker process: %.2f ms per task" % (recycled * 1000))
+        self.stdout.write("warm worker process:     %.2f ms per task" % (warm * 1000))
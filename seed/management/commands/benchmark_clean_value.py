@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""
+:copyright (c) 2014 - 2019, The Regents of the University of California, through Lawrence Berkeley National Laboratory (subject to receipt of any required approvals from the U.S. Department of Energy) and contributors. All rights reserved.  # NOQA
+:author
+
+Compare the time of cleaning the cells of mapped rows with the compiled cleaners of
+Cleaner.clean_value against the previous implementation, which looked up the type of the column
+in every list for every cell. No database is used.
+"""
+from __future__ import unicode_literals
+
+import timeit
+
+from django.core.management.base import BaseCommand
+
+from seed.lib.mcm import cleaners
+
+
+def reference_clean_value(cleaner, value, column_name, is_extra_data=True):
+    """The previous Cleaner.clean_value, the compiled cleaners must return the same values"""
+    value = cleaners.default_cleaner(value)
+    if value is not None:
+        if column_name in cleaner.float_columns:
+            return cleaners.float_cleaner(value)
+
+        if column_name in cleaner.date_time_columns:
+            return cleaners.date_time_cleaner(value)
+
+        if column_name in cleaner.date_columns:
+            return cleaners.date_cleaner(value)
+
+        if column_name in cleaner.string_columns:
+            return str(value)
+
+        if column_name in cleaner.int_columns:
+            return cleaners.int_cleaner(value)
+
+        if not is_extra_data:
+            if column_name in cleaner.pint_column_map:
+                units = cleaner.pint_column_map[column_name]
+                return cleaners.pint_cleaner(value, units)
+
+    return value
+
+
+ONTOLOGY = {
+    'types': {
+        'float': 'float',
+        'date': 'date',
+        'datetime': 'datetime',
+        'string': 'string',
+        'integer': 'integer',
+        'area': ('quantity', 'ft**2'),
+    }
+}
+
+# one cell of each type, and one of a column that is not in the ontology
+ROW = [
+    ('float', '1,234.5'),
+    ('integer', '42'),
+    ('string', 'Office'),
+    ('date', '01/02/2018'),
+    ('datetime', '2018-01-02 03:04:05'),
+    ('area', '12,345'),
+    ('unknown', 'value'),
+]
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks Cleaner.clean_value against the previous implementation'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows',
+                            default=10000,
+                            type=int,
+                            help='Number of rows to clean',
+                            action='store')
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        cleaner = cleaners.Cleaner(ONTOLOGY)
+        reference = cleaners.Cleaner(ONTOLOGY)
+
+        def clean_rows(clean):
+            for _ in range(rows):
+                for column_name, value in ROW:
+                    clean(value, column_name, False)
+
+        for name, clean in (
+            ('reference', lambda *args: reference_clean_value(reference, *args)),
+            ('current', cleaner.clean_value),
+        ):
+            seconds = timeit.timeit(lambda: clean_rows(clean), number=1)
+            self.stdout.write("%-9s %.2f s per million cells" % (name, seconds / (rows * len(ROW)) * 1e6))
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+:copyright (c) 2014 - 2019, The Regents of the University of California, through Lawrence Berkeley National Laboratory (subject to receipt of any required approvals from the U.S. Department of Energy) and contributors. All rights reserved.  # NOQA
+:author
+
+Compare the time of partitioning property states into equivalence classes with the KeyIndex of
+calculate_equivalence_classes against the previous implementation, which compared every state
+against every existing class key. No database is used.
+"""
+from __future__ import unicode_literals
+
+import collections
+import random
+import timeit
+
+from django.core.management.base import BaseCommand
+
+from seed.data_importer.equivalence_partitioner import EquivalencePartitioner
+from seed.models import PropertyState
+
+
+def scan_equivalence_classes(partitioner, list_of_obj):
+    """The previous calculate_equivalence_classes, comparing each object against every class key"""
+    equivalence_classes = collections.defaultdict(list)
+    identities_for_equivalence = {}
+
+    for (ndx, obj) in enumerate(list_of_obj):
+        cmp_key = partitioner.calculate_comparison_key(obj)
+        identity_key = partitioner.calculate_identity_key(obj)
+
+        for class_key in equivalence_classes:
+            if partitioner.calculate_key_equivalence(class_key, cmp_key) and not \
+                partitioner.identities_are_different(identities_for_equivalence[class_key],
+                                                     identity_key):
+
+                equivalence_classes[class_key].append(ndx)
+
+                if partitioner.key_needs_merging(class_key, cmp_key):
+                    merged_key = partitioner.merge_keys(class_key, cmp_key)
+                    equivalence_classes[merged_key] = equivalence_classes.pop(class_key)
+                    identities_for_equivalence[merged_key] = identity_key
+                break
+        else:
+            can_key = partitioner.calculate_canonical_key(obj)
+            equivalence_classes[can_key].append(ndx)
+            identities_for_equivalence[can_key] = identity_key
+    return equivalence_classes
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks calculate_equivalence_classes against the previous full scan'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows',
+                            default=5000,
+                            type=int,
+                            help='Number of property states to partition',
+                            action='store')
+        parser.add_argument('--no-reference',
+                            default=False,
+                            help='Skip the previous implementation, which is quadratic in the rows',
+                            action='store_true')
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        rand = random.Random(1234)
+
+        def value(prefix, probability):
+            # draw from fewer values than there are states so that some of the states collide
+            if rand.random() < probability:
+                return '%s%s' % (prefix, rand.randrange(rows * 9 // 10 or 1))
+
+        states = [
+            PropertyState(ubid=value('u', 0.2), pm_property_id=value('p', 0.5),
+                          custom_id_1=value('c', 0.3), normalized_address=value('a', 0.9))
+            for _ in range(rows)
+        ]
+        partitioner = EquivalencePartitioner.make_propertystate_equivalence()
+
+        implementations = [('KeyIndex', partitioner.calculate_equivalence_classes)]
+        if not options['no_reference']:
+            implementations.insert(0, ('scan', lambda objs: scan_equivalence_classes(partitioner, objs)))
+
+        for name, partition in implementations:
+            start = timeit.default_timer()
+            classes = partition(states)
+            seconds = timeit.default_timer() - start
+            self.stdout.write("%-8s %.2f s for %s states, %s classes" % (name, seconds, rows, len(classes)))
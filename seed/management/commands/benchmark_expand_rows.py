@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+:copyright (c) 2014 - 2019, The Regents of the University of California, through Lawrence Berkeley National Laboratory (subject to receipt of any required approvals from the U.S. Department of Energy) and contributors. All rights reserved.  # NOQA
+:author
+
+Compare the time and peak memory of expanding wide rows with expand_rows against the
+previous implementation, which deep copied every row. No database is used.
+"""
+from __future__ import unicode_literals
+
+import copy
+import itertools
+import timeit
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+
+from seed.lib.mcm.mapper import expand_and_normalize_field, expand_rows
+
+
+def deepcopy_expand_rows(row, delimited_fields, expand_row):
+    """The previous implementation of expand_rows"""
+    copy_row = copy.deepcopy(row)
+    for d in delimited_fields:
+        if d in copy_row:
+            copy_row[d] = expand_and_normalize_field(copy_row[d], False)
+
+    if expand_row:
+        new_values = []
+        for d in delimited_fields:
+            fields = []
+            if d in copy_row:
+                for value in expand_and_normalize_field(copy_row[d], True):
+                    fields.append({d: value})
+                new_values.append(fields)
+
+        new_rows = []
+        for c in itertools.product(*new_values):
+            new_row = copy.deepcopy(copy_row)
+            for item in c:
+                for k, v in item.items():
+                    new_row[k] = v
+            new_rows.append(new_row)
+
+        return new_rows
+    else:
+        return [copy_row]
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks expand_rows on wide rows against the previous deep copying implementation'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows',
+                            default=100000,
+                            type=int,
+                            help='Number of rows to expand',
+                            action='store')
+        parser.add_argument('--columns',
+                            default=100,
+                            type=int,
+                            help='Number of columns in each row',
+                            action='store')
+        parser.add_argument('--delimited-every',
+                            default=10,
+                            type=int,
+                            help='Every nth row has a delimited jurisdiction tax lot id',
+                            action='store')
+
+    def handle(self, *args, **options):
+        delimited_fields = ['Jurisdiction Tax Lot ID']
+        rows = []
+        for i in range(options['rows']):
+            row = {'Column %s' % c: 'Value %s' % c for c in range(options['columns'])}
+            if i % options['delimited_every'] == 0:
+                row['Jurisdiction Tax Lot ID'] = '%s-1; %s-2' % (i, i)
+            rows.append(row)
+
+        for name, expand in (('deepcopy', deepcopy_expand_rows), ('expand_rows', expand_rows)):
+            def expand_all():
+                return [expand(row, delimited_fields, True) for row in rows]
+
+            # tracing slows down allocations, so time and measure the memory in separate runs
+            seconds = timeit.timeit(expand_all, number=1)
+            tracemalloc.start()
+            expand_all()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            self.stdout.write("%-11s %.2f s, peak %.1f MB" % (name, seconds, peak / 1e6))
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+:copyright (c) 2014 - 2019, The Regents of the University of California, through Lawrence Berkeley National Laboratory (subject to receipt of any required approvals from the U.S. Department of Energy) and contributors. All rights reserved.  # NOQA
+:author
+
+Compare the time of hashing states with hash_state_object against the previous implementation,
+which looked up the hashed fields for every state. No database is used.
+"""
+from __future__ import unicode_literals
+
+import datetime
+import hashlib
+import timeit
+from builtins import str
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone as tz
+from django.utils.timezone import make_naive
+from past.builtins import basestring
+from unidecode import unidecode
+
+from seed.data_importer.tasks import hash_state_object
+from seed.models import Column, PropertyState
+
+
+def reference_hash_state_object(obj, include_extra_data=True):
+    """The previous implementation of hash_state_object, the hashes must not change"""
+    def add_dictionary_repr_to_hash(hash_obj, dict_obj):
+        assert isinstance(dict_obj, dict)
+
+        for (key, value) in sorted(dict_obj.items(), key=lambda x_y: x_y[0]):
+            if isinstance(value, dict):
+                add_dictionary_repr_to_hash(hash_obj, value)
+            else:
+                hash_obj.update(str(unidecode(key)).encode('utf-8'))
+                if isinstance(value, basestring):
+                    hash_obj.update(unidecode(value).encode('utf-8'))
+                else:
+                    hash_obj.update(str(value).encode('utf-8'))
+        return hash_obj
+
+    def _get_field_from_obj(field_obj, field):
+        if not hasattr(field_obj, field):
+            return "FOO"
+        else:
+            return getattr(field_obj, field)
+
+    m = hashlib.md5()
+    for f in Column.retrieve_db_field_name_for_hash_comparison():
+        obj_val = _get_field_from_obj(obj, f)
+        m.update(f.encode('utf-8'))
+        if isinstance(obj_val, datetime.datetime):
+            m.update(str(make_naive(obj_val).astimezone(tz.utc).isoformat()).encode('utf-8'))
+        else:
+            m.update(str(obj_val).encode('utf-8'))
+
+    if include_extra_data:
+        add_dictionary_repr_to_hash(m, obj.extra_data)
+
+    return m.hexdigest()
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks hash_state_object against the previous implementation'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows',
+                            default=10000,
+                            type=int,
+                            help='Number of states to hash',
+                            action='store')
+        parser.add_argument('--extra-data',
+                            default=50,
+                            type=int,
+                            help='Number of extra data fields in each state',
+                            action='store')
+
+    def handle(self, *args, **options):
+        states = [
+            PropertyState(
+                address_line_1='%s Main St' % i,
+                site_eui=i,
+                extra_data={'Entry %s' % e: 'Value as string %s' % e for e in range(options['extra_data'])},
+            ) for i in range(options['rows'])
+        ]
+
+        for name, hash_state in (('reference', reference_hash_state_object), ('current', hash_state_object)):
+            seconds = timeit.timeit(lambda: [hash_state(state) for state in states], number=1)
+            self.stdout.write("%-9s %.1f us per state" % (name, seconds / len(states) * 1e6))
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""
+:copyright (c) 2014 - 2019, The Regents of the University of California, through Lawrence Berkeley National Laboratory (subject to receipt of any required approvals from the U.S. Department of Energy) and contributors. All rights reserved.  # NOQA
+:author
+
+Compare the time of converting states to dicts for an export with a compiled model to dict plan
+against the previous implementation, which checked every field of the model for every state. No
+database is used.
+"""
+from __future__ import unicode_literals
+
+import timeit
+from itertools import chain
+
+from django.core.management.base import BaseCommand
+from django.db import models
+from django.utils.timezone import make_naive
+
+from seed.models import Column, PropertyState, TaxLotProperty
+
+
+def reference_model_to_dict_with_mapping(instance, mappings, fields=None, exclude=None):
+    """The previous implementation of model_to_dict_with_mapping, the output must not change"""
+    opts = instance._meta
+    data = {}
+    for f in chain(opts.concrete_fields, opts.private_fields, opts.many_to_many):
+        if not getattr(f, 'editable', False):
+            continue
+        if fields is not None and f.name not in fields:
+            continue
+        if exclude and f.name in exclude:
+            continue
+        if f.name in Column.EXCLUDED_COLUMN_RETURN_FIELDS:
+            continue
+
+        if f.name in ['recent_sale_date', 'release_date', 'generation_date', 'analysis_start_time',
+                      'analysis_end_time']:
+            value = f.value_from_object(instance)
+            if value:
+                value = make_naive(value).isoformat()
+        else:
+            value = f.value_from_object(instance)
+
+        if f.name in mappings:
+            data[mappings[f.name]] = value
+        else:
+            data[f.name] = value
+
+        if isinstance(f, models.ManyToManyField):
+            data[f.name] = list(data[f.name])
+    return data
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks the compiled model to dict plan against the previous implementation'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows',
+                            default=10000,
+                            type=int,
+                            help='Number of states to convert',
+                            action='store')
+
+    def handle(self, *args, **options):
+        # a profile that shows every column of the state
+        mappings = {f.name: 'Mapped %s' % f.name for f in PropertyState._meta.fields}
+        fields = list(mappings.keys())
+        states = [
+            PropertyState(address_line_1='%s Main St' % i, site_eui=i, extra_data={'Entry': i})
+            for i in range(options['rows'])
+        ]
+
+        def reference():
+            return [reference_model_to_dict_with_mapping(state, mappings, fields=fields) for state in states]
+
+        def current():
+            # the plan is compiled once per export
+            plan = TaxLotProperty.model_to_dict_plan(PropertyState, mappings, fields=fields)
+            return [TaxLotProperty.plan_to_dict(state, plan) for state in states]
+
+        for name, convert in (('reference', reference), ('current', current)):
+            seconds = timeit.timeit(convert, number=1)
+            self.stdout.write("%-9s %.1f us per state" % (name, seconds / len(states) * 1e6))
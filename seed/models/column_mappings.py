@@ -6,8 +6,10 @@
 """
 
 import logging
+from collections import OrderedDict
 
 from django.db import models
+from django.db.models.signals import m2m_changed, post_delete, post_save
 from django.utils.translation import ugettext_lazy as _
 
 from seed.landing.models import SEEDUser as User
@@ -15,6 +17,12 @@ from seed.lib.superperms.orgs.models import Organization as SuperOrganization
 from seed.models.models import (
     SEED_DATA_SOURCES,
 )
+from seed.utils.cache import (
+    bump_version_on_commit,
+    get_cache_raw,
+    set_cache_raw,
+    versioned_cache_key,
+)
 
 # This is the inverse mapping of the property and tax lots that are prepended to the fields
 # for the other table.
@@ -38,6 +46,38 @@ INVENTORY_DISPLAY = {
 }
 _log = logging.getLogger(__name__)
 
+# how long the data computed from the columns of an organization is cached for one column version
+COLUMN_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def column_version_cache_key(organization_id):
+    """Key of the version of the columns and column mappings of the organization"""
+    return 'column_version__%s' % organization_id
+
+
+def invalidate_column_cache(sender, instance, **kwargs):
+    """
+    Signal receiver that bumps the column version of the organization of the saved or deleted
+    Column or ColumnMapping, which drops everything that was cached for the previous version.
+    The version is bumped when the transaction commits.
+    """
+    if kwargs.get('action', 'post_').startswith('pre_'):
+        return
+
+    if isinstance(instance, ColumnMapping):
+        organization_ids = set([instance.super_organization_id])
+        if kwargs.get('pk_set') and not instance.super_organization_id:
+            # the mapping has no organization, but it still changes which of the columns are used
+            organization_ids.update(kwargs['model'].objects.filter(
+                pk__in=kwargs['pk_set']
+            ).values_list('organization_id', flat=True))
+    else:
+        organization_ids = set([instance.organization_id])
+
+    for organization_id in organization_ids:
+        if organization_id:
+            bump_version_on_commit(column_version_cache_key(organization_id))
+
 
 def get_table_and_column_names(column_mapping, attr_name='column_raw'):
     """Turns the Column.column_names into a serializable list of str."""
@@ -106,6 +146,59 @@ def get_column_mapping(raw_column, organization, attr_name='column_mapped'):
     return column_names[0], column_names[1], 100
 
 
+def get_column_mapping_lookup(organization):
+    """Load all of the previous mappings of the organization at once for build_column_mapping
+
+    The lookup gives the same result as get_column_mapping for a raw column name, with two
+    exceptions. A raw column that has more than one mapping still has its mappings deleted and
+    gives None, but the deletion happens when the raw column is looked up. A mapping that is not
+    direct (a concatenation) gives None instead of raising.
+
+    :param organization: Organization inst.
+    :returns: callable, with the result of get_column_mapping for a raw column name.
+    """
+    rows = ColumnMapping.objects.filter(super_organization=organization).values_list(
+        'id', 'column_raw__id', 'column_raw__organization_id', 'column_raw__column_name',
+        'column_mapped__id', 'column_mapped__table_name', 'column_mapped__column_name',
+    )
+
+    # the raw and mapped columns of each mapping, and the mappings of each raw column name
+    raw_columns = {}
+    mapped_columns = {}
+    mapping_ids = {}
+    for mapping_id, raw_id, raw_organization_id, raw_name, mapped_id, mapped_table, mapped_name in rows:
+        raw_columns.setdefault(mapping_id, set())
+        mapped_columns.setdefault(mapping_id, {})
+        if raw_id is not None:
+            raw_columns[mapping_id].add(raw_id)
+            if raw_organization_id == organization.id:
+                mapping_ids.setdefault(raw_name, set()).add(mapping_id)
+        if mapped_id is not None:
+            mapped_columns[mapping_id][mapped_id] = (mapped_table, mapped_name)
+
+    def previous_mapping(raw_column):
+        ids = mapping_ids.get(raw_column)
+        if not ids:
+            return None
+
+        if len(ids) > 1:
+            _log.debug("More than one ColumnMapping in get_column_mapping_lookup")
+            # delete the duplicates and let the system re-attempt the match, like get_column_mapping
+            ColumnMapping.objects.filter(id__in=ids).delete()
+            mapping_ids.pop(raw_column)
+            return None
+
+        mapping_id = next(iter(ids))
+        if len(raw_columns[mapping_id]) != 1 or len(mapped_columns[mapping_id]) != 1:
+            # not a direct mapping
+            return None
+
+        mapped = list(mapped_columns[mapping_id].values())[0]
+        return mapped[0], mapped[1], 100
+
+    return previous_mapping
+
+
 class ColumnMapping(models.Model):
     """Stores previous user-defined column mapping.
 
@@ -197,35 +290,57 @@ class ColumnMapping(models.Model):
                 'address': ('TaxLotState', 'address', 'DisplayName', True)
             }
 
+        The mappings are cached until a Column or ColumnMapping of the organization changes.
+
         :param organization: instance, Organization.
         :returns: dict, list of dict.
         """
-        column_mappings = ColumnMapping.objects.filter(super_organization=organization)
+        cache_key = versioned_cache_key(
+            column_version_cache_key(organization.id), 'column_mappings__%s' % organization.id
+        )
+        mapping = get_cache_raw(cache_key) if cache_key else None
+        if mapping is not None:
+            return mapping, []
+
+        # One row for each raw and mapped column pair of each column_mapping. The column_mapping is
+        # a pointer to a raw column and a mapped column. See the method documentation to understand
+        # the result.
+        fields = ['table_name', 'column_name', 'display_name', 'is_extra_data']
+        rows = ColumnMapping.objects.filter(super_organization=organization).order_by('id').values_list(
+            'id',
+            'column_raw__id', *(['column_raw__%s' % f for f in fields] +
+                                ['column_mapped__id'] +
+                                ['column_mapped__%s' % f for f in fields])
+        )
+
+        column_mappings = OrderedDict()
+        for row in rows:
+            raw_columns, mapped_columns = column_mappings.setdefault(row[0], ({}, {}))
+            if row[1] is not None:
+                raw_columns[row[1]] = row[2:6]
+            if row[6] is not None:
+                mapped_columns[row[6]] = row[7:11]
+
         mapping = {}
-        for cm in column_mappings:
-            # Iterate over the column_mappings. The column_mapping is a pointer to a raw column and a mapped column.
-            # See the method documentation to understand the result.
-            if not cm.column_mapped.all().exists():
+        for raw_columns, mapped_columns in column_mappings.values():
+            if not mapped_columns:
                 continue
 
-            key = cm.column_raw.all().values_list('table_name', 'column_name', 'display_name',
-                                                  'is_extra_data')
-            value = cm.column_mapped.all().values_list('table_name', 'column_name', 'display_name',
-                                                       'is_extra_data')
-
-            if len(key) != 1:
+            if len(raw_columns) != 1:
                 raise Exception("There is either none or more than one mapping raw column")
 
-            if len(value) != 1:
+            if len(mapped_columns) != 1:
                 raise Exception("There is either none or more than one mapping dest column")
 
-            key = key[0]
-            value = value[0]
+            key = list(raw_columns.values())[0]
+            value = list(mapped_columns.values())[0]
 
             # These should be lists of one element each.
             mapping[key[1]] = value
 
         # _log.debug("Mappings from get_column_mappings is: {}".format(mapping))
+        if cache_key:
+            set_cache_raw(cache_key, mapping, COLUMN_CACHE_TIMEOUT)
         return mapping, []
 
     @staticmethod
@@ -279,3 +394,9 @@ class ColumnMapping(models.Model):
         """
         count, _ = ColumnMapping.objects.filter(super_organization=organization).delete()
         return count
+
+
+post_save.connect(invalidate_column_cache, sender=ColumnMapping)
+post_delete.connect(invalidate_column_cache, sender=ColumnMapping)
+m2m_changed.connect(invalidate_column_cache, sender=ColumnMapping.column_raw.through)
+m2m_changed.connect(invalidate_column_cache, sender=ColumnMapping.column_mapped.through)
@@ -15,12 +15,18 @@ from django.apps import apps
 from django.core.exceptions import ValidationError
 from django.db import models
 from django.db.models import Q
-from django.db.models.signals import pre_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.utils.translation import ugettext_lazy as _
 
 from seed.lib.superperms.orgs.models import Organization as SuperOrganization
-from seed.models.column_mappings import ColumnMapping
+from seed.models.column_mappings import (
+    COLUMN_CACHE_TIMEOUT,
+    ColumnMapping,
+    column_version_cache_key,
+    invalidate_column_cache,
+)
 from seed.models.models import Unit
+from seed.utils.cache import get_cache_raw, set_cache_raw, versioned_cache_key
 
 INVENTORY_DISPLAY = {
     'PropertyState': 'Property',
@@ -31,6 +37,19 @@ INVENTORY_DISPLAY = {
 _log = logging.getLogger(__name__)
 
 
+def _columns_cache_key(org_id, *args):
+    """
+    Key of data computed from the columns of the organization. The key changes with the column
+    version, which is bumped whenever a Column or ColumnMapping of the organization changes. None
+    while the current transaction has uncommitted changes to the columns.
+    """
+    org_id = getattr(org_id, 'pk', org_id)
+    return versioned_cache_key(
+        column_version_cache_key(org_id),
+        'columns__%s__%s' % (org_id, '__'.join(str(arg) for arg in args))
+    )
+
+
 class Column(models.Model):
     """The name of a column for a given organization."""
     SHARED_NONE = 0
@@ -1049,7 +1068,7 @@ class Column(models.Model):
         from seed.serializers.columns import ColumnSerializer
 
         columns_db = Column.objects.filter(organization_id=org_id).exclude(table_name='').exclude(
-            table_name=None)
+            table_name=None).select_related('unit')
         columns = []
         for c in columns_db:
             if c.column_name in Column.COLUMN_EXCLUDE_FIELDS or c.column_name in Column.EXCLUDED_MAPPING_FIELDS:
@@ -1098,13 +1117,29 @@ class Column(models.Model):
 
         :return: dict
         """
+        cache_key = _columns_cache_key(org_id, 'all', inventory_type, only_used)
+        columns = get_cache_raw(cache_key) if cache_key else None
+        if columns is None:
+            columns = Column._retrieve_all(org_id, inventory_type, only_used)
+            if cache_key:
+                set_cache_raw(cache_key, columns, COLUMN_CACHE_TIMEOUT)
+        return columns
+
+    @staticmethod
+    def _retrieve_all(org_id, inventory_type, only_used):
+        """Retrieve all the columns for an organization without the cache, see retrieve_all"""
         from seed.serializers.columns import ColumnSerializer
 
         # Grab all the columns out of the database for the organization that are assigned to a
         # table_name. Order extra_data last so that extra data duplicate-checking will happen after
         # processing standard columns
         columns_db = Column.objects.filter(organization_id=org_id).exclude(table_name='').exclude(
-            table_name=None).order_by('is_extra_data', 'column_name')
+            table_name=None).select_related('unit').order_by('is_extra_data', 'column_name')
+        if only_used:
+            # the columns that are in a ColumnMapping object
+            used_ids = set(Column.objects.filter(
+                organization_id=org_id, mapped_mappings__isnull=False
+            ).values_list('id', flat=True))
         columns = []
         for c in columns_db:
             if c.column_name in Column.EXCLUDED_COLUMN_RETURN_FIELDS:
@@ -1135,7 +1170,7 @@ class Column(models.Model):
 
             # only add the column if it is in a ColumnMapping object
             if only_used:
-                if ColumnMapping.objects.filter(column_mapped=c).exists():
+                if c.id in used_ids:
                     columns.append(new_c)
             else:
                 columns.append(new_c)
@@ -1178,6 +1213,11 @@ class Column(models.Model):
         :param org_id: organization with the columns
         :return: dict
         """
+        cache_key = _columns_cache_key(org_id, 'priorities')
+        priorities = get_cache_raw(cache_key) if cache_key else None
+        if priorities is not None:
+            return priorities
+
         columns = Column.retrieve_all(org_id, 'property', False)
         # The TaxLot and Property are not used in merging, they are just here to prevent errors
         priorities = {
@@ -1194,6 +1234,8 @@ class Column(models.Model):
             else:
                 priorities[tn][cn] = column.get('merge_protection', 'Favor New')
 
+        if cache_key:
+            set_cache_raw(cache_key, priorities, COLUMN_CACHE_TIMEOUT)
         return priorities
 
     @staticmethod
@@ -1231,3 +1273,5 @@ def validate_model(sender, **kwargs):
 
 
 pre_save.connect(validate_model, sender=Column)
+post_save.connect(invalidate_column_cache, sender=Column)
+post_delete.connect(invalidate_column_cache, sender=Column)
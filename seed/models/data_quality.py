@@ -7,13 +7,14 @@
 import json
 import logging
 import re
+from collections import OrderedDict
 from datetime import date, datetime
 from random import randint
 
 import pytz
 from builtins import str
 from django.apps import apps
-from django.db import models
+from django.db import IntegrityError, models, transaction
 from django.utils.timezone import get_current_timezone, make_aware, make_naive
 from past.builtins import basestring
 from quantityfield import ureg
@@ -28,7 +29,7 @@ from seed.models import (
 from seed.models import obj_to_dict
 from seed.serializers.pint import pretty_units
 from seed.utils.cache import (
-    set_cache_raw, get_cache_raw
+    set_cache_raw, get_cache_raw, get_many_cache_raw, incr_or_add_cache_raw
 )
 from seed.utils.time import convert_datestr
 
@@ -322,6 +323,46 @@ class Rule(models.Model):
 
         return True
 
+    def _typed_bound(self, bound, value):
+        """
+        Return the min or max of the rule typed to compare against the value. Parsing the bounds
+        (dates and pint units) is the expensive part of checking a value, so the typed bounds are
+        computed once per rule and type of value.
+
+        :param bound: float, self.min or self.max
+        :param value: Value to validate rule against
+        :return: tuple, (the typed value, the typed bound)
+        """
+        if isinstance(value, datetime):
+            value = value.astimezone(get_current_timezone()).replace(tzinfo=pytz.UTC)
+            kind = 'datetime'
+        elif isinstance(value, date):
+            kind = 'date'
+        elif isinstance(value, int):
+            kind = 'int'
+        elif isinstance(value, ureg.Quantity):
+            kind = 'quantity'
+        elif not isinstance(value, basestring):
+            # must be a float...
+            return float(value), bound
+        else:
+            return value, bound
+
+        key = (kind, bound, self.units)
+        typed_bounds = self.__dict__.setdefault('_typed_bounds', {})
+        if key not in typed_bounds:
+            if kind == 'datetime':
+                typed_bounds[key] = make_aware(datetime.strptime(str(int(bound)), '%Y%m%d'),
+                                               pytz.UTC)
+            elif kind == 'date':
+                typed_bounds[key] = datetime.strptime(str(int(bound)), '%Y%m%d').date()
+            elif kind == 'int':
+                typed_bounds[key] = int(bound)
+            else:
+                typed_bounds[key] = bound * ureg(self.units)
+
+        return value, typed_bounds[key]
+
     def minimum_valid(self, value):
         """
         Validate that the value is not less than the minimum specified by the rule.
@@ -330,23 +371,10 @@ class Rule(models.Model):
         :return: bool, True is valid, False if the value is out of range
         """
         # Convert the rule into the correct types for checking the data
-        rule_min = self.min
-        if rule_min is None:
+        if self.min is None:
             return True
         else:
-            if isinstance(value, datetime):
-                value = value.astimezone(get_current_timezone()).replace(tzinfo=pytz.UTC)
-                rule_min = make_aware(datetime.strptime(str(int(rule_min)), '%Y%m%d'), pytz.UTC)
-            elif isinstance(value, date):
-                value = value
-                rule_min = datetime.strptime(str(int(rule_min)), '%Y%m%d').date()
-            elif isinstance(value, int):
-                rule_min = int(rule_min)
-            elif isinstance(value, ureg.Quantity):
-                rule_min = rule_min * ureg(self.units)
-            elif not isinstance(value, basestring):
-                # must be a float...
-                value = float(value)
+            value, rule_min = self._typed_bound(self.min, value)
 
             try:
                 if value < rule_min:
@@ -365,23 +393,10 @@ class Rule(models.Model):
         :return: bool, True is valid, False if the value is out of range
         """
         # Convert the rule into the correct types for checking the data
-        rule_max = self.max
-        if rule_max is None:
+        if self.max is None:
             return True
         else:
-            if isinstance(value, datetime):
-                value = value.astimezone(get_current_timezone()).replace(tzinfo=pytz.UTC)
-                rule_max = make_aware(datetime.strptime(str(int(rule_max)), '%Y%m%d'), pytz.UTC)
-            elif isinstance(value, date):
-                value = value
-                rule_max = datetime.strptime(str(int(rule_max)), '%Y%m%d').date()
-            elif isinstance(value, int):
-                rule_max = int(rule_max)
-            elif isinstance(value, ureg.Quantity):
-                rule_max = rule_max * ureg(self.units)
-            elif not isinstance(value, basestring):
-                # must be a float...
-                value = float(value)
+            value, rule_max = self._typed_bound(self.max, value)
 
             try:
                 if value > rule_max:
@@ -525,6 +540,13 @@ class DataQualityCheck(models.Model):
         # set in check_data
         self.column_lookup = {}
 
+        # the property/taxlot ids linked to the rows and their status labels, loaded for all of
+        # the rows in check_data. The status label changes are collected while checking and saved
+        # at the end of check_data.
+        self.linked_ids = {}
+        self.linked_label_ids = {}
+        self.status_label_changes = OrderedDict()
+
         super(DataQualityCheck, self).__init__(*args, **kwargs)
 
     @staticmethod
@@ -544,6 +566,7 @@ class DataQualityCheck(models.Model):
             identifier = randint(100, 100000)
         cache_key = DataQualityCheck.cache_key(identifier)
         set_cache_raw(cache_key, [])
+        set_cache_raw(DataQualityCheck.chunk_count_cache_key(identifier), 0, 86400)
         return cache_key, identifier
 
     @staticmethod
@@ -556,6 +579,28 @@ class DataQualityCheck(models.Model):
         """
         return "data_quality_results__%s" % identifier
 
+    @staticmethod
+    def chunk_count_cache_key(identifier):
+        """
+        Return the location of the number of chunks of results that have been saved with
+        save_to_cache.
+
+        :param identifier: Import file primary key
+        :return: str
+        """
+        return "data_quality_results__%s__chunks" % identifier
+
+    @staticmethod
+    def chunk_cache_key(identifier, chunk):
+        """
+        Return the location of one chunk of results that was saved with save_to_cache.
+
+        :param identifier: Import file primary key
+        :param chunk: int, number of the chunk, starting at 1
+        :return: str
+        """
+        return "data_quality_results__%s__%s" % (identifier, chunk)
+
     def check_data(self, record_type, rows):
         """
         Send in data as a queryset from the Property/Taxlot ids.
@@ -569,12 +614,18 @@ class DataQualityCheck(models.Model):
         for c in Column.retrieve_all(self.organization, record_type, False):
             self.column_lookup[(c['table_name'], c['column_name'])] = c['display_name']
 
-        # grab all the rules once, save query time
-        rules = self.rules.filter(enabled=True, table_name=record_type).order_by('field',
-                                                                                 'severity')
+        # grab all the rules once, save query time. The same rule instances are used for every
+        # row so that their typed min/max bounds are only computed once.
+        rules = list(self.rules.filter(enabled=True, table_name=record_type).order_by('field',
+                                                                                      'severity'))
 
         # Get the list of the field names that will show in every result
         fields = self.get_fieldnames(record_type)
+
+        # load the linked properties/taxlots and their labels for all the rows at once
+        rows = list(rows)
+        label_class, linked_field, existing_labels = self._load_status_labels(record_type, rows)
+
         for row in rows:
             # Initialize the ID if it does not exist yet. Add in the other
             # fields that are of interest to the GUI
@@ -587,6 +638,8 @@ class DataQualityCheck(models.Model):
             # Run the checks
             self._check(rules, row)
 
+        self._save_status_label_changes(label_class, linked_field, existing_labels)
+
         # Prune the results will remove any entries that have zero data_quality_results
         for k, v in self.results.copy().items():
             if not v['data_quality_results']:
@@ -611,26 +664,11 @@ class DataQualityCheck(models.Model):
         """
         # check if the row has any rules applied to it
         model_labels = {'linked_id': None, 'label_ids': []}
-        if row.__class__.__name__ == 'PropertyState':
-            label = apps.get_model('seed', 'Property_labels')
-            if PropertyView.objects.filter(state=row).exists():
-                model_labels['linked_id'] = PropertyView.objects.get(state=row).property_id
-                model_labels['label_ids'] = list(
-                    label.objects.filter(property_id=model_labels['linked_id']).values_list(
-                        'statuslabel_id', flat=True)
-                )
-                # _log.debug("Property {} has {} labels".format(model_labels['linked_id'],
-                #                                               len(model_labels['label_ids'])))
-        elif row.__class__.__name__ == 'TaxLotState':
-            label = apps.get_model('seed', 'TaxLot_labels')
-            if TaxLotView.objects.filter(state=row).exists():
-                model_labels['linked_id'] = TaxLotView.objects.get(state=row).taxlot_id
-                model_labels['label_ids'] = list(
-                    label.objects.filter(taxlot_id=model_labels['linked_id']).values_list(
-                        'statuslabel_id', flat=True)
-                )
-                # _log.debug("TaxLot {} has {} labels".format(model_labels['linked_id'],
-                #                                             len(model_labels['label_ids'])))
+        if row.id in self.linked_ids:
+            model_labels['linked_id'] = self.linked_ids[row.id]
+            model_labels['label_ids'] = list(
+                self.linked_label_ids.get(model_labels['linked_id'], [])
+            )
 
         for rule in rules:
             # check if the field exists
@@ -660,24 +698,24 @@ class DataQualityCheck(models.Model):
                     # field that wasn't mapped
                     if rule.required:
                         self.add_result_missing_req(row.id, rule, display_name, value)
-                        label_applied = self.update_status_label(label, rule, linked_id)
+                        label_applied = self.update_status_label(rule, linked_id)
                 elif value is None or value == '':
                     # Empty fields
                     if rule.required:
                         self.add_result_missing_and_none(row.id, rule, display_name, value)
-                        label_applied = self.update_status_label(label, rule, linked_id)
+                        label_applied = self.update_status_label(rule, linked_id)
                     elif rule.not_null:
                         self.add_result_is_null(row.id, rule, display_name, value)
-                        label_applied = self.update_status_label(label, rule, linked_id)
+                        label_applied = self.update_status_label(rule, linked_id)
                 elif not rule.valid_text(value):
                     self.add_result_string_error(row.id, rule, display_name, value)
-                    label_applied = self.update_status_label(label, rule, linked_id)
+                    label_applied = self.update_status_label(rule, linked_id)
                 else:
                     try:
                         if not rule.minimum_valid(value):
                             s_min, s_max, s_value = rule.format_strings(value)
                             self.add_result_min_error(row.id, rule, display_name, s_value, s_min)
-                            label_applied = self.update_status_label(label, rule, linked_id)
+                            label_applied = self.update_status_label(rule, linked_id)
                     except ComparisonError:
                         s_min, s_max, s_value = rule.format_strings(value)
                         self.add_result_comparison_error(row.id, rule, display_name, s_value, s_min)
@@ -687,14 +725,14 @@ class DataQualityCheck(models.Model):
                         if not rule.maximum_valid(value):
                             s_min, s_max, s_value = rule.format_strings(value)
                             self.add_result_max_error(row.id, rule, display_name, s_value, s_max)
-                            label_applied = self.update_status_label(label, rule, linked_id)
+                            label_applied = self.update_status_label(rule, linked_id)
                     except ComparisonError:
                         s_min, s_max, s_value = rule.format_strings(value)
                         self.add_result_comparison_error(row.id, rule, display_name, s_value, s_max)
                         continue
 
                 if not label_applied and rule.status_label_id in model_labels['label_ids']:
-                    self.remove_status_label(label, rule, linked_id)
+                    self.remove_status_label(rule, linked_id)
 
     def save_to_cache(self, identifier):
         """
@@ -703,22 +741,38 @@ class DataQualityCheck(models.Model):
         a dict of dict. This is important to remember because the data from the
         cache cannot be simply loaded into the above structure.
 
+        The check_data_chunk tasks run in parallel, so each call stores its results under its
+        own key, numbered with an atomic counter. The chunks are merged into the cache_key once,
+        by merge_cached_results, when all the chunks are done.
+
         :param identifier: Import file primary key
         :return: None
         """
+        results = list(self.results.values())
+
+        count_key = DataQualityCheck.chunk_count_cache_key(identifier)
+        chunk = incr_or_add_cache_raw(count_key, 86400)
 
-        # change the format of the data in the cache. Make this a list of
-        # objects instead of object of objects.
-        existing_results = get_cache_raw(DataQualityCheck.cache_key(identifier)) or []
+        set_cache_raw(DataQualityCheck.chunk_cache_key(identifier, chunk), results, 86400)
 
-        results = []
-        for key, value in self.results.items():
-            results.append(value)
+    @staticmethod
+    def merge_cached_results(identifier):
+        """
+        Merge the chunks of results saved by save_to_cache into the list of results, sorted by id,
+        that is stored in the cache_key.
 
-        existing_results += results
+        :param identifier: Import file primary key
+        :return: list, the results
+        """
+        count = get_cache_raw(DataQualityCheck.chunk_count_cache_key(identifier)) or 0
+        chunks = get_many_cache_raw(
+            [DataQualityCheck.chunk_cache_key(identifier, chunk) for chunk in range(1, count + 1)]
+        )
 
-        z = sorted(existing_results, key=lambda k: k['id'])
-        set_cache_raw(DataQualityCheck.cache_key(identifier), z, 86400)  # 24 hours
+        results = [result for chunk_results in chunks.values() for result in chunk_results]
+        results.sort(key=lambda k: k['id'])
+        set_cache_raw(DataQualityCheck.cache_key(identifier), results, 86400)  # 24 hours
+        return results
 
     def initialize_rules(self):
         """
@@ -872,40 +926,106 @@ class DataQualityCheck(models.Model):
             'severity': rule.get_severity_display(),
         })
 
-    def update_status_label(self, label_class, rule, linked_id):
+    def _load_status_labels(self, record_type, rows):
         """
+        Load the ids of the properties/taxlots linked to the rows and their status labels with one
+        query each.
+
+        :param record_type: one of PropertyState | TaxLotState
+        :param rows: list, PropertyStates or TaxLotStates
+        :return: tuple, (label class, name of the linked id field, dict of the existing labels
+            {(linked_id, statuslabel_id): label id})
+        """
+        if record_type == 'PropertyState':
+            view_class = PropertyView
+            label_class = apps.get_model('seed', 'Property_labels')
+            linked_field = 'property_id'
+        else:
+            view_class = TaxLotView
+            label_class = apps.get_model('seed', 'TaxLot_labels')
+            linked_field = 'taxlot_id'
+
+        self.linked_ids = dict(
+            view_class.objects.filter(state_id__in=[row.id for row in rows]).values_list(
+                'state_id', linked_field)
+        )
+
+        self.linked_label_ids = {}
+        self.status_label_changes = OrderedDict()
+        existing_labels = {}
+        if self.linked_ids:
+            labels = label_class.objects.filter(
+                **{linked_field + '__in': set(self.linked_ids.values())}
+            ).values_list('id', linked_field, 'statuslabel_id')
+            for label_id, linked_id, status_label_id in labels:
+                self.linked_label_ids.setdefault(linked_id, set()).add(status_label_id)
+                existing_labels[(linked_id, status_label_id)] = label_id
+
+        return label_class, linked_field, existing_labels
+
+    def _save_status_label_changes(self, label_class, linked_field, existing_labels):
+        """
+        Save the status labels that were added and removed while checking the rows, with one
+        bulk_create and one delete. The last change to a label wins, as if the changes were saved
+        one at a time.
 
         :param label_class: statuslabel object, either property label or taxlot label
+        :param linked_field: str, property_id or taxlot_id
+        :param existing_labels: dict, {(linked_id, statuslabel_id): label id}
+        :return: None
+        """
+        new_labels = []
+        removed_label_ids = []
+        for key, add in self.status_label_changes.items():
+            if add and key not in existing_labels:
+                new_labels.append(label_class(**{linked_field: key[0], 'statuslabel_id': key[1]}))
+            elif not add and key in existing_labels:
+                removed_label_ids.append(existing_labels[key])
+
+        if new_labels:
+            try:
+                with transaction.atomic():
+                    label_class.objects.bulk_create(new_labels)
+            except IntegrityError:
+                # another chunk labeled the same record in the meantime
+                for label in new_labels:
+                    label_class.objects.get_or_create(**{
+                        linked_field: getattr(label, linked_field),
+                        'statuslabel_id': label.statuslabel_id,
+                    })
+
+        if removed_label_ids:
+            label_class.objects.filter(id__in=removed_label_ids).delete()
+
+        self.status_label_changes = OrderedDict()
+
+    def update_status_label(self, rule, linked_id):
+        """
+        Add the status label of the rule to the linked property or taxlot. The change is saved at
+        the end of check_data.
+
         :param rule: rule object
-        :param linked_id: id of propertystate or taxlotstate object
+        :param linked_id: id of the property or taxlot linked to the checked state
         :return: boolean, if labeled was applied
         """
 
         if rule.status_label_id is not None and linked_id is not None:
-            if rule.table_name == 'PropertyState':
-                label_class.objects.get_or_create(property_id=linked_id,
-                                                  statuslabel_id=rule.status_label_id)
-            else:
-                label_class.objects.get_or_create(taxlot_id=linked_id,
-                                                  statuslabel_id=rule.status_label_id)
+            self.status_label_changes[(linked_id, rule.status_label_id)] = True
+            self.linked_label_ids.setdefault(linked_id, set()).add(rule.status_label_id)
             return True
 
-    def remove_status_label(self, label_class, rule, linked_id):
+    def remove_status_label(self, rule, linked_id):
         """
-        Remove label because it did not match any of the range exceptions
+        Remove label because it did not match any of the range exceptions. The change is saved at
+        the end of check_data.
 
-        :param label_class: statuslabel object, either property label or taxlot label
         :param rule: rule object
-        :param linked_id: id of propertystate or taxlotstate object
-        :return: boolean, if labeled was applied
+        :param linked_id: id of the property or taxlot linked to the checked state
+        :return: None
         """
 
-        if rule.table_name == 'PropertyState':
-            label_class.objects.filter(property_id=linked_id,
-                                       statuslabel_id=rule.status_label_id).delete()
-        else:
-            label_class.objects.filter(taxlot_id=linked_id,
-                                       statuslabel_id=rule.status_label_id).delete()
+        self.status_label_changes[(linked_id, rule.status_label_id)] = False
+        self.linked_label_ids.get(linked_id, set()).discard(rule.status_label_id)
 
     def retrieve_result_by_address(self, address):
         """
@@ -17,7 +17,7 @@ from django.contrib.postgres.fields import JSONField
 from django.contrib.gis.db import models as geomodels
 from django.db import IntegrityError
 from django.db import models
-from django.db.models.signals import pre_delete, pre_save, post_save
+from django.db.models.signals import pre_delete, pre_save, post_delete, post_save
 from django.dispatch import receiver
 from django.forms.models import model_to_dict
 from quantityfield.fields import QuantityField
@@ -38,8 +38,8 @@ from seed.models import (
     MERGE_STATE_UNKNOWN,
     TaxLotProperty
 )
-from seed.utils.address import normalize_address_str
 from seed.utils.generic import split_model_fields, obj_to_dict
+from seed.utils.pagination import invalidate_view_count
 from seed.utils.time import convert_datestr
 from seed.utils.time import convert_to_js_timestamp
 
@@ -329,15 +329,10 @@ class PropertyState(models.Model):
         return d
 
     def save(self, *args, **kwargs):
-        # Calculate and save the normalized address
-        if self.address_line_1 is not None:
-            self.normalized_address = normalize_address_str(self.address_line_1)
-        else:
-            self.normalized_address = None
-
-        # save a hash of the object to the database for quick lookup
-        from seed.data_importer.tasks import hash_state_object
-        self.hash_object = hash_state_object(self)
+        # Calculate and save the normalized address and a hash of the object to the database
+        # for quick lookup
+        from seed.data_importer.tasks import set_state_derived_fields
+        set_state_derived_fields([self])
 
         return super(PropertyState, self).save(*args, **kwargs)
 
@@ -561,6 +556,26 @@ class PropertyState(models.Model):
 
         return coparents, len(coparents)
 
+    @classmethod
+    def state_ids_with_relationships(cls, state_ids):
+        """
+        Return the ids of the states that have any of the relationships copied by
+        merge_relationships. This allows skipping merge_relationships (several queries per merge)
+        for the states that have nothing to copy.
+
+        :param state_ids: list, PropertyState ids
+        :return: set, PropertyState ids
+        """
+        result = set()
+        for model_name in ('Scenario', 'BuildingFile', 'Simulation', 'PropertyMeasure'):
+            result.update(
+                apps.get_model('seed', model_name).objects.filter(
+                    property_state_id__in=state_ids
+                ).values_list('property_state_id', flat=True)
+            )
+
+        return result
+
     @classmethod
     def merge_relationships(cls, merged_state, state1, state2):
         """
@@ -742,6 +757,10 @@ class PropertyView(models.Model):
         return self._import_filename
 
 
+post_save.connect(invalidate_view_count, sender=PropertyView)
+post_delete.connect(invalidate_view_count, sender=PropertyView)
+
+
 @receiver(post_save, sender=PropertyView)
 def post_save_property_view(sender, **kwargs):
     """
@@ -781,6 +800,27 @@ class PropertyAuditLog(models.Model):
         index_together = [['state', 'name'], ['parent_state1', 'parent_state2']]
 
 
+def sync_long_lat(instance, original_obj):
+    """
+    Sync the Latitude, Longitude, and long_lat fields of a PropertyState if applicable
+
+    :param instance: PropertyState, the state being saved
+    :param original_obj: PropertyState, the state as it was before the changes
+    """
+    latitude_change = original_obj.latitude != instance.latitude
+    longitude_change = original_obj.longitude != instance.longitude
+    long_lat_change = original_obj.long_lat != instance.long_lat
+    lat_and_long_both_populated = instance.latitude is not None and instance.longitude is not None
+
+    # The 'not long_lat_change' condition removes the case when long_lat is changed by an external API
+    if (latitude_change or longitude_change) and lat_and_long_both_populated and not long_lat_change:
+        instance.long_lat = f"POINT ({instance.longitude} {instance.latitude})"
+        instance.geocoding_confidence = "Manually geocoded (N/A)"
+    elif (latitude_change or longitude_change) and not lat_and_long_both_populated:
+        instance.long_lat = None
+        instance.geocoding_confidence = None
+
+
 @receiver(pre_save, sender=PropertyState)
 def sync_latitude_longitude_and_long_lat(sender, instance, **kwargs):
     try:
@@ -788,16 +828,4 @@ def sync_latitude_longitude_and_long_lat(sender, instance, **kwargs):
     except sender.DoesNotExist:
         pass  # Occurs on object creation
     else:
-        # Sync Latitude, Longitude, and long_lat fields if applicable
-        latitude_change = original_obj.latitude != instance.latitude
-        longitude_change = original_obj.longitude != instance.longitude
-        long_lat_change = original_obj.long_lat != instance.long_lat
-        lat_and_long_both_populated = instance.latitude is not None and instance.longitude is not None
-
-        # The 'not long_lat_change' condition removes the case when long_lat is changed by an external API
-        if (latitude_change or longitude_change) and lat_and_long_both_populated and not long_lat_change:
-            instance.long_lat = f"POINT ({instance.longitude} {instance.latitude})"
-            instance.geocoding_confidence = "Manually geocoded (N/A)"
-        elif (latitude_change or longitude_change) and not lat_and_long_both_populated:
-            instance.long_lat = None
-            instance.geocoding_confidence = None
+        sync_long_lat(instance, original_obj)
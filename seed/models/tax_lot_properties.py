@@ -7,12 +7,16 @@
 from __future__ import unicode_literals
 
 import logging
-from collections import defaultdict
+from functools import partial
 from itertools import chain
+from operator import attrgetter
 
 from django.apps import apps
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.contrib.postgres.fields import JSONField
 from django.db import models
 from django.db.models import Count
+from django.db.models.expressions import RawSQL
 from django.utils.timezone import make_naive
 
 from seed.models.columns import Column
@@ -24,6 +28,21 @@ from seed.utils.ubid import centroid_wkt
 
 logger = logging.getLogger(__name__)
 
+# state fields that are returned as naive isoformat strings
+TIMESTAMP_FIELDS = ['recent_sale_date', 'release_date', 'generation_date', 'analysis_start_time',
+                    'analysis_end_time']
+
+
+def _naive_isoformat(getter, instance):
+    value = getter(instance)
+    if value:
+        value = make_naive(value).isoformat()
+    return value
+
+
+def _list_from_field(field, instance):
+    return list(field.value_from_object(instance))
+
 
 class TaxLotProperty(models.Model):
     property_view = models.ForeignKey('PropertyView')
@@ -72,11 +91,26 @@ class TaxLotProperty(models.Model):
     def model_to_dict_with_mapping(cls, instance, mappings, fields=None, exclude=None):
         """
         Copied from Django method and added a mapping for field names and excluding
-        specific API fields.
+        specific API fields. Use model_to_dict_plan and plan_to_dict when converting many objects.
         """
-        from django.db import models
-        opts = instance._meta
-        data = {}
+        return cls.plan_to_dict(
+            instance, cls.model_to_dict_plan(instance.__class__, mappings, fields=fields, exclude=exclude)
+        )
+
+    @classmethod
+    def model_to_dict_plan(cls, model, mappings, fields=None, exclude=None):
+        """
+        Work out once which fields of the model model_to_dict_with_mapping returns, with the key
+        and a getter for each, so that converting each object only reads the values.
+
+        :param model: class, e.g. PropertyState
+        :param mappings: dict, mapping names { "from_name": "to_name", ...}
+        :param fields: list, fields to include, None for all
+        :param exclude: list, fields to exclude
+        :return: list of tuples, [(key, getter), ...]
+        """
+        opts = model._meta
+        plan = []
         for f in chain(opts.concrete_fields, opts.private_fields, opts.many_to_many):
             if not getattr(f, 'editable', False):
                 continue
@@ -87,25 +121,63 @@ class TaxLotProperty(models.Model):
             if f.name in Column.EXCLUDED_COLUMN_RETURN_FIELDS:
                 continue
 
-            # fix specific time stamps
-            if f.name in ['recent_sale_date', 'release_date', 'generation_date', 'analysis_start_time',
-                          'analysis_end_time']:
-                value = f.value_from_object(instance)
-                if value:
-                    value = make_naive(value).isoformat()
+            if isinstance(f, models.ManyToManyField):
+                # Evaluate ManyToManyField QuerySets to prevent subsequent model
+                # alteration of that field from being reflected in the data.
+                getter = partial(_list_from_field, f)
             else:
-                value = f.value_from_object(instance)
+                if type(f).value_from_object is models.Field.value_from_object:
+                    getter = attrgetter(f.attname)
+                else:
+                    getter = f.value_from_object
+                # fix specific time stamps
+                if f.name in TIMESTAMP_FIELDS:
+                    getter = partial(_naive_isoformat, getter)
 
-            if f.name in mappings:
-                data[mappings[f.name]] = value
-            else:
-                data[f.name] = value
+            plan.append((mappings.get(f.name, f.name), getter))
+        return plan
 
-            # Evaluate ManyToManyField QuerySets to prevent subsequent model
-            # alteration of that field from being reflected in the data.
-            if isinstance(f, models.ManyToManyField):
-                data[f.name] = list(data[f.name])
-        return data
+    @staticmethod
+    def plan_to_dict(instance, plan):
+        """Convert the instance to a dictionary with a plan from model_to_dict_plan"""
+        return {key: getter(instance) for key, getter in plan}
+
+    @classmethod
+    def only_shown_columns(cls, views, show_columns, columns_from_database, related=False):
+        """
+        Defer the state fields that get_related will not return for the views so that the
+        inventory list does not read the whole state row. When a settings profile is used, only the
+        shown extra data keys are pulled out of the extra_data JSON by the database and they are
+        returned on the view as shown_extra_data.
+
+        :param views: QuerySet, PropertyViews or TaxLotViews with select_related('state')
+        :param show_columns: list, see get_related
+        :param columns_from_database: list, see get_related
+        :param related: bool, True if the views are the related views of the listed views
+        :return: QuerySet
+        """
+        state_class = views.model._meta.get_field('state').related_model
+        obj_columns = [col for col in columns_from_database if col['related'] == related]
+        if show_columns is not None:
+            obj_columns = [col for col in obj_columns if col['id'] in show_columns]
+
+        needed = set(['bounding_box', 'long_lat', 'centroid'])
+        needed.update(col['column_name'] for col in obj_columns if not col['is_extra_data'])
+        views = views.defer(*[
+            'state__%s' % f.name for f in state_class._meta.concrete_fields
+            if not f.primary_key and f.name not in needed
+        ])
+
+        if show_columns is not None:
+            extra_data_fields = sorted(set(col['column_name'] for col in obj_columns if col['is_extra_data']))
+            # the state table is joined with its own name by select_related('state')
+            views = views.annotate(shown_extra_data=RawSQL(
+                'SELECT jsonb_object_agg(key, value) FROM jsonb_each("%s"."extra_data") '
+                'WHERE key = ANY(%%s)' % state_class._meta.db_table,
+                (extra_data_fields,),
+                output_field=JSONField()
+            ))
+        return views
 
     @classmethod
     def get_related(cls, object_list, show_columns, columns_from_database):
@@ -167,16 +239,22 @@ class TaxLotProperty(models.Model):
                 'related_state_id': 'property_state_id',
             }
 
-        # Ids of views to look up in m2m
+        # Ids of views to look up in m2m. Every query below is limited to the views of this page and
+        # the views related to them.
         ids = [obj.pk for obj in object_list]
-        joins = TaxLotProperty.objects.filter(**{lookups['obj_query_in']: ids}).select_related(lookups['related_view'])
+        joins = list(TaxLotProperty.objects.filter(**{lookups['obj_query_in']: ids}))
 
         # Get all ids of related views on these joins
         related_ids = [getattr(j, lookups['related_view_id']) for j in joins]
 
         # Get all related views from the related_class
-        related_views = apps.get_model('seed', lookups['related_class']).objects.select_related(
-            lookups['select_related'], 'state', 'cycle').filter(pk__in=related_ids)
+        related_views = cls.only_shown_columns(
+            apps.get_model('seed', lookups['related_class']).objects.select_related(
+                lookups['select_related'], 'state', 'cycle').filter(pk__in=related_ids),
+            show_columns,
+            columns_from_database,
+            related=True
+        )
 
         related_columns = []
         related_column_name_mapping = {}
@@ -200,13 +278,14 @@ class TaxLotProperty(models.Model):
             filtered_extra_data_fields = set([col['column_name'] for col in related_columns if col['is_extra_data']
                                               and col['id'] in show_columns])
 
+        related_plan = TaxLotProperty.model_to_dict_plan(
+            related_views.model._meta.get_field('state').related_model,
+            related_column_name_mapping,
+            fields=filtered_fields,
+            exclude=['extra_data']
+        )
         for related_view in related_views:
-            related_dict = TaxLotProperty.model_to_dict_with_mapping(
-                related_view.state,
-                related_column_name_mapping,
-                fields=filtered_fields,
-                exclude=['extra_data']
-            )
+            related_dict = TaxLotProperty.plan_to_dict(related_view.state, related_plan)
 
             related_dict[lookups['related_state_id']] = related_view.state.id
 
@@ -234,7 +313,7 @@ class TaxLotProperty(models.Model):
             if show_columns is not None:
                 related_dict.update(
                     TaxLotProperty.extra_data_to_dict_with_mapping(
-                        related_view.state.extra_data,
+                        related_view.shown_extra_data or {},
                         related_column_name_mapping,
                         fields=filtered_extra_data_fields
                     ).items()
@@ -246,18 +325,15 @@ class TaxLotProperty(models.Model):
 
         # Not sure what this code is really doing, but it only exists for TaxLotViews
         if lookups['obj_class'] == 'TaxLotView':
-            # Get whole taxlotstate table:
-            tuple_prop_to_jurisdiction_tl = tuple(
-                TaxLotProperty.objects.values_list('property_view_id', 'taxlot_view__state__jurisdiction_tax_lot_id')
+            # The jurisdiction tax lot ids of all the tax lots of each related property view
+            prop_to_jurisdiction_tl = dict(
+                TaxLotProperty.objects.filter(property_view_id__in=related_ids)
+                .order_by()
+                .values('property_view_id')
+                .annotate(jurisdiction_tax_lot_ids=ArrayAgg('taxlot_view__state__jurisdiction_tax_lot_id'))
+                .values_list('property_view_id', 'jurisdiction_tax_lot_ids')
             )
 
-            # create a mapping that defaults to an empty list
-            prop_to_jurisdiction_tl = defaultdict(list)
-
-            # populate the mapping
-            for name, pth in tuple_prop_to_jurisdiction_tl:
-                prop_to_jurisdiction_tl[name].append(pth)
-
         join_note_counts = {x[0]: x[1] for x in Note.objects.filter(**{lookups['related_query_in']: related_ids})
                             .values_list(lookups['related_view_id']).order_by().annotate(Count(lookups['related_view_id']))}
 
@@ -266,7 +342,7 @@ class TaxLotProperty(models.Model):
         for join in joins:
             # Another taxlot specific view
             if lookups['obj_class'] == 'TaxLotView':
-                jurisdiction_tax_lot_ids = prop_to_jurisdiction_tl[join.property_view_id]
+                jurisdiction_tax_lot_ids = prop_to_jurisdiction_tl.get(join.property_view_id, [])
 
                 # Filter out associated tax lots that are present but which do not have preferred
                 none_in_jurisdiction_tax_lot_ids = None in jurisdiction_tax_lot_ids
@@ -311,18 +387,24 @@ class TaxLotProperty(models.Model):
         obj_note_counts = {x[0]: x[1] for x in Note.objects.filter(**{lookups['obj_query_in']: ids})
                            .values_list(lookups['obj_view_id']).order_by().annotate(Count(lookups['obj_view_id']))}
 
+        obj_plan = TaxLotProperty.model_to_dict_plan(object_list[0].state.__class__,
+                                                     obj_column_name_mapping,
+                                                     fields=filtered_fields,
+                                                     exclude=['extra_data'])
         for obj in object_list:
             # Each object in the response is built from the state data, with related data added on.
-            obj_dict = TaxLotProperty.model_to_dict_with_mapping(obj.state,
-                                                                 obj_column_name_mapping,
-                                                                 fields=filtered_fields,
-                                                                 exclude=['extra_data'])
+            obj_dict = TaxLotProperty.plan_to_dict(obj.state, obj_plan)
 
             # Only add extra data columns if a settings profile was used
             if show_columns is not None:
+                # views from only_shown_columns carry just the shown extra data keys
+                if hasattr(obj, 'shown_extra_data'):
+                    extra_data = obj.shown_extra_data or {}
+                else:
+                    extra_data = obj.state.extra_data
                 obj_dict.update(
                     TaxLotProperty.extra_data_to_dict_with_mapping(
-                        obj.state.extra_data,
+                        extra_data,
                         obj_column_name_mapping,
                         fields=filtered_extra_data_fields
                     ).items()
@@ -16,7 +16,7 @@ from .auditlog import DATA_UPDATE_TYPE
 from django.contrib.postgres.fields import JSONField
 from django.contrib.gis.db import models as geomodels
 from django.db import models
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
 from seed.data_importer.models import ImportFile
@@ -31,8 +31,8 @@ from seed.models import (
     MERGE_STATE,
     MERGE_STATE_UNKNOWN,
 )
-from seed.utils.address import normalize_address_str
 from seed.utils.generic import split_model_fields, obj_to_dict
+from seed.utils.pagination import invalidate_view_count
 from seed.utils.time import convert_to_js_timestamp
 
 _log = logging.getLogger(__name__)
@@ -177,15 +177,11 @@ class TaxLotState(models.Model):
         return d
 
     def save(self, *args, **kwargs):
-        # Calculate and save the normalized address
-        if self.address_line_1 is not None:
-            self.normalized_address = normalize_address_str(self.address_line_1)
-        else:
-            self.normalized_address = None
+        # Calculate and save the normalized address and a hash of the object to the database
+        # for quick lookup
+        from seed.data_importer.tasks import set_state_derived_fields
+        set_state_derived_fields([self])
 
-        # save a hash of the object to the database for quick lookup
-        from seed.data_importer.tasks import hash_state_object
-        self.hash_object = hash_state_object(self)
         return super(TaxLotState, self).save(*args, **kwargs)
 
     def history(self):
@@ -435,6 +431,10 @@ class TaxLotView(models.Model):
         return self._import_filename
 
 
+post_save.connect(invalidate_view_count, sender=TaxLotView)
+post_delete.connect(invalidate_view_count, sender=TaxLotView)
+
+
 @receiver(post_save, sender=TaxLotView)
 def post_save_taxlot_view(sender, **kwargs):
     """
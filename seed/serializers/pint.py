@@ -27,40 +27,71 @@ def get_dimensionality(quantity_object):
     return str(quantity_object.dimensionality)
 
 
-def collapse_unit(org, x):
+# conversion factors from the units of a quantity to the display units, see conversion_factor
+_CONVERSION_FACTORS = {}
+
+
+def display_unit_specs(org):
     """
-    Collapse a Quantity object present down to a straight Float, per the
-    preferences of the organization supplied (or the base units). Generally
-    used to hide the fact of Quantities from Angular.
+    The units to display quantities in, keyed by dimensionality, per the
+    preferences of the organization supplied (or the base units).
     """
     # make extensible / field name agnostic by just branching on the dimensionality
     # and not the field name (eg. 'gross_floor_area') ... the dimensionality gets
     # enforced separately by the django pint column type
-    pint_specs = {
+    return {
         EUI_DIMENSIONALITY: org.display_units_eui or EUI_DEFAULT_UNITS,
         AREA_DIMENSIONALITY: org.display_units_area or AREA_DEFAULT_UNITS
     }
 
+
+def conversion_factor(units, pint_specs):
+    """
+    Factor to multiply a magnitude in the units by to get it in the display
+    units of its dimensionality. pint multiplies by the same factor in `.to()`,
+    so the values are identical, but the units only have to be parsed once.
+    """
+    key = (units, pint_specs[EUI_DIMENSIONALITY], pint_specs[AREA_DIMENSIONALITY])
+    try:
+        return _CONVERSION_FACTORS[key]
+    except KeyError:
+        pass
+
+    unit_quantity = ureg.Quantity(1, units)
+    factor = unit_quantity.to(pint_specs[get_dimensionality(unit_quantity)]).magnitude
+    _CONVERSION_FACTORS[key] = factor
+    return factor
+
+
+def collapse_unit(org, x, pint_specs=None):
+    """
+    Collapse a Quantity object present down to a straight Float, per the
+    preferences of the organization supplied (or the base units). Generally
+    used to hide the fact of Quantities from Angular.
+    """
     if isinstance(x, ureg.Quantity):
-        dimensionality = get_dimensionality(x)
-        pint_spec = pint_specs[dimensionality]
-        converted_value = x.to(pint_spec).magnitude
+        if pint_specs is None:
+            pint_specs = display_unit_specs(org)
+        converted_value = x.magnitude * conversion_factor(x.units, pint_specs)
         return round(converted_value, org.display_significant_figures)
     elif isinstance(x, list):
         # recurse out to collapse a dict for eg. the `related` key that
         # contains properties when the pt_dict is for a taxlot and vice-versa
-        return [apply_display_unit_preferences(org, y) for y in x]
+        return [apply_display_unit_preferences(org, y, pint_specs) for y in x]
     else:
         return x
 
 
-def apply_display_unit_preferences(org, pt_dict):
+def apply_display_unit_preferences(org, pt_dict, pint_specs=None):
     """
     take a dict of property/taxlot data just before it gets sent off across the
     API and collapse any Quantity objects present down to a straight float, per
-    the organization preferences.
+    the organization preferences. Pass the pint_specs from display_unit_specs
+    when collapsing many dicts for the same organization.
     """
-    converted_dict = {k: collapse_unit(org, v) for k, v in pt_dict.items()}
+    if pint_specs is None:
+        pint_specs = display_unit_specs(org)
+    converted_dict = {k: collapse_unit(org, v, pint_specs) for k, v in pt_dict.items()}
 
     return converted_dict
 
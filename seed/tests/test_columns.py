@@ -8,6 +8,7 @@
 import os.path
 
 from django.core.exceptions import ValidationError
+from django.db import transaction
 from django.test import TestCase
 
 from seed import models as seed_models
@@ -18,6 +19,9 @@ from seed.models import (
     Column,
     ColumnMapping,
 )
+from seed.models.column_mappings import column_version_cache_key
+from seed.tests.util import run_on_commit_callbacks
+from seed.utils.cache import get_version, version_is_dirty
 from seed.utils.organizations import create_organization
 
 
@@ -99,6 +103,128 @@ class TestColumns(TestCase):
         self.assertDictEqual(test_mapping, expected)
         self.assertEqual(no_concat, [])
 
+    def test_get_column_mapping_lookup(self):
+        Column.create_mappings([
+            {
+                "from_field": "raw_data_%s" % i,
+                "to_field": "destination_%s" % i,
+                "to_table_name": "PropertyState"
+            } for i in range(3)
+        ], self.fake_org, self.fake_user)
+
+        raw_columns = ['raw_data_0', 'raw_data_2', 'random']
+        expected = [seed_models.get_column_mapping(raw_column, self.fake_org) for raw_column in raw_columns]
+        self.assertEqual(expected[0], ('PropertyState', 'destination_0', 100))
+
+        with self.assertNumQueries(1):
+            previous_mapping = seed_models.get_column_mapping_lookup(self.fake_org)
+        with self.assertNumQueries(0):
+            self.assertEqual([previous_mapping(raw_column) for raw_column in raw_columns], expected)
+
+    def test_get_column_mapping_lookup_duplicates_and_concatenations(self):
+        raw_columns = [
+            Column.objects.create(column_name='raw_data_%s' % i, organization=self.fake_org)
+            for i in range(3)
+        ]
+        mapped_column = Column.objects.create(
+            table_name='PropertyState', column_name='destination_0', organization=self.fake_org
+        )
+
+        # raw_data_0 has two mappings
+        for _ in range(2):
+            column_mapping = ColumnMapping.objects.create(super_organization=self.fake_org)
+            column_mapping.column_raw.add(raw_columns[0])
+            column_mapping.column_mapped.add(mapped_column)
+
+        # raw_data_1 and raw_data_2 are concatenated
+        column_mapping = ColumnMapping.objects.create(super_organization=self.fake_org)
+        column_mapping.column_raw.add(raw_columns[1], raw_columns[2])
+        column_mapping.column_mapped.add(mapped_column)
+
+        previous_mapping = seed_models.get_column_mapping_lookup(self.fake_org)
+        self.assertIsNone(previous_mapping('raw_data_1'))
+        self.assertEqual(ColumnMapping.objects.filter(column_raw=raw_columns[0]).count(), 2)
+
+        # the duplicates are deleted when they are looked up
+        self.assertIsNone(previous_mapping('raw_data_0'))
+        self.assertFalse(ColumnMapping.objects.filter(column_raw=raw_columns[0]).exists())
+        self.assertIsNone(seed_models.get_column_mapping('raw_data_0', self.fake_org))
+
+    def test_get_column_mappings_cached(self):
+        raw_data = [
+            {
+                "from_field": "raw_data_%s" % i,
+                "to_field": "destination_%s" % i,
+                "to_table_name": "PropertyState"
+            } for i in range(10)
+        ]
+        Column.create_mappings(raw_data, self.fake_org, self.fake_user)
+        run_on_commit_callbacks()
+
+        with self.assertNumQueries(1):
+            test_mapping, _ = ColumnMapping.get_column_mappings(self.fake_org)
+        self.assertEqual(len(test_mapping), 10)
+        self.assertEqual(test_mapping['raw_data_3'], ('PropertyState', 'destination_3', '', True))
+
+        with self.assertNumQueries(0):
+            self.assertDictEqual(ColumnMapping.get_column_mappings(self.fake_org)[0], test_mapping)
+
+        # changing a mapping drops the cached mappings
+        Column.create_mappings([{
+            "from_field": "raw_data_3",
+            "to_field": "destination_new",
+            "to_table_name": "PropertyState"
+        }], self.fake_org, self.fake_user)
+        test_mapping, _ = ColumnMapping.get_column_mappings(self.fake_org)
+        self.assertEqual(test_mapping['raw_data_3'], ('PropertyState', 'destination_new', '', True))
+        run_on_commit_callbacks()
+        test_mapping, _ = ColumnMapping.get_column_mappings(self.fake_org)
+        self.assertEqual(test_mapping['raw_data_3'], ('PropertyState', 'destination_new', '', True))
+
+        ColumnMapping.delete_mappings(self.fake_org)
+        self.assertDictEqual(ColumnMapping.get_column_mappings(self.fake_org)[0], {})
+
+    def test_column_version_bumped_on_commit(self):
+        key = column_version_cache_key(self.fake_org.pk)
+        run_on_commit_callbacks()
+        version = get_version(key)
+        for column_name in ['Column C', 'Column D']:
+            Column.objects.create(
+                column_name=column_name,
+                table_name='PropertyState',
+                organization=self.fake_org,
+                is_extra_data=True,
+            )
+
+        # other processes keep reading the version until the commit, and this transaction does
+        # not use the cache for it
+        self.assertEqual(get_version(key), version)
+        self.assertTrue(version_is_dirty(key))
+        for _ in range(2):
+            with self.assertNumQueries(1):
+                Column.retrieve_all(self.fake_org.pk, 'property', False)
+
+        run_on_commit_callbacks()
+        self.assertFalse(version_is_dirty(key))
+        self.assertEqual(get_version(key), version + 1)
+
+        # nothing is bumped, or left dirty, when the transaction rolls back
+        try:
+            with transaction.atomic():
+                Column.objects.create(
+                    column_name='Column E',
+                    table_name='PropertyState',
+                    organization=self.fake_org,
+                    is_extra_data=True,
+                )
+                self.assertTrue(version_is_dirty(key))
+                raise RuntimeError('roll back')
+        except RuntimeError:
+            pass
+        self.assertFalse(version_is_dirty(key))
+        run_on_commit_callbacks()
+        self.assertEqual(get_version(key), version + 1)
+
     def test_save_mappings_dict(self):
         """
         Test the way of saving mappings, which is dict-based instead of list of list of list.
@@ -470,6 +596,40 @@ class TestColumnsByInventory(TestCase):
             if c['name'] == 'Column A':
                 self.assertEqual(c['sharedFieldType'], 'Public')
 
+    def test_column_retrieve_all_cached(self):
+        run_on_commit_callbacks()
+        # one query for the columns and one for the used columns, the units are joined
+        with self.assertNumQueries(2):
+            columns = Column.retrieve_all(self.fake_org.pk, 'property', True)
+        # the priorities are built from all the columns, not only the used ones
+        with self.assertNumQueries(1):
+            priorities = Column.retrieve_priorities(self.fake_org.pk)
+        all_columns = Column.retrieve_all(self.fake_org.pk, 'property', False)
+        with self.assertNumQueries(0):
+            self.assertEqual(Column.retrieve_all(self.fake_org.pk, 'property', True), columns)
+            self.assertEqual(Column.retrieve_all(self.fake_org.pk, 'property', False), all_columns)
+            self.assertEqual(Column.retrieve_priorities(self.fake_org.pk), priorities)
+            self.assertEqual(Column.retrieve_priorities(self.fake_org), priorities)
+
+        # mapping a column makes it used
+        column_b = seed_models.Column.objects.create(
+            column_name='Column B',
+            table_name='PropertyState',
+            organization=self.fake_org,
+            is_extra_data=True,
+        )
+        self.assertIn('Column B', Column.retrieve_priorities(self.fake_org.pk)['PropertyState']['extra_data'])
+        self.assertEqual(len(Column.retrieve_all(self.fake_org.pk, 'property', True)), 1)
+        seed_models.ColumnMapping.objects.create().column_mapped.add(column_b)
+        self.assertEqual(len(Column.retrieve_all(self.fake_org.pk, 'property', True)), 2)
+
+        column_b.merge_protection = Column.COLUMN_MERGE_FAVOR_EXISTING
+        column_b.save()
+        self.assertEqual(
+            Column.retrieve_priorities(self.fake_org.pk)['PropertyState']['extra_data']['Column B'],
+            'Favor Existing'
+        )
+
     def test_column_retrieve_all_duplicate_error(self):
         seed_models.Column.objects.create(
             column_name='custom_id_1',
@@ -5,8 +5,14 @@
 :author
 """
 
+from datetime import date, datetime
+
+import mock
+import pytz
 from django.forms.models import model_to_dict
+from quantityfield import ureg
 
+from seed.models import StatusLabel
 from seed.models.data_quality import (
     DataQualityCheck,
     Rule,
@@ -20,6 +26,7 @@ from seed.test_helpers.fake import (
     FakePropertyViewFactory,
 )
 from seed.tests.util import DataMappingBaseTestCase
+from seed.utils.cache import get_cache_raw, incr_cache_raw, set_cache_raw
 
 
 class DataQualityCheckTests(DataMappingBaseTestCase):
@@ -128,6 +135,74 @@ class DataQualityCheckTests(DataMappingBaseTestCase):
 
         self.assertEqual(error_found, True)
 
+    def test_check_data_status_labels(self):
+        dq = DataQualityCheck.retrieve(self.org.id)
+        dq.remove_all_rules()
+        status_label = StatusLabel.objects.create(name='eui', super_organization=self.org)
+        dq.add_rule({
+            'table_name': 'PropertyState',
+            'field': 'site_eui',
+            'data_type': Rule.TYPE_EUI,
+            'rule_type': Rule.RULE_TYPE_DEFAULT,
+            'max': 1000,
+            'severity': Rule.SEVERITY_ERROR,
+            'units': 'kBtu/ft**2/year',
+            'status_label': status_label,
+        })
+
+        out_of_range = self.property_view_factory.get_property_view(site_eui=525600)
+        in_range = self.property_view_factory.get_property_view(site_eui=100)
+        in_range.property.labels.add(status_label)
+
+        dq.check_data('PropertyState', [out_of_range.state, in_range.state])
+
+        # the label is added to the out of range property and removed from the other one
+        self.assertEqual(list(out_of_range.property.labels.all()), [status_label])
+        self.assertEqual(list(in_range.property.labels.all()), [])
+        self.assertEqual(list(dq.results.keys()), [out_of_range.state.id])
+
+        # checking again does not add the label twice
+        dq.reset_results()
+        dq.check_data('PropertyState', [out_of_range.state, in_range.state])
+        self.assertEqual(out_of_range.property.labels.count(), 1)
+
+    def test_save_to_cache_by_chunk(self):
+        _, identifier = DataQualityCheck.initialize_cache()
+
+        states = []
+        for i in range(3):
+            states.append(self.property_state_factory.get_property_state(
+                None, no_default_data=True, custom_id_1='id %s' % i, site_eui=525600))
+
+        # check the states in separate chunks, in reverse order, like parallel tasks would
+        for state in reversed(states):
+            dq = DataQualityCheck.retrieve(self.org.id)
+            dq.check_data('PropertyState', [state])
+            dq.save_to_cache(identifier)
+
+        results = DataQualityCheck.merge_cached_results(identifier)
+        self.assertEqual([r['id'] for r in results], [s.id for s in states])
+        self.assertEqual(get_cache_raw(DataQualityCheck.cache_key(identifier)), results)
+
+    def test_save_to_cache_counter_added_by_another_chunk(self):
+        _, identifier = DataQualityCheck.initialize_cache()
+        count_key = DataQualityCheck.chunk_count_cache_key(identifier)
+
+        def incr_after_another_chunk(key):
+            # another chunk adds the counter between this chunk's incr and add
+            set_cache_raw(count_key, 1, 86400)
+            incr.side_effect = incr_cache_raw
+            raise ValueError
+
+        dq = DataQualityCheck.retrieve(self.org.id)
+        with mock.patch('seed.utils.cache.incr_cache_raw') as incr:
+            incr.side_effect = incr_after_another_chunk
+            dq.save_to_cache(identifier)
+
+        # the chunk takes the next number instead of overwriting the other chunk's
+        self.assertEqual(get_cache_raw(count_key), 2)
+        self.assertIsNotNone(get_cache_raw(DataQualityCheck.chunk_cache_key(identifier, 2)))
+
     def test_text_match(self):
         dq = DataQualityCheck.retrieve(self.org.id)
         dq.remove_all_rules()
@@ -152,6 +227,28 @@ class DataQualityCheckTests(DataMappingBaseTestCase):
         dq.check_data(ps.__class__.__name__, [ps])
         self.assertEqual(dq.results, {})
 
+    def test_min_max_typed_bounds(self):
+        rule = Rule.objects.create(name='eui_rule', data_type=Rule.TYPE_EUI, min=10, max=1000,
+                                   units='kBtu/ft**2/year')
+        # the bounds are typed once per type of value and reused
+        for _ in range(2):
+            self.assertTrue(rule.minimum_valid(ureg.Quantity(100, 'kBtu/ft**2/year')))
+            self.assertFalse(rule.maximum_valid(ureg.Quantity(1001, 'kBtu/ft**2/year')))
+            self.assertFalse(rule.minimum_valid(ureg.Quantity(20, 'kWh/m**2/year')))
+            self.assertTrue(rule.maximum_valid(ureg.Quantity(3000, 'kWh/m**2/year')))
+            self.assertTrue(rule.minimum_valid(10))
+            self.assertFalse(rule.maximum_valid(1000.5))
+
+        rule = Rule.objects.create(name='date_rule', data_type=Rule.TYPE_DATE, min=20000101,
+                                   max=20190101)
+        self.assertTrue(rule.minimum_valid(date(2000, 1, 1)))
+        self.assertFalse(rule.maximum_valid(date(2019, 1, 2)))
+        self.assertFalse(rule.minimum_valid(datetime(1999, 12, 31, tzinfo=pytz.UTC)))
+
+        # changing the bound on the instance is picked up
+        rule.max = 20200101
+        self.assertTrue(rule.maximum_valid(date(2019, 1, 2)))
+
     def test_str_to_data_type_string(self):
         rule = Rule.objects.create(name='str_rule', data_type=Rule.TYPE_STRING)
         self.assertEqual(rule.str_to_data_type(' '), '')
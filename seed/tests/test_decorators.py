@@ -6,13 +6,14 @@
 """
 import json
 
+from django.core.cache import cache
 from django.http import HttpResponse
 from django.test import TestCase, RequestFactory
 from rest_framework.test import APIRequestFactory
 
 from seed import decorators
 from seed.utils.cache import make_key, get_cache, get_lock, increment_cache, \
-    clear_cache
+    clear_cache, acquire_lock, renew_lock, release_lock, delete_cache
 
 
 class TestException(Exception):
@@ -22,7 +23,6 @@ class TestException(Exception):
 class TestDecorators(TestCase):
     """Tests for locking tasks and reporting progress."""
 
-    locked = 1
     unlocked = 0
     pk = 34  # Arbitrary PK value to test with.
 
@@ -67,7 +67,9 @@ class TestDecorators(TestCase):
 
         @decorators.lock_and_track
         def fake_func(import_file_pk):
-            self.assertEqual(int(get_lock(key)), self.locked)
+            self.assertTrue(get_lock(key))
+            # the task cannot run twice at the same time
+            self.assertEqual(fake_func(import_file_pk), {'error': 'locked'})
 
         fake_func(self.pk)
 
@@ -79,13 +81,54 @@ class TestDecorators(TestCase):
 
         @decorators.lock_and_track
         def fake_func(import_file_pk):
-            self.assertEqual(int(get_lock(key)), self.locked)
+            self.assertTrue(get_lock(key))
             raise TestException('Test exception!')
 
         self.assertRaises(TestException, fake_func, self.pk)
         # Even though execution failed part way through a call, we unlock.
         self.assertEqual(int(get_lock(key)), self.unlocked)
 
+    def test_lock_ownership(self):
+        """Only the owner of the lock can renew and release it."""
+        key = decorators._get_lock_key('fake_func', self.pk)
+
+        token = acquire_lock(key)
+        self.assertIsNotNone(token)
+        self.assertIsNone(acquire_lock(key))
+
+        self.assertFalse(renew_lock(key, 'not-the-owner'))
+        release_lock(key, 'not-the-owner')
+        self.assertEqual(get_lock(key), token)
+
+        self.assertTrue(renew_lock(key, token))
+        release_lock(key, token)
+        self.assertEqual(int(get_lock(key)), self.unlocked)
+
+    def test_lock_is_taken_with_expiry(self):
+        """The lock is set with its expiry, so a worker that dies can not leave it behind forever."""
+        key = decorators._get_lock_key('fake_func', self.pk)
+
+        token = acquire_lock(key, 30)
+        self.assertTrue(0 < cache.ttl(key) <= 30)
+        release_lock(key, token)
+
+    def test_lock_expired_and_taken_by_another_owner(self):
+        """A lock that expired and was acquired again is not renewed or released by the old owner"""
+        key = decorators._get_lock_key('fake_func', self.pk)
+
+        token = acquire_lock(key)
+        # the lock expires, then another worker takes it
+        delete_cache(key)
+        other_token = acquire_lock(key)
+        self.assertIsNotNone(other_token)
+
+        self.assertFalse(renew_lock(key, token))
+        release_lock(key, token)
+        self.assertEqual(get_lock(key), other_token)
+
+        release_lock(key, other_token)
+        self.assertEqual(int(get_lock(key)), self.unlocked)
+
     def test_progress(self):
         """When a task finishes, it increments the progress counter properly."""
         increment = expected = 25.0
@@ -0,0 +1,53 @@
+# !/usr/bin/env python
+# encoding: utf-8
+"""
+:copyright (c) 2014 - 2019, The Regents of the University of California, through Lawrence Berkeley National Laboratory (subject to receipt of any required approvals from the U.S. Department of Energy) and contributors. All rights reserved.  # NOQA
+:author
+"""
+from django.test import TestCase
+from quantityfield import ureg
+
+from seed.lib.superperms.orgs.models import Organization
+from seed.serializers.pint import (
+    apply_display_unit_preferences,
+    collapse_unit,
+    display_unit_specs,
+    get_dimensionality,
+)
+
+
+class TestPintSerializers(TestCase):
+    def test_collapse_unit_matches_pint_conversion(self):
+        values = [
+            ureg.Quantity(3.14159, 'ft**2'),
+            ureg.Quantity(100, 'ft**2'),
+            ureg.Quantity(12345.678, 'm**2'),
+            ureg.Quantity(90.5, 'kBtu/ft**2/year'),
+            ureg.Quantity(17, 'kWh/m**2/year'),
+            ureg.Quantity(0, 'GJ/m**2/year'),
+        ]
+        orgs = [
+            Organization(),
+            Organization(display_units_eui='kWh/m**2/year', display_units_area='m**2',
+                         display_significant_figures=4),
+        ]
+        for org in orgs:
+            pint_specs = display_unit_specs(org)
+            for value in values:
+                expected = round(value.to(pint_specs[get_dimensionality(value)]).magnitude,
+                                 org.display_significant_figures)
+                self.assertEqual(collapse_unit(org, value), expected)
+                self.assertEqual(type(collapse_unit(org, value)), type(expected))
+
+    def test_apply_display_unit_preferences(self):
+        org = Organization(display_units_area='m**2', display_significant_figures=1)
+        result = apply_display_unit_preferences(org, {
+            'name': 'building',
+            'gross_floor_area': ureg.Quantity(100, 'ft**2'),
+            'related': [{'gross_floor_area': ureg.Quantity(200, 'ft**2')}],
+        })
+        self.assertEqual(result, {
+            'name': 'building',
+            'gross_floor_area': 9.3,
+            'related': [{'gross_floor_area': 18.6}],
+        })
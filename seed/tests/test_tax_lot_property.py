@@ -7,20 +7,25 @@
 import json
 
 from django.core.urlresolvers import reverse_lazy
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
 from seed.landing.models import SEEDUser as User
+from seed.management.commands.benchmark_model_to_dict import reference_model_to_dict_with_mapping
 from seed.models import (
     Cycle,
     PropertyView,
     TaxLotProperty,
+    TaxLotView,
     Column,
 )
 from seed.test_helpers.fake import (
     FakePropertyFactory,
     FakePropertyStateFactory,
     FakePropertyViewFactory,
-    FakeStatusLabelFactory
+    FakeStatusLabelFactory,
+    FakeTaxLotPropertyFactory,
 )
 from seed.utils.organizations import create_organization
 
@@ -78,6 +83,36 @@ class TestTaxLotProperty(TestCase):
         self.assertEqual(len(data), 50)
         self.assertEqual(len(data[0]['related']), 0)
 
+    def test_model_to_dict_plan(self):
+        state = self.property_view.state
+        mappings = {f.name: 'Mapped %s' % f.name for f in state._meta.fields}
+        fields = [f.name for f in state._meta.fields][::2]
+
+        for kwargs in [{}, {'fields': fields}, {'exclude': ['extra_data']}]:
+            plan = TaxLotProperty.model_to_dict_plan(state.__class__, mappings, **kwargs)
+            self.assertEqual(TaxLotProperty.plan_to_dict(state, plan),
+                             reference_model_to_dict_with_mapping(state, mappings, **kwargs))
+            self.assertEqual(TaxLotProperty.model_to_dict_with_mapping(state, mappings, **kwargs),
+                             reference_model_to_dict_with_mapping(state, mappings, **kwargs))
+
+    def test_tax_lot_get_related_is_page_scoped(self):
+        """Test that get_related only reads the join rows of the views that it is given"""
+        taxlot_property_factory = FakeTaxLotPropertyFactory(organization=self.org, user=self.user)
+        joins = [taxlot_property_factory.get_taxlot_property(cycle=self.cycle) for _ in range(3)]
+        # a second tax lot on the first property
+        taxlot_property_factory.get_taxlot_property(cycle=self.cycle, property_view=joins[0].property_view)
+
+        qs = TaxLotView.objects.select_related('taxlot', 'state', 'cycle').filter(pk=joins[0].taxlot_view_id)
+        columns_from_database = Column.retrieve_all(self.org.id, 'taxlot', False)
+        with CaptureQueriesContext(connection) as context:
+            data = TaxLotProperty.get_related(qs, None, columns_from_database)
+
+        self.assertEqual(len(data), 1)
+        self.assertEqual([r['property_view_id'] for r in data[0]['related']], [joins[0].property_view_id])
+        for query in context.captured_queries:
+            if 'seed_taxlotproperty' in query['sql']:
+                self.assertIn('WHERE', query['sql'])
+
     def test_csv_export(self):
         """Test to make sure get_related returns the fields"""
         for i in range(50):
@@ -8,6 +8,7 @@ import json
 from datetime import datetime
 
 from django.core.urlresolvers import reverse, reverse_lazy
+from django.db import transaction
 from django.test import TestCase
 from django.utils import timezone
 
@@ -31,7 +32,9 @@ from seed.test_helpers.fake import (
     FakePropertyFactory, FakePropertyStateFactory,
     FakeTaxLotStateFactory
 )
+from seed.utils.cache import set_cache_raw
 from seed.utils.organizations import create_organization
+from seed.utils.pagination import view_count_cache_key
 
 DEFAULT_CUSTOM_COLUMNS = [
     'project_id',
@@ -41,7 +44,7 @@ DEFAULT_CUSTOM_COLUMNS = [
     'state_province',
 ]
 
-from seed.tests.util import DeleteModelsTestCase
+from seed.tests.util import DeleteModelsTestCase, run_on_commit_callbacks
 
 COLUMNS_TO_SEND = DEFAULT_CUSTOM_COLUMNS + ['postal_code', 'pm_parent_property_id',
                                             # 'calculated_taxlot_ids', 'primary',
@@ -745,6 +748,94 @@ class InventoryViewTests(DeleteModelsTestCase):
         self.assertEquals(pagination['has_previous'], False)
         self.assertEquals(pagination['total'], 0)
 
+    def test_get_properties_after(self):
+        extra_data = {
+            'is secret lair': True,
+            'paint color': 'pink',
+        }
+        view_ids = []
+        for _ in range(3):
+            state = self.property_state_factory.get_property_state(extra_data=extra_data)
+            Column.save_column_names(state)
+            view_ids.append(PropertyView.objects.create(
+                property=self.property_factory.get_property(), cycle=self.cycle, state=state
+            ).id)
+
+        column_name_mappings = {}
+        for c in Column.retrieve_all(self.org.pk, 'property'):
+            if not c['related']:
+                column_name_mappings[c['column_name']] = c['name']
+
+        url = '/api/v2/properties/filter/?organization_id={}&cycle={}&per_page=2'.format(
+            self.org.pk, self.cycle.pk)
+        response = self.client.post(url, data={'profile_id': -1})
+        result = json.loads(response.content)
+        self.assertEqual([r['property_view_id'] for r in result['results']], view_ids[:2])
+        pagination = result['pagination']
+        self.assertEqual(pagination['total'], 3)
+        self.assertEqual(pagination['num_pages'], 2)
+        self.assertTrue(pagination['has_next'])
+        self.assertEqual(pagination['next_after'], view_ids[1])
+        # only the shown extra data keys are read, but they are all shown here
+        self.assertEqual(result['results'][0][column_name_mappings['paint color']], 'pink')
+        self.assertEqual(result['results'][0][column_name_mappings['is secret lair']], True)
+
+        response = self.client.post(url + '&page=2&after={}'.format(pagination['next_after']),
+                                    data={'profile_id': -1})
+        result = json.loads(response.content)
+        self.assertEqual([r['property_view_id'] for r in result['results']], view_ids[2:])
+        pagination = result['pagination']
+        self.assertEqual(pagination['page'], 2)
+        self.assertEqual(pagination['start'], 3)
+        self.assertEqual(pagination['end'], 3)
+        self.assertFalse(pagination['has_next'])
+        self.assertIsNone(pagination['next_after'])
+
+        # without the page, the position of the page is not known
+        response = self.client.post(url + '&after={}'.format(view_ids[1]), data={'profile_id': -1})
+        result = json.loads(response.content)
+        self.assertEqual([r['property_view_id'] for r in result['results']], view_ids[2:])
+        pagination = result['pagination']
+        self.assertIsNone(pagination['page'])
+        self.assertIsNone(pagination['start'])
+        self.assertIsNone(pagination['end'])
+        self.assertTrue(pagination['has_previous'])
+        self.assertFalse(pagination['has_next'])
+        self.assertEqual(pagination['total'], 3)
+
+        response = self.client.post(url + '&after=0', data={'profile_id': -1})
+        result = json.loads(response.content)
+        self.assertEqual([r['property_view_id'] for r in result['results']], view_ids[:2])
+        self.assertFalse(result['pagination']['has_previous'])
+        self.assertTrue(result['pagination']['has_next'])
+
+        # the total is cached, and dropped when a view is removed from the cycle
+        PropertyView.objects.filter(id=view_ids[2]).delete()
+        response = self.client.post(url, data={'profile_id': None})
+        self.assertEqual(json.loads(response.content)['pagination']['total'], 2)
+
+    def test_get_properties_count_dropped_on_commit(self):
+        run_on_commit_callbacks()
+        count_cache_key = view_count_cache_key('PropertyView', self.cycle.pk)
+        with transaction.atomic():
+            for _ in range(2):
+                PropertyView.objects.create(
+                    property=self.property_factory.get_property(),
+                    cycle=self.cycle,
+                    state=self.property_state_factory.get_property_state(),
+                )
+            # the count is not cached by the transaction that changes it
+            self.assertIsNone(view_count_cache_key('PropertyView', self.cycle.pk))
+            # another process counts the committed views, and caches that total
+            set_cache_raw(count_cache_key, 0)
+
+        run_on_commit_callbacks()
+        self.assertNotEqual(view_count_cache_key('PropertyView', self.cycle.pk), count_cache_key)
+        url = '/api/v2/properties/filter/?organization_id={}&cycle={}&per_page=2'.format(
+            self.org.pk, self.cycle.pk)
+        response = self.client.post(url, data={'profile_id': -1})
+        self.assertEqual(json.loads(response.content)['pagination']['total'], 2)
+
     def test_get_property(self):
         property_state = self.property_state_factory.get_property_state()
         property_property = self.property_factory.get_property()
@@ -8,6 +8,7 @@
 import datetime
 import json
 
+from django.db import connection
 from django.test import TestCase
 from django.utils import timezone
 
@@ -42,6 +43,16 @@ from seed.models.data_quality import DataQualityCheck
 from seed.utils.organizations import create_organization
 
 
+def run_on_commit_callbacks():
+    """
+    Run the callbacks registered with transaction.on_commit as if the transaction of the test
+    had committed. TestCase rolls its transaction back, so they would never run otherwise.
+    """
+    callbacks, connection.run_on_commit = connection.run_on_commit, []
+    for _, callback in callbacks:
+        callback()
+
+
 class DeleteModelsTestCase(TestCase):
     def _delete_models(self):
         # Order matters here
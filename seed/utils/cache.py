@@ -4,8 +4,12 @@
 :copyright (c) 2014 - 2019, The Regents of the University of California, through Lawrence Berkeley National Laboratory (subject to receipt of any required approvals from the U.S. Department of Energy) and contributors. All rights reserved.  # NOQA
 :author
 """
+import time
+from uuid import uuid4
+
 from django.core.cache import cache as django_cache
 from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.db import transaction
 
 
 def make_key(key):
@@ -20,6 +24,99 @@ def get_cache_raw(key, default=None):
     return django_cache.get(key, default)
 
 
+def get_many_cache_raw(keys):
+    """Return a dict of the values of the keys that are in the cache"""
+    return django_cache.get_many(keys)
+
+
+def incr_cache_raw(key, delta=1):
+    """Atomically increment the integer value of the key and return the new value"""
+    return django_cache.incr(key, delta)
+
+
+def incr_or_add_cache_raw(key, timeout=DEFAULT_TIMEOUT):
+    """
+    Atomically increment the integer value of the key and return the new value. A missing key is
+    added with the value 1. If another process adds the key first, the increment is retried.
+    """
+    while True:
+        try:
+            return incr_cache_raw(key)
+        except ValueError:
+            # the key was not initialized (or it expired)
+            if django_cache.add(key, 1, timeout):
+                return 1
+
+
+def get_version(key):
+    """Return the version stored in the key, starting a new version if there is none"""
+    version = get_cache_raw(key)
+    if version is None:
+        version = bump_version(key)
+    return version
+
+
+def bump_version(key):
+    """
+    Change the version stored in the key so that the data that was cached under the
+    previous version is no longer read. The version does not expire.
+
+    :return: int, the new version
+    """
+    try:
+        return incr_cache_raw(key)
+    except ValueError:
+        # start from the time so that a new version never repeats one that may still have data
+        version = int(time.time() * 1000000)
+        set_cache_raw(key, version, None)
+        return version
+
+
+class _BumpVersion(object):
+    """The on commit callback of bump_version_on_commit, which remembers its key"""
+
+    def __init__(self, key):
+        self.key = key
+
+    def __call__(self):
+        bump_version(self.key)
+
+
+def version_is_dirty(key):
+    """
+    Return True if the current transaction changed the data versioned by the key and has not
+    committed yet. The pending callbacks are dropped by Django when the transaction rolls back.
+    """
+    connection = transaction.get_connection()
+    return connection.in_atomic_block and any(
+        isinstance(callback, _BumpVersion) and callback.key == key
+        for _, callback in connection.run_on_commit
+    )
+
+
+def bump_version_on_commit(key):
+    """
+    Bump the version when the current transaction commits, or now if there is no transaction.
+    Bumping before the commit would let other processes cache the data from before the commit
+    under the new version. Until the commit, version_is_dirty(key) is True in this transaction,
+    which must then neither read nor write the data cached for the version.
+    """
+    if not transaction.get_connection().in_atomic_block:
+        bump_version(key)
+    elif not version_is_dirty(key):
+        transaction.on_commit(_BumpVersion(key))
+
+
+def versioned_cache_key(version_key, key):
+    """
+    Return the key with the current version of version_key in it, or None while the current
+    transaction has uncommitted changes to the versioned data, which must not be cached.
+    """
+    if version_is_dirty(version_key):
+        return None
+    return '%s__%s' % (key, get_version(version_key))
+
+
 def set_cache(progress_key, status, data):
     """
     Sets the cache key to a pickled dictionary containing at least status and progress.
@@ -79,14 +176,78 @@ def delete_cache(progress_key):
     django_cache.delete(progress_key)
 
 
-def lock_cache(progress_key, timeout=60):
-    """Set the lock with a default timeout of 1 minute"""
-    set_cache_raw(progress_key, 1, timeout)
+def _lock_client(lock_key):
+    """Return the Redis client of the server of the lock and the full key of the lock"""
+    key = django_cache.make_key(lock_key)
+    return django_cache.get_client(key, write=True), str(key)
+
+
+def acquire_lock(lock_key, timeout=60):
+    """
+    Take the lock if nobody holds it. On Redis the lock is taken and given its expiry in one
+    SET NX EX, so only one caller can get the lock and a lock can never be left without an expiry.
+
+    :param lock_key: str, key of the lock
+    :param timeout: int, seconds until the lock expires if it is not renewed or released
+    :return: str, the token that owns the lock, or None if the lock is held by someone else
+    """
+    token = uuid4().hex
+    if hasattr(django_cache, 'get_client'):
+        client, key = _lock_client(lock_key)
+        acquired = client.set(key, django_cache.prep_value(token), nx=True, ex=timeout)
+    else:
+        acquired = django_cache.add(lock_key, token, timeout)
+
+    if acquired:
+        return token
+    return None
+
+
+# The owner of a lock is checked and the lock changed in one step on the Redis server. Otherwise
+# the lock could expire and be taken by another worker between the check and the change.
+RENEW_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('expire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+RELEASE_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+def _run_lock_script(script, lock_key, token, *args):
+    """Run a lock script on the Redis server of the lock, comparing against the stored token"""
+    client, key = _lock_client(lock_key)
+    return client.eval(script, 1, key, django_cache.prep_value(token), *args)
+
+
+def renew_lock(lock_key, token, timeout=60):
+    """
+    Extend the lock, but only if it is still owned by the token
+
+    :return: bool, True if the lock was renewed
+    """
+    if hasattr(django_cache, 'get_client'):
+        return bool(_run_lock_script(RENEW_LOCK_SCRIPT, lock_key, token, timeout))
+
+    # caches other than Redis are only shared within a process, where this is not racing
+    # with other workers
+    if django_cache.get(lock_key) != token:
+        return False
+    django_cache.set(lock_key, token, timeout)
+    return True
 
 
-def unlock_cache(progress_key, timeout=DEFAULT_TIMEOUT):
-    """Unset the lock"""
-    set_cache_raw(progress_key, 0, timeout)
+def release_lock(lock_key, token):
+    """Release the lock, but only if it is still owned by the token"""
+    if hasattr(django_cache, 'get_client'):
+        _run_lock_script(RELEASE_LOCK_SCRIPT, lock_key, token)
+    elif django_cache.get(lock_key) == token:
+        django_cache.delete(lock_key)
 
 
 def get_lock(lock_key, default=0):
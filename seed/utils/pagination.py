@@ -9,10 +9,19 @@ required approvals from the U.S. Department of Energy) and contributors.
 All rights reserved.  # NOQA
 :author
 """
+import math
 from collections import OrderedDict
+
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
 
+from seed.utils.cache import (
+    bump_version_on_commit,
+    get_cache_raw,
+    set_cache_raw,
+    versioned_cache_key,
+)
+
 
 class ResultsListPagination(PageNumberPagination):
     page_size_query_param = 'per_page'
@@ -30,3 +39,102 @@ class ResultsListPagination(PageNumberPagination):
             ('total', self.page.paginator.count),
             ('results', data)
         ]))
+
+
+# The view counts are also dropped from the cache when a view is saved or deleted
+VIEW_COUNT_TIMEOUT = 60 * 60
+
+
+def view_count_version_key(view_class_name, cycle_id):
+    """Key of the version of the number of views in the cycle"""
+    return 'view_count_version__%s__%s' % (view_class_name, cycle_id)
+
+
+def view_count_cache_key(view_class_name, cycle_id):
+    """
+    Key of the cached number of views in the cycle, or None while the current transaction has
+    uncommitted changes to the views of the cycle
+    """
+    return versioned_cache_key(
+        view_count_version_key(view_class_name, cycle_id),
+        'view_count__%s__%s' % (view_class_name, cycle_id)
+    )
+
+
+def invalidate_view_count(sender, instance, **kwargs):
+    """
+    Signal receiver that drops the cached number of views in the cycle of the saved/deleted view,
+    once the transaction commits
+    """
+    bump_version_on_commit(view_count_version_key(sender.__name__, instance.cycle_id))
+
+
+def paginate_views(queryset, page, per_page, after=None, count_cache_key=None, count_queryset=None):
+    """
+    Return one page of the queryset, which has to be ordered by id. If `after` is the id of the last
+    view of the previous page, the page is found with a seek on the id (WHERE id > after LIMIT per_page)
+    instead of an OFFSET, so every page costs the same no matter how deep it is. The total count is
+    read from the cache when a count_cache_key is given.
+
+    :param queryset: QuerySet, ordered by id
+    :param page: int or str, page number. Used for the page based pagination. With `after` the page is
+                 only known to the client, so page, start and end are None unless the page is given
+    :param per_page: int or str, number of results per page
+    :param after: int or str, optional, id of the last view of the previous page
+    :param count_cache_key: str, optional, cache key for the total count of the queryset
+    :param count_queryset: QuerySet, optional, the queryset to count when it is cheaper to count than queryset,
+                           e.g. before any annotations
+    :return: tuple, (list of objects, pagination dict)
+    """
+    per_page = max(int(per_page), 1)
+    if count_queryset is None:
+        count_queryset = queryset
+
+    total = get_cache_raw(count_cache_key) if count_cache_key else None
+    if total is None:
+        total = count_queryset.count()
+        if count_cache_key:
+            set_cache_raw(count_cache_key, total, VIEW_COUNT_TIMEOUT)
+    num_pages = max(int(math.ceil(total / float(per_page))), 1)
+
+    try:
+        page = int(page)
+    except (TypeError, ValueError):
+        page = None
+
+    try:
+        after = int(after) if after not in (None, '') else None
+    except (TypeError, ValueError):
+        after = None
+
+    if after is not None:
+        objects = list(queryset.filter(id__gt=after)[:per_page + 1])
+        has_next = len(objects) > per_page
+        objects = objects[:per_page]
+        has_previous = count_queryset.filter(id__lte=after).exists()
+    else:
+        if page is None:
+            page = 1
+        if page < 1 or page > num_pages:
+            page = num_pages
+        offset = (page - 1) * per_page
+        objects = list(queryset[offset:offset + per_page])
+        has_next = page < num_pages
+        has_previous = page > 1
+
+    if page is None:
+        start = end = None
+    else:
+        start = (page - 1) * per_page + 1 if objects else 0
+        end = start + len(objects) - 1 if objects else 0
+    pagination = {
+        'page': page,
+        'start': start,
+        'end': end,
+        'num_pages': num_pages,
+        'has_next': has_next,
+        'has_previous': has_previous,
+        'total': total,
+        'next_after': objects[-1].id if objects and has_next else None,
+    }
+    return objects, pagination
@@ -9,7 +9,6 @@ All rights reserved.  # NOQA
 """
 
 from django.apps import apps
-from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
 from django.http import JsonResponse
 from rest_framework import status
 from rest_framework.decorators import detail_route, list_route
@@ -51,6 +50,7 @@ from seed.models import Property as PropertyModel
 from seed.serializers.pint import PintJSONEncoder
 from seed.serializers.pint import (
     apply_display_unit_preferences,
+    display_unit_specs,
     add_pint_unit_suffix
 )
 from seed.serializers.properties import (
@@ -63,6 +63,7 @@ from seed.serializers.taxlots import (
     TaxLotViewSerializer,
 )
 from seed.utils.api import api_endpoint_class
+from seed.utils.pagination import paginate_views, view_count_cache_key
 from seed.utils.properties import (
     get_changed_fields,
     pair_unpair_property_taxlot,
@@ -205,7 +206,7 @@ class PropertyViewSet(GenericViewSet):
     serializer_class = PropertySerializer
 
     def _get_filtered_results(self, request, profile_id):
-        page = request.query_params.get('page', 1)
+        page = request.query_params.get('page')
         per_page = request.query_params.get('per_page', 1)
         org_id = request.query_params.get('organization_id', None)
         cycle_id = request.query_params.get('cycle')
@@ -231,29 +232,6 @@ class PropertyViewSet(GenericViewSet):
                     'results': []
                 })
 
-        # Return property views limited to the 'inventory_ids' list.  Otherwise, if selected is empty, return all
-        if 'inventory_ids' in request.data and request.data['inventory_ids']:
-            property_views_list = PropertyView.objects.select_related('property', 'state', 'cycle') \
-                .filter(property_id__in=request.data['inventory_ids'],
-                        property__organization_id=org_id, cycle=cycle) \
-                .order_by('id')  # TODO: test adding .only(*fields['PropertyState'])
-        else:
-            property_views_list = PropertyView.objects.select_related('property', 'state', 'cycle') \
-                .filter(property__organization_id=org_id, cycle=cycle) \
-                .order_by('id')  # TODO: test adding .only(*fields['PropertyState'])
-
-        paginator = Paginator(property_views_list, per_page)
-
-        try:
-            property_views = paginator.page(page)
-            page = int(page)
-        except PageNotAnInteger:
-            property_views = paginator.page(1)
-            page = 1
-        except EmptyPage:
-            property_views = paginator.page(paginator.num_pages)
-            page = paginator.num_pages
-
         org = Organization.objects.get(pk=org_id)
 
         # Retrieve all the columns that are in the db for this organization
@@ -279,23 +257,38 @@ class PropertyViewSet(GenericViewSet):
             except ColumnListSetting.DoesNotExist:
                 show_columns = None
 
+        # Return property views limited to the 'inventory_ids' list.  Otherwise, if selected is empty, return all
+        if 'inventory_ids' in request.data and request.data['inventory_ids']:
+            property_views_list = PropertyView.objects.select_related('property', 'state', 'cycle') \
+                .filter(property_id__in=request.data['inventory_ids'],
+                        property__organization_id=org_id, cycle=cycle) \
+                .order_by('id')
+            count_cache_key = None
+        else:
+            property_views_list = PropertyView.objects.select_related('property', 'state', 'cycle') \
+                .filter(property__organization_id=org_id, cycle=cycle) \
+                .order_by('id')
+            count_cache_key = view_count_cache_key('PropertyView', cycle.id)
+
+        property_views, pagination = paginate_views(
+            TaxLotProperty.only_shown_columns(property_views_list, show_columns, columns_from_database),
+            page,
+            per_page,
+            after=request.query_params.get('after'),
+            count_cache_key=count_cache_key,
+            count_queryset=property_views_list
+        )
+
         related_results = TaxLotProperty.get_related(property_views, show_columns,
                                                      columns_from_database)
 
         # collapse units here so we're only doing the last page; we're already a
         # realized list by now and not a lazy queryset
-        unit_collapsed_results = [apply_display_unit_preferences(org, x) for x in related_results]
+        pint_specs = display_unit_specs(org)
+        unit_collapsed_results = [apply_display_unit_preferences(org, x, pint_specs) for x in related_results]
 
         response = {
-            'pagination': {
-                'page': page,
-                'start': paginator.page(page).start_index(),
-                'end': paginator.page(page).end_index(),
-                'num_pages': paginator.num_pages,
-                'has_next': paginator.page(page).has_next(),
-                'has_previous': paginator.page(page).has_previous(),
-                'total': paginator.count
-            },
+            'pagination': pagination,
             'cycle_id': cycle.id,
             'results': unit_collapsed_results
         }
@@ -355,6 +348,13 @@ class PropertyViewSet(GenericViewSet):
               description: The number of items per page to return
               required: false
               paramType: query
+            - name: after
+              description: The id of the last view of the previous page. Used instead of page to seek
+                           to the next page, see next_after in the pagination of the response. Send
+                           page as well to have page, start and end in the pagination, which are
+                           null otherwise
+              required: false
+              paramType: query
         """
         return self._get_filtered_results(request, profile_id=-1)
 
@@ -383,6 +383,13 @@ class PropertyViewSet(GenericViewSet):
               description: The number of items per page to return
               required: false
               paramType: query
+            - name: after
+              description: The id of the last view of the previous page. Used instead of page to seek
+                           to the next page, see next_after in the pagination of the response. Send
+                           page as well to have page, start and end in the pagination, which are
+                           null otherwise
+              required: false
+              paramType: query
             - name: profile_id
               description: Either an id of a list settings profile, or undefined
               paramType: body
@@ -9,7 +9,6 @@ All rights reserved.  # NOQA
 """
 
 from django.apps import apps
-from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
 from django.http import JsonResponse
 from rest_framework import status
 from rest_framework.decorators import detail_route, list_route
@@ -45,6 +44,7 @@ from seed.models import (
 )
 from seed.serializers.pint import (
     apply_display_unit_preferences,
+    display_unit_specs,
     add_pint_unit_suffix
 )
 from seed.serializers.properties import (
@@ -56,6 +56,7 @@ from seed.serializers.taxlots import (
     TaxLotViewSerializer
 )
 from seed.utils.api import api_endpoint_class
+from seed.utils.pagination import paginate_views, view_count_cache_key
 from seed.utils.properties import (
     get_changed_fields,
     pair_unpair_property_taxlot,
@@ -73,7 +74,7 @@ class TaxLotViewSet(GenericViewSet):
     serializer_class = TaxLotSerializer
 
     def _get_filtered_results(self, request, profile_id):
-        page = request.query_params.get('page', 1)
+        page = request.query_params.get('page')
         per_page = request.query_params.get('per_page', 1)
         org_id = request.query_params.get('organization_id', None)
         cycle_id = request.query_params.get('cycle')
@@ -99,29 +100,6 @@ class TaxLotViewSet(GenericViewSet):
                     'results': []
                 })
 
-        # Return taxlot views limited to the 'inventory_ids' list.  Otherwise, if selected is empty, return all
-        if 'inventory_ids' in request.data and request.data['inventory_ids']:
-            taxlot_views_list = TaxLotView.objects.select_related('taxlot', 'state', 'cycle') \
-                .filter(taxlot_id__in=request.data['inventory_ids'], taxlot__organization_id=org_id,
-                        cycle=cycle) \
-                .order_by('id')
-        else:
-            taxlot_views_list = TaxLotView.objects.select_related('taxlot', 'state', 'cycle') \
-                .filter(taxlot__organization_id=org_id, cycle=cycle) \
-                .order_by('id')
-
-        paginator = Paginator(taxlot_views_list, per_page)
-
-        try:
-            taxlot_views = paginator.page(page)
-            page = int(page)
-        except PageNotAnInteger:
-            taxlot_views = paginator.page(1)
-            page = 1
-        except EmptyPage:
-            taxlot_views = paginator.page(paginator.num_pages)
-            page = paginator.num_pages
-
         org = Organization.objects.get(pk=org_id)
 
         # Retrieve all the columns that are in the db for this organization
@@ -147,23 +125,38 @@ class TaxLotViewSet(GenericViewSet):
             except ColumnListSetting.DoesNotExist:
                 show_columns = None
 
+        # Return taxlot views limited to the 'inventory_ids' list.  Otherwise, if selected is empty, return all
+        if 'inventory_ids' in request.data and request.data['inventory_ids']:
+            taxlot_views_list = TaxLotView.objects.select_related('taxlot', 'state', 'cycle') \
+                .filter(taxlot_id__in=request.data['inventory_ids'], taxlot__organization_id=org_id,
+                        cycle=cycle) \
+                .order_by('id')
+            count_cache_key = None
+        else:
+            taxlot_views_list = TaxLotView.objects.select_related('taxlot', 'state', 'cycle') \
+                .filter(taxlot__organization_id=org_id, cycle=cycle) \
+                .order_by('id')
+            count_cache_key = view_count_cache_key('TaxLotView', cycle.id)
+
+        taxlot_views, pagination = paginate_views(
+            TaxLotProperty.only_shown_columns(taxlot_views_list, show_columns, columns_from_database),
+            page,
+            per_page,
+            after=request.query_params.get('after'),
+            count_cache_key=count_cache_key,
+            count_queryset=taxlot_views_list
+        )
+
         related_results = TaxLotProperty.get_related(taxlot_views, show_columns,
                                                      columns_from_database)
 
         # collapse units here so we're only doing the last page; we're already a
         # realized list by now and not a lazy queryset
-        unit_collapsed_results = [apply_display_unit_preferences(org, x) for x in related_results]
+        pint_specs = display_unit_specs(org)
+        unit_collapsed_results = [apply_display_unit_preferences(org, x, pint_specs) for x in related_results]
 
         response = {
-            'pagination': {
-                'page': page,
-                'start': paginator.page(page).start_index(),
-                'end': paginator.page(page).end_index(),
-                'num_pages': paginator.num_pages,
-                'has_next': paginator.page(page).has_next(),
-                'has_previous': paginator.page(page).has_previous(),
-                'total': paginator.count
-            },
+            'pagination': pagination,
             'cycle_id': cycle.id,
             'results': unit_collapsed_results
         }
@@ -196,6 +189,13 @@ class TaxLotViewSet(GenericViewSet):
               description: The number of items per page to return
               required: false
               paramType: query
+            - name: after
+              description: The id of the last view of the previous page. Used instead of page to seek
+                           to the next page, see next_after in the pagination of the response. Send
+                           page as well to have page, start and end in the pagination, which are
+                           null otherwise
+              required: false
+              paramType: query
         """
         return self._get_filtered_results(request, profile_id=-1)
 
@@ -226,6 +226,13 @@ class TaxLotViewSet(GenericViewSet):
               description: The number of items per page to return
               required: false
               paramType: query
+            - name: after
+              description: The id of the last view of the previous page. Used instead of page to seek
+                           to the next page, see next_after in the pagination of the response. Send
+                           page as well to have page, start and end in the pagination, which are
+                           null otherwise
+              required: false
+              paramType: query
             - name: profile_id
               description: Either an id of a list settings profile, or undefined
               paramType: body